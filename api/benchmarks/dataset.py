@@ -0,0 +1,330 @@
+"""
+Deterministic synthetic data for load tests and benchmarks.
+
+Rows are generated lazily and written in fixed-size batches, one
+transaction per batch, so memory stays flat however many attempts are
+requested: the catalog and students go through ``bulk_create`` (their ids
+are needed), attempts through ``executemany`` of value tuples.
+"""
+import json
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from ..models import Student, Course, Lesson, Attempt, Question, Hint, QuestionAttempt
+from ..services.leaderboard import reconcile_leaderboards
+from ..services.rollups import rebuild_rollups
+from ..services.scheduler import rebuild_review_states
+from ..services.search import rebuild_search_index
+from ..services.tags import rebuild_tag_mastery
+from ..services.versioning import bump_catalog_version, bump_student_version
+
+ATTEMPT_FIELDS = ['student', 'lesson', 'timestamp', 'correctness', 'hints_used', 'duration_sec']
+QUESTION_ATTEMPT_FIELDS = [
+    'student', 'question', 'timestamp', 'answer', 'is_correct', 'hints_used', 'duration_sec', 'points_earned'
+]
+
+TAGS = [
+    "python", "javascript", "html", "css", "sql", "loops", "functions", "variables", "oop",
+    "arrays", "recursion", "data", "api", "testing", "async", "regex", "dom", "ml",
+]
+
+
+@contextmanager
+def fast_sqlite_writes():
+    """Skip fsyncs while bulk loading a SQLite database (outside any transaction)"""
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous = OFF")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous = FULL")
+
+
+@contextmanager
+def throwaway_database(sqlite_path=None):
+    """
+    Run against a freshly migrated test database so benchmarks never touch
+    the development data, and drop it afterwards. On SQLite the database
+    lives in memory unless ``sqlite_path`` is given; use a file when several
+    threads write concurrently, shared-cache memory databases do not wait
+    for locks.
+    """
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings['NAME']
+    if sqlite_path and connection.vendor == 'sqlite':
+        test_settings['NAME'] = str(sqlite_path)
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        test_settings['NAME'] = old_test_name
+
+
+def clear_api_tables():
+    """Empty every api table with the backend's flush SQL, much faster than cascading deletes"""
+    tables = [model._meta.db_table for model in apps.get_app_config('api').get_models()]
+    connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables, allow_cascade=True))
+    bump_catalog_version()
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def insert(model, rows, batch_size):
+    """bulk_create ``rows`` one transaction per batch; returns the saved objects"""
+    saved = []
+    for batch in batched(rows, batch_size):
+        with transaction.atomic():
+            saved.extend(model.objects.bulk_create(batch, batch_size=batch_size))
+    return saved
+
+
+def insert_values(model, fields, rows, batch_size, log=None):
+    """
+    executemany() batches of already adapted value tuples, one transaction
+    per batch, keeping nothing in memory. Used for attempt tables where
+    bulk_create's per-object preparation costs more than the insert itself.
+    """
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(model._meta.get_field(name).column) for name in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    sql = f"INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})"
+
+    count = 0
+    started = time.perf_counter()
+    for batch in batched(rows, batch_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+        count += len(batch)
+        if log and count % (batch_size * 100) == 0:
+            log(f"  {count} {model._meta.verbose_name_plural} ({count / (time.perf_counter() - started):.0f} rows/s)")
+    return count
+
+
+class SyntheticDataset:
+    """
+    Catalog of ``courses`` x ``lessons`` x ``questions`` plus ``students``
+    with ``attempts`` question attempts each.
+
+    Students work through the catalog in order in sessions: session starts
+    are skewed toward the end of the ``days`` window and toward daytime
+    hours, attempts inside a session follow each other by their duration,
+    and correctness depends on student skill versus question difficulty.
+    """
+
+    def __init__(self, courses=5, lessons=8, questions=10, hints=2, students=100, attempts=200,
+                 lesson_attempts=None, days=90, seed=42, batch_size=5000, now=None):
+        self.courses = courses
+        self.lessons = lessons
+        self.questions = questions
+        self.hints = hints
+        self.students = students
+        self.attempts = attempts
+        self.lesson_attempts = attempts // 10 if lesson_attempts is None else lesson_attempts
+        self.days = days
+        self.seed = seed
+        self.batch_size = batch_size
+        self.now = now or timezone.now()
+        self.random = random.Random(seed)
+        self.counts = {}
+
+    def generate(self, log=None):
+        log = log or (lambda message: None)
+        started = time.perf_counter()
+
+        with fast_sqlite_writes():
+            lessons, questions = self.create_catalog()
+            log(f"Catalog: {len(lessons)} lessons, {len(questions)} questions")
+
+            students = insert(Student, self.student_rows(), self.batch_size)
+            log(f"Students: {len(students)}")
+
+            lesson_attempt_count = insert_values(
+                Attempt, ATTEMPT_FIELDS, self.lesson_attempt_rows(students, lessons), self.batch_size
+            )
+            question_attempt_count = insert_values(
+                QuestionAttempt, QUESTION_ATTEMPT_FIELDS, self.question_attempt_rows(students, questions),
+                self.batch_size, log=log,
+            )
+
+        # bulk_create skips signals, so invalidate the cached versions and
+        # derive tag mastery, review states, rollups, leaderboards and the
+        # search index by hand
+        bump_catalog_version()
+        for student in students:
+            bump_student_version(student.id)
+        rebuild_tag_mastery()
+        rebuild_review_states()
+        rebuild_rollups()
+        reconcile_leaderboards()
+        rebuild_search_index()
+
+        self.counts = {
+            "courses": self.courses,
+            "lessons": len(lessons),
+            "questions": len(questions),
+            "students": len(students),
+            "attempts": lesson_attempt_count,
+            "question_attempts": question_attempt_count,
+            "seconds": time.perf_counter() - started,
+        }
+        self.student_ids = [student.id for student in students]
+        self.course_ids = sorted({lesson.course_id for lesson in lessons})
+        self.lesson_ids = [lesson.id for lesson in lessons]
+        self.question_ids = [question.id for question in questions]
+        return self.counts
+
+    def create_catalog(self):
+        rng = self.random
+        courses = insert(Course, (
+            Course(
+                name=f"Course {c + 1}",
+                description=f"Synthetic course {c + 1}",
+                difficulty=rng.randint(1, 5),
+            )
+            for c in range(self.courses)
+        ), self.batch_size)
+
+        lessons = insert(Lesson, (
+            Lesson(
+                course=course,
+                title=f"{course.name} - Lesson {l + 1}",
+                tags=rng.sample(TAGS, 2),
+                order_index=l + 1,
+            )
+            for course in courses
+            for l in range(self.lessons)
+        ), self.batch_size)
+
+        questions = insert(Question, (
+            self.question(lesson, q)
+            for lesson in lessons
+            for q in range(self.questions)
+        ), self.batch_size)
+
+        insert(Hint, (
+            Hint(question=question, content=f"Hint {h + 1}", order_index=h + 1, penalty_points=h + 2)
+            for question in questions
+            for h in range(self.hints)
+        ), self.batch_size)
+
+        return lessons, questions
+
+    def question(self, lesson, index):
+        rng = self.random
+        difficulty = rng.randint(1, 5)
+        question_type = rng.choices(['mcq', 'text', 'coding'], weights=[6, 3, 1])[0]
+        if question_type == 'mcq':
+            options = [f"{letter}) Option {letter}" for letter in "ABCD"]
+            correct_answer = [rng.choice("ABCD")]
+        elif question_type == 'text':
+            options = None
+            correct_answer = [f"answer {index + 1}"]
+        else:
+            options = None
+            correct_answer = [{"test_cases": [{"input": index, "expected": index * 2}]}]
+        return Question(
+            lesson=lesson,
+            question_type=question_type,
+            title=f"Question {index + 1}",
+            content=f"Synthetic question {index + 1} of {lesson.title}",
+            options=options,
+            correct_answer=correct_answer,
+            difficulty=difficulty,
+            points=5 * difficulty + 5,
+            order_index=index + 1,
+            tags=self.random.sample(lesson.tags + TAGS, 2),
+        )
+
+    def student_rows(self):
+        for n in range(self.students):
+            yield Student(name=f"Student {n + 1}", email=f"student{n + 1}.s{self.seed}@synthetic.test")
+
+    def session_starts(self, rng, count):
+        """Session start times, denser toward now and during the day"""
+        starts = []
+        for _ in range(count):
+            days_ago = min(self.days, rng.expovariate(3 / self.days))
+            day = self.now - timedelta(days=days_ago)
+            hour = min(23, max(7, int(rng.gauss(16, 4))))
+            starts.append(day.replace(hour=hour, minute=rng.randint(0, 59), second=rng.randint(0, 59)))
+        return sorted(min(start, self.now) for start in starts)
+
+    def lesson_attempt_rows(self, students, lessons):
+        rng = self.random
+        adapt = connection.ops.adapt_datetimefield_value
+        for student in students:
+            skill = rng.betavariate(5, 3)
+            starts = self.session_starts(rng, self.lesson_attempts)
+            for i, timestamp in enumerate(starts):
+                yield (
+                    student.id,
+                    lessons[i % len(lessons)].id,
+                    adapt(timestamp),
+                    round(min(1.0, max(0.0, rng.gauss(skill, 0.15))), 2),
+                    min(3, int(rng.expovariate(1.2))),
+                    rng.randint(120, 1800),
+                )
+
+    def question_attempt_rows(self, students, questions):
+        rng = self.random
+        adapt = connection.ops.adapt_datetimefield_value
+        hint_penalties = [sum(h + 2 for h in range(used)) for used in range(self.hints + 1)]
+        wrong_answer = json.dumps(["?"])
+        catalog = [
+            (question.id, question.difficulty, question.points, json.dumps(question.correct_answer))
+            for question in questions
+        ]
+        for student in students:
+            skill = rng.betavariate(5, 3)
+            sessions = self.session_starts(rng, max(1, self.attempts // 8))
+            position = 0
+            remaining = self.attempts
+            for session_index, session_start in enumerate(sessions):
+                per_session = remaining // (len(sessions) - session_index)
+                remaining -= per_session
+                timestamp = session_start
+                for _ in range(per_session):
+                    # Mostly move forward through the catalog, sometimes revisit
+                    if position and rng.random() < 0.2:
+                        question_id, difficulty, points, answer = catalog[rng.randrange(min(position, len(catalog)))]
+                    else:
+                        question_id, difficulty, points, answer = catalog[position % len(catalog)]
+                        position += 1
+
+                    is_correct = rng.random() < max(0.05, min(0.98, skill + 0.5 - difficulty * 0.15))
+                    hints_used = min(self.hints, int(rng.expovariate(2.0 if is_correct else 1.0)))
+                    duration = max(5, int(rng.lognormvariate(3.5 + difficulty * 0.2, 0.6)))
+
+                    yield (
+                        student.id,
+                        question_id,
+                        adapt(min(timestamp, self.now)),
+                        answer if is_correct else wrong_answer,
+                        is_correct,
+                        hints_used,
+                        duration,
+                        max(0, points - hint_penalties[hints_used]) if is_correct else 0,
+                    )
+                    timestamp += timedelta(seconds=duration + rng.randint(5, 60))
@@ -0,0 +1,107 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+from .stats import summarize
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fetch(url, data=None, timeout=10):
+    """Issue one request and return (status, body); HTTP errors are returned, not raised"""
+    headers = {"Content-Type": "application/json"} if data is not None else {}
+    request = urllib.request.Request(url, data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read()
+
+
+def server_command(kind, port, workers):
+    """Command line of a gunicorn (sync WSGI) or uvicorn (ASGI) server for the project"""
+    if kind == "gunicorn":
+        return [
+            sys.executable, "-m", "gunicorn", "backend.wsgi:application",
+            "--workers", str(workers), "--bind", f"127.0.0.1:{port}",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "backend.asgi:application",
+        "--workers", str(workers), "--port", str(port), "--no-access-log",
+    ]
+
+
+@contextmanager
+def serve(command, port, env=None, ready_path="/api/courses/", timeout=30):
+    """Start a server subprocess and yield its base URL once it answers"""
+    process = subprocess.Popen(
+        command,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{command[0]} exited with status {process.returncode}")
+            try:
+                fetch(base_url + ready_path, timeout=1)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Server did not become ready within {timeout}s")
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def hammer(base_url, paths, concurrency, duration):
+    """Hit ``paths`` round-robin from ``concurrency`` threads for ``duration`` seconds"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(offset):
+        local_latencies, local_errors = [], 0
+        i = offset
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status, _ = fetch(base_url + paths[i % len(paths)])
+                ok = status < 400
+            except OSError:
+                ok = False
+            if ok:
+                local_latencies.append(time.perf_counter() - started)
+            else:
+                local_errors += 1
+            i += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
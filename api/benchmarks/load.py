@@ -0,0 +1,186 @@
+"""
+Load generator simulating students working through lessons.
+
+Each virtual student loops over one session: list lessons, open a lesson's
+questions, answer a few of them, then poll the overview and recommendation,
+as the frontend does. Sessions are written once as generators that yield
+requests and receive decoded responses, and are driven either by threads
+(WSGI test client or HTTP) or by asyncio tasks (ASGI test client).
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+
+from django.db import connections
+from django.test import AsyncClient, Client
+
+from .http import fetch
+from .stats import summarize
+
+STEPS = ["lessons", "lesson-questions", "answer", "overview", "recommendation"]
+
+
+def student_session(student_id, rng, answers=3):
+    """
+    One study session of ``student_id`` as ``(step, method, path, body)``
+    requests; the decoded JSON of each response is sent back in.
+    """
+    lessons = yield ("lessons", "get", f"/api/lessons/?student={student_id}", None)
+    if not lessons:
+        return
+    lesson = rng.choice(lessons)
+
+    page = yield ("lesson-questions", "get", f"/api/lessons/{lesson['id']}/questions/?student={student_id}", None)
+    questions = page.get("questions", []) if page else []
+    for question in rng.sample(questions, min(answers, len(questions))):
+        is_correct = rng.random() < 0.7
+        yield ("answer", "post", "/api/question-attempts/", {
+            "student": student_id,
+            "question": question["id"],
+            "answer": question["correct_answer"] if is_correct else ["?"],
+            "is_correct": is_correct,
+            "hints_used": rng.choice([0, 0, 0, 1, 2]),
+            "duration_sec": rng.randint(10, 120),
+        })
+
+    yield ("overview", "get", f"/api/students/{student_id}/overview/", None)
+    yield ("recommendation", "get", f"/api/students/{student_id}/recommendation/", None)
+
+
+class Results:
+    """Latencies and errors per session step, safe to share between threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {step: [] for step in STEPS}
+        self.errors = {step: 0 for step in STEPS}
+        self.sessions = 0
+
+    def record(self, step, seconds, ok):
+        with self.lock:
+            if ok:
+                self.latencies[step].append(seconds)
+            else:
+                self.errors[step] += 1
+
+    def report(self, elapsed):
+        steps = {step: summarize(self.latencies[step], self.errors[step], elapsed) for step in STEPS}
+        everything = summarize(
+            [latency for latencies in self.latencies.values() for latency in latencies],
+            sum(self.errors.values()), elapsed,
+        )
+        return {
+            "sessions": self.sessions,
+            "sessions_per_second": self.sessions / elapsed if elapsed else 0,
+            "total": everything,
+            "steps": steps,
+        }
+
+
+def _decode(status, body):
+    if status >= 400 or not body:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+class ClientTransport:
+    """In-process WSGI requests through a Django test client (one per thread)"""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = Client(raise_request_exception=False)
+        if body is None:
+            response = client.get(path)
+        else:
+            response = client.post(path, body, content_type="application/json")
+        return response.status_code, response.content
+
+
+class HttpTransport:
+    """Real HTTP requests to a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, body):
+        data = json.dumps(body).encode() if body is not None else None
+        return fetch(self.base_url + path, data=data)
+
+
+def run_threads(transport, student_ids, concurrency, duration, answers=3, think=0.0, seed=0):
+    """Drive ``concurrency`` threads of back-to-back sessions for ``duration`` seconds"""
+    results = Results()
+    deadline = time.monotonic() + duration
+
+    def worker(n):
+        rng = random.Random(seed + n)
+        student_id = student_ids[n % len(student_ids)]
+        while time.monotonic() < deadline:
+            session = student_session(student_id, rng, answers)
+            response = None
+            try:
+                while True:
+                    step, method, path, body = session.send(response)
+                    started = time.perf_counter()
+                    try:
+                        status, content = transport.request(method, path, body)
+                    except OSError:
+                        status, content = 599, b""
+                    results.record(step, time.perf_counter() - started, status < 400)
+                    response = _decode(status, content)
+                    if think:
+                        time.sleep(rng.uniform(0, 2 * think))
+            except StopIteration:
+                with results.lock:
+                    results.sessions += 1
+        # Each thread opened its own database connection for in-process requests
+        connections.close_all()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results.report(time.perf_counter() - started)
+
+
+async def run_tasks(student_ids, concurrency, duration, answers=3, think=0.0, seed=0):
+    """Drive ``concurrency`` asyncio tasks through the in-process ASGI handler"""
+    results = Results()
+    deadline = time.monotonic() + duration
+
+    async def worker(n):
+        rng = random.Random(seed + n)
+        client = AsyncClient(raise_request_exception=False)
+        student_id = student_ids[n % len(student_ids)]
+        while time.monotonic() < deadline:
+            session = student_session(student_id, rng, answers)
+            response = None
+            try:
+                while True:
+                    step, method, path, body = session.send(response)
+                    started = time.perf_counter()
+                    if body is None:
+                        reply = await client.get(path)
+                    else:
+                        reply = await client.post(path, body, content_type="application/json")
+                    results.record(step, time.perf_counter() - started, reply.status_code < 400)
+                    response = _decode(reply.status_code, reply.content)
+                    if think:
+                        await asyncio.sleep(rng.uniform(0, 2 * think))
+            except StopIteration:
+                results.sessions += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return results.report(time.perf_counter() - started)
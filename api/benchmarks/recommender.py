@@ -0,0 +1,130 @@
+"""
+Profiling and equivalence harness for the recommendation engines.
+
+Fixtures are synthetic datasets of one student over N lessons with M
+question attempts. For each engine the harness reports timings, a cProfile
+listing and the queries grouped by statement shape, and ``scaling_curve``
+repeats the timings over a grid of sizes. ``compare_results`` checks an
+engine against the reference ``get_recommendation`` within a float
+tolerance, so a new engine can be validated before it replaces the old one.
+"""
+import cProfile
+import io
+import math
+import pstats
+import time
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+
+from ..instrumentation import QueryRecorder, fingerprint
+from ..models import Student
+from ..services.recommender import get_recommendation, get_recommendation_batched, aget_recommendation
+from .dataset import SyntheticDataset, clear_api_tables
+
+ENGINES = {
+    "reference": get_recommendation,
+    "batched": get_recommendation_batched,
+    "async": async_to_sync(aget_recommendation),
+}
+
+
+def build_fixture(lessons, attempts, questions=5, seed=42):
+    """One student with ``attempts`` question attempts over a single course of ``lessons`` lessons"""
+    clear_api_tables()
+    dataset = SyntheticDataset(
+        courses=1, lessons=lessons, questions=questions, hints=0, students=1,
+        attempts=attempts, seed=seed, batch_size=10000,
+    )
+    dataset.generate()
+    return Student.objects.get(id=dataset.student_ids[0]), dataset.now
+
+
+def time_engine(engine, student, now, repeat=5):
+    """Wall-time samples (ms) of ``repeat`` calls after one warm-up call"""
+    engine(student, now=now)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        engine(student, now=now)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"min_ms": min(samples), "median_ms": sorted(samples)[len(samples) // 2], "max_ms": max(samples)}
+
+
+def query_breakdown(engine, student, now):
+    """``[(shape, count, total ms)]`` of one call, costliest first"""
+    recorder = QueryRecorder(keep_sql=True)
+    with recorder.record():
+        engine(student, now=now)
+    shapes = defaultdict(lambda: [0, 0.0])
+    for sql, seconds in recorder.queries:
+        entry = shapes[fingerprint(sql)]
+        entry[0] += 1
+        entry[1] += seconds * 1000
+    return sorted(((shape, count, ms) for shape, (count, ms) in shapes.items()), key=lambda row: -row[2])
+
+
+def profile(engine, student, now, limit=25):
+    """cProfile listing of one call sorted by cumulative time"""
+    profiler = cProfile.Profile()
+    profiler.runcall(engine, student, now=now)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
+
+
+def compare_results(expected, actual, rel_tol=1e-9, abs_tol=1e-12, path="result"):
+    """
+    Differences between two recommendation results as ``"path: a != b"``
+    strings; floats are compared with ``math.isclose``. Empty when equal.
+    """
+    if isinstance(expected, float) or isinstance(actual, float):
+        if isinstance(expected, (int, float)) and isinstance(actual, (int, float)) and math.isclose(
+            expected, actual, rel_tol=rel_tol, abs_tol=abs_tol
+        ):
+            return []
+        return [f"{path}: {expected!r} != {actual!r}"]
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        differences = [f"{path}: keys {sorted(expected)} != {sorted(actual)}"] if expected.keys() != actual.keys() else []
+        for key in expected.keys() & actual.keys():
+            differences += compare_results(expected[key], actual[key], rel_tol, abs_tol, f"{path}.{key}")
+        return differences
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path}: {len(expected)} items != {len(actual)} items"]
+        differences = []
+        for index, (left, right) in enumerate(zip(expected, actual)):
+            differences += compare_results(left, right, rel_tol, abs_tol, f"{path}[{index}]")
+        return differences
+    return [] if expected == actual else [f"{path}: {expected!r} != {actual!r}"]
+
+
+def scaling_curve(engines, lesson_counts, attempt_counts, repeat=5, verify=True, log=None):
+    """
+    Time every engine on every (lessons, attempts) fixture. Each point lists
+    per engine its timings and query count and, with ``verify``, the
+    differences from the reference engine.
+    """
+    log = log or (lambda message: None)
+    points = []
+    for lessons in lesson_counts:
+        for attempts in attempt_counts:
+            student, now = build_fixture(lessons, attempts)
+            expected = get_recommendation(student, now=now) if verify else None
+            point = {"lessons": lessons, "attempts": attempts, "engines": {}}
+            for name in engines:
+                engine = ENGINES[name]
+                recorder = QueryRecorder()
+                with recorder.record():
+                    result = engine(student, now=now)
+                stats = {"queries": recorder.count, **time_engine(engine, student, now, repeat)}
+                if verify:
+                    stats["differences"] = compare_results(expected, result)
+                point["engines"][name] = stats
+                log(
+                    f"{lessons:>7} {attempts:>9} {name:<10} {stats['median_ms']:10.2f}ms "
+                    f"{stats['queries']:>8} queries"
+                    + (f"  {len(stats['differences'])} differences" if stats.get("differences") else "")
+                )
+            points.append(point)
+    return points
@@ -0,0 +1,133 @@
+"""
+Startup time and per-request overhead of a settings profile, measured in a
+fresh interpreter so nothing is imported yet::
+
+    DJANGO_SETTINGS_MODULE=backend.settings_api python -m api.benchmarks.startup 2000
+
+prints one JSON object. Requests go straight to the WSGI handler, without a
+server or socket, and hit routes that run no query (a 304 revalidation of
+/courses/ and /analyze-code/), so what they measure is Django, the
+middleware and DRF around the views. ``profile_startup`` runs it for the
+``bench_startup`` command.
+"""
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from .stats import percentile
+
+PROFILES = ["backend.settings", "backend.settings_api"]
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+
+def _environ(method, path, body=b"", **headers):
+    return {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "localhost",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+        **headers,
+    }
+
+
+def _request(application, environ):
+    """Run one request through the handler and return its status code"""
+    statuses = []
+    response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return int(statuses[0].split()[0])
+
+
+def measure(requests):
+    """Startup phases (ms), per-request p50/p95 (µs) per route, module count and peak RSS of this process"""
+    started = time.perf_counter()
+    import django
+
+    django.setup()
+    setup = time.perf_counter()
+
+    from django.core.wsgi import get_wsgi_application
+
+    from api.services.versioning import get_catalog_version
+
+    application = get_wsgi_application()
+    loaded = time.perf_counter()
+
+    etag = f'"catalog-{get_catalog_version()}"'
+    routes = {
+        "revalidate": lambda: _environ("GET", "/api/courses/", HTTP_IF_NONE_MATCH=etag),
+        "analyze-code": lambda: _environ("POST", "/api/analyze-code/", json.dumps({"code": "let x = 1;"}).encode()),
+    }
+    # The first request imports the URLconf, views and serializers
+    status = _request(application, routes["revalidate"]())
+    if status != 304:
+        raise RuntimeError(f"Revalidation returned {status}")
+    first = time.perf_counter()
+
+    result = {
+        "setup_ms": (setup - started) * 1000,
+        "application_ms": (loaded - setup) * 1000,
+        "first_request_ms": (first - loaded) * 1000,
+        "ready_ms": (first - started) * 1000,
+        "modules": len(sys.modules),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "routes": {},
+    }
+    for name, environ in routes.items():
+        latencies = []
+        for _ in range(requests):
+            request = environ()
+            request_started = time.perf_counter()
+            _request(application, request)
+            latencies.append(time.perf_counter() - request_started)
+        latencies.sort()
+        result["routes"][name] = {
+            "p50_us": percentile(latencies, 50) * 1e6,
+            "p95_us": percentile(latencies, 95) * 1e6,
+        }
+    return result
+
+
+def profile_startup(settings_module, requests, runs):
+    """``measure()`` in ``runs`` fresh interpreters; each figure is the median over runs"""
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "api.benchmarks.startup", str(requests)],
+            cwd=PROJECT_DIR, env={**os.environ, "DJANGO_SETTINGS_MODULE": settings_module},
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output))
+
+    def median(values):
+        return sorted(values)[len(values) // 2]
+
+    first = results[0]
+    return {
+        **{key: median([r[key] for r in results]) for key in first if key != "routes"},
+        "routes": {
+            route: {key: median([r["routes"][route][key] for r in results]) for key in figures}
+            for route, figures in first["routes"].items()
+        },
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(measure(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)))
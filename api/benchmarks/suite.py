@@ -0,0 +1,171 @@
+"""
+End-to-end API benchmarks over synthetic datasets of several sizes.
+
+Every route is requested in-process through the Django test client, so the
+numbers include URL resolution, middleware, views and serialization but no
+network or server. Per route the suite records latency percentiles, the
+query count of one request and the peak memory allocated while serving it.
+Results are plain dicts ready for JSON and can be compared with a stored
+baseline by ``compare``.
+"""
+import platform
+import time
+import tracemalloc
+
+import django
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from ..instrumentation import QueryRecorder
+from .dataset import SyntheticDataset
+from .stats import percentile
+
+SCALES = {
+    "small": dict(courses=2, lessons=4, questions=5, students=10, attempts=50),
+    "medium": dict(courses=5, lessons=8, questions=10, students=100, attempts=200),
+    "large": dict(courses=10, lessons=10, questions=10, students=300, attempts=1000),
+}
+
+# Regressions smaller than these are noise on an in-process request
+MIN_LATENCY_DELTA_MS = 2.0
+MIN_MEMORY_DELTA_KB = 64
+
+
+def route_requests(student_id, course_id, lesson_id, question_id):
+    """
+    ``{route name: (method, url, body)}`` for every route in api/urls.py
+    except the server-sent event stream, which never completes.
+    """
+    return {
+        "student-overview": ("get", reverse("student-overview", kwargs={"pk": student_id}), None),
+        "student-recommendation": ("get", reverse("student-recommendation", kwargs={"pk": student_id}), None),
+        "student-question-attempts": (
+            "get", reverse("student-question-attempts", kwargs={"pk": student_id}), None
+        ),
+        "student-reviews-due": ("get", reverse("student-reviews-due", kwargs={"pk": student_id}), None),
+        "course-list": ("get", reverse("course-list"), None),
+        "course-analytics": ("get", reverse("course-analytics", kwargs={"pk": course_id}), None),
+        "course-leaderboard": (
+            "get", f"{reverse('course-leaderboard', kwargs={'pk': course_id})}?student={student_id}", None
+        ),
+        "lesson-list": ("get", f"{reverse('lesson-list')}?student={student_id}", None),
+        "lesson-questions": (
+            "get", f"{reverse('lesson-questions', kwargs={'lesson_id': lesson_id})}?student={student_id}", None
+        ),
+        "lesson-analytics": ("get", reverse("lesson-analytics", kwargs={"lesson_id": lesson_id}), None),
+        "question-list": ("get", reverse("question-list"), None),
+        "question-detail": ("get", reverse("question-detail", kwargs={"pk": question_id}), None),
+        "question-hint": (
+            "post", reverse("question-hint", kwargs={"pk": question_id, "number": 1}), {"student": student_id}
+        ),
+        "question-attempt-create": ("post", reverse("question-attempt-create"), {
+            "student": student_id, "question": question_id, "answer": ["A"], "is_correct": True,
+            "hints_used": 0, "duration_sec": 30,
+        }),
+        "attempt-create": ("post", reverse("attempt-create"), {
+            "student": student_id, "lesson": lesson_id, "correctness": 0.8, "hints_used": 0, "duration_sec": 300,
+        }),
+        "leaderboard": ("get", f"{reverse('leaderboard')}?student={student_id}", None),
+        "analyze-code": ("post", reverse("analyze-code"), {"code": "let total = 0;\nfor (var i = 0; i < 3; i++) {}"}),
+        "search": ("get", f"{reverse('search')}?q=synthetic+question", None),
+    }
+
+
+def measure(client, method, url, body, iterations):
+    """Latency percentiles (ms), queries and peak traced memory (KiB) of one route"""
+    send = getattr(client, method)
+    kwargs = {"data": body, "content_type": "application/json"} if body is not None else {}
+
+    # Warm-up request, also used for the query count
+    recorder = QueryRecorder()
+    with recorder.record():
+        response = send(url, **kwargs)
+    if response.status_code >= 400:
+        raise RuntimeError(f"{method.upper()} {url} returned {response.status_code}")
+
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        send(url, **kwargs)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+
+    # Traced separately: tracemalloc slows allocation-heavy code several fold
+    tracemalloc.start()
+    try:
+        send(url, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": response.status_code,
+        "queries": recorder.count,
+        "response_bytes": len(response.content),
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+def benchmark_scale(params, iterations=50, routes=None, log=None):
+    """Seed a dataset with ``SyntheticDataset(**params)`` into the current database and time every route"""
+    log = log or (lambda message: None)
+    dataset = SyntheticDataset(**params)
+    counts = dataset.generate()
+    log(f"  seeded {counts['question_attempts']} question attempts in {counts['seconds']:.1f}s")
+
+    client = Client()
+    requests = route_requests(
+        dataset.student_ids[0], dataset.course_ids[0], dataset.lesson_ids[0], dataset.question_ids[0]
+    )
+    results = {}
+    for name, (method, url, body) in requests.items():
+        if routes and name not in routes:
+            continue
+        results[name] = measure(client, method, url, body, iterations)
+        log(
+            f"  {name:<26} p50 {results[name]['p50_ms']:7.2f}ms  p95 {results[name]['p95_ms']:7.2f}ms  "
+            f"queries {results[name]['queries']:3d}  peak {results[name]['peak_kb']:8.1f}KiB"
+        )
+    return {"dataset": counts, "routes": results}
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "machine": platform.machine(),
+    }
+
+
+def compare(results, baseline, tolerance=0.5, memory_tolerance=0.25):
+    """
+    Regressions of ``results`` against ``baseline`` as readable strings.
+
+    Query counts must not grow at all; median latency may grow by
+    ``tolerance`` and peak memory by ``memory_tolerance`` (fractions). The
+    tail percentiles are reported but not gated, they are too noisy over a
+    few dozen requests. Routes or scales missing on either side are ignored.
+    """
+    regressions = []
+    for scale, scale_results in results["scales"].items():
+        baseline_routes = baseline.get("scales", {}).get(scale, {}).get("routes", {})
+        for route, current in scale_results["routes"].items():
+            previous = baseline_routes.get(route)
+            if previous is None:
+                continue
+            label = f"{scale}/{route}"
+            if current["queries"] > previous["queries"]:
+                regressions.append(f"{label}: queries {previous['queries']} -> {current['queries']}")
+            if (current["p50_ms"] > previous["p50_ms"] * (1 + tolerance)
+                    and current["p50_ms"] - previous["p50_ms"] > MIN_LATENCY_DELTA_MS):
+                regressions.append(f"{label}: p50 {previous['p50_ms']:.2f}ms -> {current['p50_ms']:.2f}ms")
+            if (current["peak_kb"] > previous["peak_kb"] * (1 + memory_tolerance)
+                    and current["peak_kb"] - previous["peak_kb"] > MIN_MEMORY_DELTA_KB):
+                regressions.append(f"{label}: peak memory {previous['peak_kb']:.0f}KiB -> {current['peak_kb']:.0f}KiB")
+    return regressions
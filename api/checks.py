@@ -0,0 +1,40 @@
+"""
+System checks for deployment mistakes that tests cannot see.
+
+The versions behind ETags and every per-worker cache live in the default
+cache (``api.services.versioning``), so a cache private to each process
+lets workers serve stale data to each other: an ETag handed out by one
+worker is still answered with a 304 by another after a write, and
+matchers, tag index and leaderboards are never invalidated across workers.
+"""
+import os
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def process_local_cache():
+    """Whether the default cache is private to each process"""
+    return settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES
+
+
+def shared_cache_error(workers):
+    return Error(
+        f"{workers} worker processes cannot share the default cache "
+        f"({settings.CACHES['default']['BACKEND']}), so versions and ETags would diverge between them",
+        hint="Set API_CACHE_URL to a Redis URL, or run a single worker",
+        id='api.E001',
+    )
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    if workers > 1 and process_local_cache():
+        return [shared_cache_error(workers)]
+    return []
@@ -0,0 +1,127 @@
+from contextlib import contextmanager
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .instrumentation import NPlusOneDetector
+from .models import Course, Lesson, Question, QuestionAttempt, Student
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with fresh versions and keys; the test database is rolled back but caches are not"""
+    from .services.idempotency import recent_keys
+    cache.clear()
+    recent_keys.clear()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Context manager failing the test when the block runs more than
+    ``max_queries`` queries or repeats one statement shape (N+1)::
+
+        with query_budget(5):
+            client.get(url)
+    """
+    @contextmanager
+    def check(max_queries, threshold=settings.API_NPLUSONE_THRESHOLD):
+        detector = NPlusOneDetector(threshold=threshold)
+        with detector.record():
+            yield detector
+
+        assert not detector.repeated(), f"N+1 query pattern detected:\n{detector.report()}"
+        assert detector.count <= max_queries, (
+            f"{detector.count} queries exceed the budget of {max_queries}:\n"
+            + "\n".join(f"  {sql}" for sql, _ in detector.queries)
+        )
+
+    return check
+
+
+@pytest.fixture
+def no_checkpoint_lag(settings):
+    """Let checkpoint consumers take attempts created a moment ago"""
+    settings.API_CHECKPOINT_LAG_SECONDS = 0
+
+
+@pytest.fixture
+def lesson():
+    """The first lesson, tagged "loops", of a new course"""
+    course = Course.objects.create(name="Course", description="d", difficulty=2)
+    return Lesson.objects.create(course=course, title="Lesson", tags=["loops"], order_index=1)
+
+
+@pytest.fixture
+def question(lesson):
+    """A 10-point question with answer "A" in ``lesson``"""
+    return Question.objects.create(
+        lesson=lesson, title="Q", content="?", correct_answer=["A"], order_index=1, points=10
+    )
+
+
+@pytest.fixture
+def questions(lesson):
+    """Questions Q1 and Q2 in ``lesson``"""
+    return [
+        Question.objects.create(lesson=lesson, title=f"Q{i}", content="?", correct_answer=["A"], order_index=i)
+        for i in range(1, 3)
+    ]
+
+
+@pytest.fixture
+def student():
+    return Student.objects.create(name="S", email="s@example.com")
+
+
+@pytest.fixture
+def students():
+    """Students S0, S1 and S2"""
+    return [Student.objects.create(name=f"S{i}", email=f"s{i}@example.com") for i in range(3)]
+
+
+@pytest.fixture
+def catalog(student, lesson, question):
+    """``(student, lesson, question)``"""
+    return student, lesson, question
+
+
+@pytest.fixture
+def answer():
+    """
+    Submits an attempt through the API, as a client would::
+
+        answer(student, question, is_correct=True, hints_used=0, key=None)
+
+    ``key`` is sent as the Idempotency-Key header.
+    """
+    def submit(student, question, is_correct=True, hints_used=0, key=None):
+        headers = {} if key is None else {'HTTP_IDEMPOTENCY_KEY': key}
+        return APIClient().post(reverse('question-attempt-create'), {
+            'student': student.id, 'question': question.id, 'answer': ['A' if is_correct else 'B'],
+            'is_correct': is_correct, 'hints_used': hints_used, 'duration_sec': 20,
+        }, format='json', **headers)
+
+    return submit
+
+
+@pytest.fixture
+def record_attempt():
+    """
+    Stores an attempt without going through the API (its signals still
+    run), optionally back-dated::
+
+        record_attempt(student, question, is_correct, when=None, hints_used=0, duration_sec=30)
+    """
+    def create(student, question, is_correct, when=None, hints_used=0, duration_sec=30):
+        return QuestionAttempt.objects.create(
+            student=student, question=question, answer=["A"], is_correct=is_correct, hints_used=hints_used,
+            points_earned=question.points if is_correct else 0, duration_sec=duration_sec,
+            timestamp=when or timezone.now(),
+        )
+
+    return create
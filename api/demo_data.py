@@ -0,0 +1,770 @@
+"""
+Demo catalog loaded by the seed_demo command.
+
+Courses hold their lessons, lessons their questions and questions their
+hints; order_index values follow list position. ``progress`` is the share of
+a course's lessons the demo student has lesson attempts for.
+"""
+
+DEMO_STUDENT = {"id": 1, "name": "Demo Student", "email": "demo@student.com"}
+
+COURSES = [
+    {
+        "name": "Python 101",
+        "description": "Learn Python fundamentals",
+        "difficulty": 2,
+        "progress": 0.5,
+        "lessons": [
+            {
+                "title": "Intro to Variables",
+                "tags": ["python", "variables"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Variable Declaration",
+                        "content": "Which of the following is the correct way to declare a variable in Python?",
+                        "options": ["A) var x = 5", "B) x := 5", "C) x = 5", "D) let x = 5"],
+                        "correct_answer": ["C"],
+                        "difficulty": 1,
+                        "points": 10,
+                        "tags": ["variables", "syntax"],
+                        "hints": [
+                            {
+                                "content": "Python uses simple assignment with the = operator.",
+                                "penalty_points": 2,
+                            },
+                            {
+                                "content": "Unlike JavaScript, Python doesn't use var, let, or const keywords.",
+                                "penalty_points": 3,
+                            },
+                        ],
+                    },
+                    {
+                        "question_type": "mcq",
+                        "title": "Data Types",
+                        "content": "What is the data type of the value 'Hello World' in Python?",
+                        "options": ["A) int", "B) float", "C) str", "D) bool"],
+                        "correct_answer": ["C"],
+                        "difficulty": 1,
+                        "points": 10,
+                        "tags": ["data-types", "strings"],
+                        "hints": [
+                            {
+                                "content": "Text enclosed in quotes is called a string.",
+                                "penalty_points": 1,
+                            },
+                        ],
+                    },
+                    {
+                        "question_type": "mcq",
+                        "title": "Variable Naming",
+                        "content": "Which of the following is a valid variable name in Python?",
+                        "options": ["A) 2my_var", "B) my-var", "C) my_var", "D) my var"],
+                        "correct_answer": ["C"],
+                        "difficulty": 1,
+                        "points": 10,
+                        "tags": ["variables", "naming"],
+                        "hints": [
+                            {
+                                "content": "Variable names cannot start with numbers or contain spaces or hyphens.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Loops and Control Flow",
+                "tags": ["python", "loops"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "For Loop Syntax",
+                        "content": "Which of the following is the correct syntax for a for loop in Python?",
+                        "options": [
+                            "A) for i in range(5):",
+                            "B) for (int i = 0; i < 5; i++):",
+                            "C) foreach i in 0..5:",
+                            "D) for i = 0 to 5:",
+                        ],
+                        "correct_answer": ["A"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["loops", "syntax"],
+                        "hints": [
+                            {
+                                "content": "Python uses 'in' to iterate over sequences.",
+                                "penalty_points": 2,
+                            },
+                            {
+                                "content": "The range() function generates a sequence of numbers.",
+                                "penalty_points": 3,
+                            },
+                        ],
+                    },
+                    {
+                        "question_type": "coding",
+                        "title": "Simple Loop",
+                        "content": "Write a Python function that takes a number n and returns the sum of all numbers from 1 to n.",
+                        "correct_answer": [
+                            {
+                                "test_cases": [
+                                    {
+                                        "input": 5,
+                                        "expected": 15,
+                                    },
+                                    {
+                                        "input": 10,
+                                        "expected": 55,
+                                    },
+                                ],
+                            },
+                        ],
+                        "difficulty": 2,
+                        "points": 20,
+                        "tags": ["loops", "functions"],
+                        "hints": [
+                            {
+                                "content": "Use a for loop with range(1, n+1) to iterate from 1 to n.",
+                                "penalty_points": 3,
+                            },
+                            {
+                                "content": "Initialize a variable sum = 0 before the loop and add each number to it.",
+                                "penalty_points": 4,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Functions and Modules",
+                "tags": ["python", "functions"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Function Definition",
+                        "content": "What keyword is used to define a function in Python?",
+                        "options": ["A) function", "B) def", "C) func", "D) define"],
+                        "correct_answer": ["B"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["functions", "syntax"],
+                        "hints": [
+                            {
+                                "content": "Python uses 'def' followed by the function name and parameters.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Data Structures",
+                "tags": ["python", "lists", "dictionaries"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "List Creation",
+                        "content": "How do you create an empty list in Python?",
+                        "options": ["A) list()", "B) []", "C) Both A and B", "D) None of the above"],
+                        "correct_answer": ["C"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["lists", "data-structures"],
+                        "hints": [
+                            {
+                                "content": "Both list() and [] create empty lists.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Object-Oriented Programming",
+                "tags": ["python", "oop", "classes"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Class Definition",
+                        "content": "What keyword is used to define a class in Python?",
+                        "options": ["A) class", "B) def", "C) struct", "D) object"],
+                        "correct_answer": ["A"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["oop", "classes"],
+                        "hints": [
+                            {
+                                "content": "Python uses 'class' followed by the class name.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                    {
+                        "question_type": "mcq",
+                        "title": "Constructor Method",
+                        "content": "What is the name of the special method used to initialize a class instance?",
+                        "options": ["A) __init__", "B) __new__", "C) __construct__", "D) __start__"],
+                        "correct_answer": ["A"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["oop", "constructor"],
+                        "hints": [
+                            {
+                                "content": "__init__ is the constructor method in Python classes.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                    {
+                        "question_type": "mcq",
+                        "title": "Instance Variables",
+                        "content": "How do you access an instance variable in Python?",
+                        "options": [
+                            "A) self.variable_name",
+                            "B) this.variable_name",
+                            "C) instance.variable_name",
+                            "D) obj.variable_name",
+                        ],
+                        "correct_answer": ["A"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["oop", "instance-variables"],
+                        "hints": [
+                            {
+                                "content": "Use 'self' to refer to the current instance of the class.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "File Handling and Exceptions",
+                "tags": ["python", "files", "exceptions"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "File Opening",
+                        "content": "What is the correct way to open a file for reading in Python?",
+                        "options": [
+                            "A) open('file.txt', 'r')",
+                            "B) open('file.txt', 'read')",
+                            "C) open('file.txt', 'w')",
+                            "D) open('file.txt')",
+                        ],
+                        "correct_answer": ["A"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["files", "io"],
+                        "hints": [
+                            {
+                                "content": "'r' mode opens a file for reading.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                    {
+                        "question_type": "mcq",
+                        "title": "Exception Handling",
+                        "content": "What keyword is used to handle exceptions in Python?",
+                        "options": ["A) try-except", "B) try-catch", "C) handle", "D) catch"],
+                        "correct_answer": ["A"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["exceptions", "error-handling"],
+                        "hints": [
+                            {
+                                "content": "Python uses 'try-except' blocks for exception handling.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                    {
+                        "question_type": "coding",
+                        "title": "File Reading",
+                        "content": "Write a Python function that reads a file and returns its content as a string.",
+                        "correct_answer": [
+                            {
+                                "test_cases": [
+                                    {
+                                        "input": "test.txt",
+                                        "expected": "Hello World",
+                                    },
+                                    {
+                                        "input": "empty.txt",
+                                        "expected": "",
+                                    },
+                                ],
+                            },
+                        ],
+                        "difficulty": 3,
+                        "points": 20,
+                        "tags": ["files", "coding"],
+                        "hints": [
+                            {
+                                "content": "Use open() with 'r' mode and read() method.",
+                                "penalty_points": 3,
+                            },
+                            {
+                                "content": "Don't forget to close the file or use 'with' statement.",
+                                "penalty_points": 4,
+                            },
+                        ],
+                    },
+                ],
+            },
+        ],
+    },
+    {
+        "name": "JavaScript Essentials",
+        "description": "Master JavaScript programming",
+        "difficulty": 3,
+        "progress": 0.0,
+        "lessons": [
+            {
+                "title": "Variables and Data Types",
+                "tags": ["javascript", "variables"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Variable Declaration",
+                        "content": "Which keyword is used to declare a variable that can be reassigned in JavaScript?",
+                        "options": ["A) const", "B) let", "C) var", "D) Both B and C"],
+                        "correct_answer": ["D"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["variables", "javascript"],
+                        "hints": [
+                            {
+                                "content": "Both 'let' and 'var' allow reassignment, but 'const' does not.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Functions and Scope",
+                "tags": ["javascript", "functions"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Function Declaration",
+                        "content": "Which of the following is NOT a way to create a function in JavaScript?",
+                        "options": [
+                            "A) function myFunc() {}",
+                            "B) const myFunc = function() {}",
+                            "C) const myFunc = () => {}",
+                            "D) def myFunc() {}",
+                        ],
+                        "correct_answer": ["D"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["functions", "javascript"],
+                        "hints": [
+                            {
+                                "content": "'def' is Python syntax, not JavaScript.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Arrays and Objects",
+                "tags": ["javascript", "arrays"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Array Methods",
+                        "content": "Which method adds an element to the end of an array?",
+                        "options": ["A) push()", "B) pop()", "C) shift()", "D) unshift()"],
+                        "correct_answer": ["A"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["arrays", "methods"],
+                        "hints": [
+                            {
+                                "content": "push() adds to the end, pop() removes from the end.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "DOM Manipulation",
+                "tags": ["javascript", "dom"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "DOM Selection",
+                        "content": "Which method selects the first element with a specific ID?",
+                        "options": [
+                            "A) getElementById()",
+                            "B) getElementsByClassName()",
+                            "C) querySelector()",
+                            "D) Both A and C",
+                        ],
+                        "correct_answer": ["D"],
+                        "difficulty": 3,
+                        "points": 20,
+                        "tags": ["dom", "selection"],
+                        "hints": [
+                            {
+                                "content": "Both methods can select by ID: getElementById('id') and querySelector('#id').",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+        ],
+    },
+    {
+        "name": "Web Development",
+        "description": "Build modern web applications",
+        "difficulty": 4,
+        "progress": 0.75,
+        "lessons": [
+            {
+                "title": "HTML Fundamentals",
+                "tags": ["html", "markup"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "HTML Structure",
+                        "content": "What is the correct HTML5 document structure?",
+                        "options": [
+                            "A) <html><head><body></body></head></html>",
+                            "B) <html><head></head><body></body></html>",
+                            "C) <head><html><body></body></html></head>",
+                            "D) <body><head></head><html></html></body>",
+                        ],
+                        "correct_answer": ["B"],
+                        "difficulty": 1,
+                        "points": 10,
+                        "tags": ["html", "structure"],
+                        "hints": [
+                            {
+                                "content": "HTML structure should be: html > head + body",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "CSS Styling",
+                "tags": ["css", "styling"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "CSS Selectors",
+                        "content": "Which selector targets elements with a specific class?",
+                        "options": [
+                            "A) #classname",
+                            "B) .classname",
+                            "C) classname",
+                            "D) *classname",
+                        ],
+                        "correct_answer": ["B"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["css", "selectors"],
+                        "hints": [
+                            {
+                                "content": "Class selectors use a dot (.) prefix.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "JavaScript Events",
+                "tags": ["javascript", "events"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Event Handling",
+                        "content": "Which method is used to add an event listener in JavaScript?",
+                        "options": [
+                            "A) addEventListener()",
+                            "B) on()",
+                            "C) attachEvent()",
+                            "D) listen()",
+                        ],
+                        "correct_answer": ["A"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["events", "javascript"],
+                        "hints": [
+                            {
+                                "content": "addEventListener() is the modern way to handle events.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Responsive Design",
+                "tags": ["css", "responsive"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Media Queries",
+                        "content": "What CSS feature is used to make designs responsive?",
+                        "options": [
+                            "A) Media queries",
+                            "B) Flexbox",
+                            "C) Grid",
+                            "D) All of the above",
+                        ],
+                        "correct_answer": ["D"],
+                        "difficulty": 3,
+                        "points": 20,
+                        "tags": ["responsive", "css"],
+                        "hints": [
+                            {
+                                "content": "Responsive design uses multiple CSS features together.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "API Integration",
+                "tags": ["javascript", "api"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "HTTP Methods",
+                        "content": "Which HTTP method is used to retrieve data from an API?",
+                        "options": ["A) POST", "B) GET", "C) PUT", "D) DELETE"],
+                        "correct_answer": ["B"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["api", "http"],
+                        "hints": [
+                            {
+                                "content": "GET is used for retrieving/reading data.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+        ],
+    },
+    {
+        "name": "Data Science with Python",
+        "description": "Analyze data with Python libraries",
+        "difficulty": 5,
+        "progress": 0.25,
+        "lessons": [
+            {
+                "title": "NumPy Basics",
+                "tags": ["python", "numpy", "data"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "NumPy Arrays",
+                        "content": "What is the main data structure in NumPy?",
+                        "options": ["A) List", "B) Array", "C) ndarray", "D) Matrix"],
+                        "correct_answer": ["C"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["numpy", "arrays"],
+                        "hints": [
+                            {
+                                "content": "NumPy's main data structure is called ndarray (n-dimensional array).",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Pandas DataFrames",
+                "tags": ["python", "pandas", "data"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Pandas DataFrames",
+                        "content": "What is the main data structure in Pandas?",
+                        "options": ["A) Series", "B) DataFrame", "C) Array", "D) Both A and B"],
+                        "correct_answer": ["D"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["pandas", "dataframes"],
+                        "hints": [
+                            {
+                                "content": "Pandas has two main structures: Series (1D) and DataFrame (2D).",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Data Visualization",
+                "tags": ["python", "matplotlib", "charts"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Matplotlib",
+                        "content": "Which Python library is commonly used for data visualization?",
+                        "options": [
+                            "A) matplotlib",
+                            "B) seaborn",
+                            "C) plotly",
+                            "D) All of the above",
+                        ],
+                        "correct_answer": ["D"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["visualization", "matplotlib"],
+                        "hints": [
+                            {
+                                "content": "All three are popular Python visualization libraries.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Statistical Analysis",
+                "tags": ["python", "statistics"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Central Tendency",
+                        "content": "Which measure represents the middle value in a dataset?",
+                        "options": ["A) Mean", "B) Median", "C) Mode", "D) All of the above"],
+                        "correct_answer": ["B"],
+                        "difficulty": 2,
+                        "points": 15,
+                        "tags": ["statistics", "central-tendency"],
+                        "hints": [
+                            {
+                                "content": "Median is the middle value when data is sorted.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+        ],
+    },
+    {
+        "name": "Machine Learning",
+        "description": "Introduction to ML algorithms",
+        "difficulty": 5,
+        "progress": 0.0,
+        "lessons": [
+            {
+                "title": "Linear Regression",
+                "tags": ["ml", "regression"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Linear Regression",
+                        "content": "What type of problem does linear regression solve?",
+                        "options": [
+                            "A) Classification",
+                            "B) Regression",
+                            "C) Clustering",
+                            "D) Dimensionality reduction",
+                        ],
+                        "correct_answer": ["B"],
+                        "difficulty": 3,
+                        "points": 20,
+                        "tags": ["regression", "machine-learning"],
+                        "hints": [
+                            {
+                                "content": "Linear regression predicts continuous numerical values.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Classification Algorithms",
+                "tags": ["ml", "classification"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Classification",
+                        "content": "What type of problem does classification solve?",
+                        "options": [
+                            "A) Predicting continuous values",
+                            "B) Predicting categories/classes",
+                            "C) Finding patterns in data",
+                            "D) Reducing data dimensions",
+                        ],
+                        "correct_answer": ["B"],
+                        "difficulty": 3,
+                        "points": 20,
+                        "tags": ["classification", "machine-learning"],
+                        "hints": [
+                            {
+                                "content": "Classification predicts discrete categories or classes.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Neural Networks",
+                "tags": ["ml", "neural-networks"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Neural Networks",
+                        "content": "What is the basic building block of a neural network?",
+                        "options": ["A) Layer", "B) Neuron", "C) Weight", "D) Bias"],
+                        "correct_answer": ["B"],
+                        "difficulty": 3,
+                        "points": 20,
+                        "tags": ["neural-networks", "deep-learning"],
+                        "hints": [
+                            {
+                                "content": "Neurons (or nodes) are the basic processing units in neural networks.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "title": "Model Evaluation",
+                "tags": ["ml", "evaluation"],
+                "questions": [
+                    {
+                        "question_type": "mcq",
+                        "title": "Model Evaluation",
+                        "content": "What metric is used to evaluate classification models?",
+                        "options": ["A) Accuracy", "B) RMSE", "C) R-squared", "D) All of the above"],
+                        "correct_answer": ["A"],
+                        "difficulty": 3,
+                        "points": 20,
+                        "tags": ["evaluation", "metrics"],
+                        "hints": [
+                            {
+                                "content": "Accuracy measures correct predictions in classification.",
+                                "penalty_points": 2,
+                            },
+                        ],
+                    },
+                ],
+            },
+        ],
+    },
+]
@@ -0,0 +1,77 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+class QueryRecorder:
+    """
+    ``connection.execute_wrapper`` that counts queries and their time.
+
+    With ``keep_sql`` every statement is kept as ``(sql, seconds)`` for slow
+    request logs and query analysis.
+    """
+
+    def __init__(self, keep_sql=False):
+        self.keep_sql = keep_sql
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if self.keep_sql:
+                self.queries.append((sql, elapsed))
+
+    @contextmanager
+    def record(self):
+        """Install the wrapper on every database connection of this thread"""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Statement shape with literals, placeholders and IN-lists collapsed"""
+    shape = _STRING_LITERAL.sub("?", sql)
+    shape = _NUMBER_LITERAL.sub("?", shape).replace("%s", "?")
+    shape = _IN_LIST.sub("IN (?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+class NPlusOneDetector(QueryRecorder):
+    """
+    Flags statement shapes executed ``threshold`` times or more in one unit
+    of work (a request, a test block), the signature of an N+1 loop.
+    """
+
+    def __init__(self, threshold=5):
+        super().__init__(keep_sql=True)
+        self.threshold = threshold
+
+    def repeated(self):
+        """``[(shape, count)]`` of repeated shapes, most frequent first"""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return [(shape, count) for shape, count in counts.most_common() if count >= self.threshold]
+
+    def report(self):
+        return "\n".join(f"  {count}x {shape}" for shape, count in self.repeated())
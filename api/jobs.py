@@ -0,0 +1,31 @@
+"""
+Jobs available to ``manage.py run_workers``; enqueue them with
+``services.jobs.enqueue(name, payload)``. Payload keys are passed as
+keyword arguments.
+"""
+from .services import grading, ingest, jobs, leaderboard, rollups, scheduler, search, stats, tags
+
+jobs.job("update_stats")(stats.update_stats)
+jobs.job("rebuild_stats")(stats.rebuild_stats)
+jobs.job("aggregate_rollups")(rollups.aggregate_rollups)
+jobs.job("rebuild_rollups")(rollups.rebuild_rollups)
+jobs.job("reconcile_leaderboards")(leaderboard.reconcile_leaderboards)
+jobs.job("rebuild_tag_mastery")(tags.rebuild_tag_mastery)
+jobs.job("rebuild_review_states")(scheduler.rebuild_review_states)
+jobs.job("rebuild_search_index")(search.rebuild_search_index)
+jobs.job("flush_attempts")(ingest.flush)
+jobs.job("prune_jobs")(jobs.prune)
+
+# Everything computed from question attempts, rebuilt when regrading changed some
+DERIVED_FROM_ATTEMPTS = (
+    "rebuild_stats", "rebuild_rollups", "rebuild_tag_mastery", "rebuild_review_states", "reconcile_leaderboards",
+)
+
+
+@jobs.job("regrade_attempts")
+def regrade_attempts(question_ids=None, batch_size=None):
+    changed = grading.regrade_attempts(question_ids, batch_size)
+    if changed:
+        for name in DERIVED_FROM_ATTEMPTS:
+            jobs.enqueue(name, dedupe_key=name)
+    return changed
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.rollups import aggregate_rollups, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Fold new question attempts into the hourly/daily activity rollups and lesson funnels'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--rebuild', action='store_true', help='Drop the rollups and aggregate every attempt')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep running, checking for new attempts every this many seconds')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            processed = rebuild_rollups(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups from {processed} attempts"))
+
+        while True:
+            started = time.perf_counter()
+            processed = aggregate_rollups(options['batch_size'])
+            if processed or options['interval'] is None:
+                self.stdout.write(
+                    f"Processed {processed} new attempts in {(time.perf_counter() - started) * 1000:.0f}ms"
+                )
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
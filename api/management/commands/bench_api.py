@@ -0,0 +1,63 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.dataset import clear_api_tables, throwaway_database
+from api.benchmarks.suite import SCALES, benchmark_scale, compare, environment
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / "benchmarks" / "baseline.json"
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API route at several data scales in a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=list(SCALES))
+        parser.add_argument('--routes', nargs='+', help='Only these route names')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per route')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                            help='Baseline JSON to compare against (default: api/benchmarks/baseline.json)')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Allowed growth of median latency, as a fraction')
+        parser.add_argument('--memory-tolerance', type=float, default=0.25,
+                            help='Allowed growth of peak memory, as a fraction')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Store these results as the new baseline instead of comparing')
+
+    def handle(self, *args, **options):
+        results = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "environment": environment(),
+            "iterations": options['iterations'],
+            "scales": {},
+        }
+
+        with throwaway_database():
+            for scale in options['scales']:
+                self.stdout.write(f"{scale}:")
+                clear_api_tables()
+                results["scales"][scale] = benchmark_scale(
+                    SCALES[scale], options['iterations'], options['routes'], log=self.stdout.write
+                )
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+
+        baseline_path = Path(options['baseline'])
+        if options['update_baseline']:
+            baseline_path.write_text(json.dumps(results, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Baseline updated: {baseline_path}"))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f"No baseline at {baseline_path}, nothing to compare"))
+            return
+
+        regressions = compare(results, json.loads(baseline_path.read_text()), options['tolerance'], options['memory_tolerance'])
+        if regressions:
+            raise CommandError("Regressions against baseline:\n" + "\n".join(f"  {line}" for line in regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.dataset import throwaway_database
+from api.benchmarks.recommender import ENGINES, build_fixture, profile, query_breakdown, scaling_curve
+
+
+class Command(BaseCommand):
+    help = 'Profile the recommendation engines over N lessons x M attempts and check they agree'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+        parser.add_argument('--lessons', nargs='+', type=int, default=[10, 50, 100])
+        parser.add_argument('--attempts', nargs='+', type=int, default=[100, 1000, 10000],
+                            help='Question attempts of the benchmarked student')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed calls per engine and point')
+        parser.add_argument('--no-verify', action='store_true',
+                            help='Skip comparing every engine with the reference engine')
+        parser.add_argument('--profile', action='store_true',
+                            help='Print cProfile and per-query breakdowns at the largest point')
+        parser.add_argument('--output', help='Write the scaling curve as JSON to this file')
+
+    def handle(self, *args, **options):
+        verify = not options['no_verify']
+        with throwaway_database():
+            self.stdout.write(f"{'lessons':>7} {'attempts':>9} {'engine':<10} {'median':>12} {'queries':>8}")
+            points = scaling_curve(
+                options['engines'], options['lessons'], options['attempts'],
+                repeat=options['repeat'], verify=verify, log=self.stdout.write,
+            )
+            if options['profile']:
+                self.print_profiles(options['engines'], max(options['lessons']), max(options['attempts']))
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(points, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if verify:
+            mismatches = [
+                f"{point['lessons']} lessons x {point['attempts']} attempts, {name}: {difference}"
+                for point in points
+                for name, stats in point['engines'].items()
+                for difference in stats['differences']
+            ]
+            if mismatches:
+                raise CommandError("Engines disagree with the reference:\n" + "\n".join(mismatches[:20]))
+            self.stdout.write(self.style.SUCCESS("All engines match the reference engine"))
+
+    def print_profiles(self, engines, lessons, attempts):
+        student, now = build_fixture(lessons, attempts)
+        for name in engines:
+            self.stdout.write(f"\n==== {name}: {lessons} lessons x {attempts} attempts ====")
+            self.stdout.write(f"{'count':>6} {'total ms':>9}  statement")
+            for shape, count, ms in query_breakdown(ENGINES[name], student, now):
+                self.stdout.write(f"{count:>6} {ms:>9.2f}  {shape[:150]}")
+            self.stdout.write(profile(ENGINES[name], student, now))
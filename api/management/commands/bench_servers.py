@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.benchmarks.http import free_port, hammer, serve, server_command
+
+DEFAULT_PATHS = [
+    "/api/students/1/overview/",
+    "/api/students/1/recommendation/",
+    "/api/students/1/question-attempts/",
+    "/api/lessons/1/questions/?student=1",
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare read-endpoint throughput under gunicorn sync workers and uvicorn (async views)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', choices=['gunicorn', 'uvicorn'], default=['gunicorn', 'uvicorn'])
+        parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per server')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        results = {}
+        for kind in options['servers']:
+            port = free_port()
+            # uvicorn gets the async views, gunicorn keeps the sync ones
+            env = {"API_ASYNC_VIEWS": "1" if kind == "uvicorn" else "0"}
+            with serve(server_command(kind, port, options['workers']), port, env=env) as base_url:
+                hammer(base_url, options['paths'], options['concurrency'], 1.0)  # warm up
+                results[kind] = hammer(base_url, options['paths'], options['concurrency'], options['duration'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for kind, result in results.items():
+            self.stdout.write(
+                f"{kind:<9} {result['throughput_rps']:8.1f} req/s  "
+                f"p50 {result['p50_ms']:7.1f}ms  p95 {result['p95_ms']:7.1f}ms  "
+                f"p99 {result['p99_ms']:7.1f}ms  errors {result['errors']}"
+            )
@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.benchmarks.startup import PROFILES, profile_startup
+
+
+class Command(BaseCommand):
+    help = 'Compare startup time and per-request overhead of settings profiles (full vs API-only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=PROFILES, help='Settings modules to compare')
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per profile')
+        parser.add_argument('--requests', type=int, default=2000, help='Timed requests per route and run')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        results = {
+            profile: profile_startup(profile, options['requests'], options['runs'])
+            for profile in options['profiles']
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for profile, result in results.items():
+            self.stdout.write(
+                f"{profile:<22} ready {result['ready_ms']:6.0f}ms "
+                f"(setup {result['setup_ms']:.0f}, app {result['application_ms']:.0f}, "
+                f"first request {result['first_request_ms']:.0f})  "
+                f"{result['modules']} modules  peak {result['peak_rss_kb'] / 1024:.1f}MiB"
+            )
+            for route, figures in result['routes'].items():
+                self.stdout.write(f"  {route:<14} p50 {figures['p50_us']:7.0f}µs  p95 {figures['p95_us']:7.0f}µs")
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.ingest import flush
+
+
+class Command(BaseCommand):
+    help = 'Insert write-behind question attempts from the journal (settings.API_WRITE_BEHIND)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Attempts per transaction (default: API_WRITE_BEHIND_BATCH_SIZE)')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep running, polling the journal every this many seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            flushed = flush(options['batch_size'])
+            if flushed or options['interval'] is None:
+                self.stdout.write(f"Flushed {flushed} attempts in {(time.perf_counter() - started) * 1000:.0f}ms")
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.dataset import SyntheticDataset, throwaway_database
+from api.benchmarks.http import free_port, serve, server_command
+from api.benchmarks.load import ClientTransport, HttpTransport, STEPS, run_tasks, run_threads
+from api.benchmarks.suite import SCALES
+
+
+class Command(BaseCommand):
+    help = 'Simulate concurrent students (lessons, questions, answers, progress polling) and report latency'
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument('--app', choices=['wsgi', 'asgi'], default='wsgi',
+                            help='Drive the app in process: wsgi with threads, asgi with asyncio tasks (default)')
+        target.add_argument('--url', help='Base URL of an already running server')
+        target.add_argument('--serve', choices=['gunicorn', 'uvicorn'],
+                            help='Start a local server on the configured database for the run')
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes for --serve')
+        parser.add_argument('--concurrency', type=int, default=16, help='Simultaneous students')
+        parser.add_argument('--duration', type=float, default=20.0, help='Seconds of load')
+        parser.add_argument('--answers', type=int, default=3, help='Questions answered per session')
+        parser.add_argument('--think-ms', type=float, default=0, help='Mean pause between requests')
+        parser.add_argument('--scale', choices=list(SCALES), default='medium',
+                            help='Dataset seeded into a throwaway database for in-process runs')
+        parser.add_argument('--students', nargs='+', type=int, default=[1],
+                            help='Existing student ids to play with --url/--serve')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        think = options['think_ms'] / 1000
+        run = dict(
+            concurrency=options['concurrency'], duration=options['duration'],
+            answers=options['answers'], think=think,
+        )
+
+        with ExitStack() as stack:
+            if options['url'] or options['serve']:
+                base_url = options['url']
+                if options['serve']:
+                    port = free_port()
+                    env = {"API_ASYNC_VIEWS": "1" if options['serve'] == "uvicorn" else "0"}
+                    base_url = stack.enter_context(
+                        serve(server_command(options['serve'], port, options['workers']), port, env=env)
+                    )
+                self.stdout.write(f"Load testing {base_url} with {options['concurrency']} students")
+                results = run_threads(HttpTransport(base_url), options['students'], **run)
+            else:
+                # File-backed so concurrent writers wait for SQLite's lock instead of failing
+                directory = stack.enter_context(tempfile.TemporaryDirectory())
+                stack.enter_context(throwaway_database(sqlite_path=Path(directory) / "loadtest.sqlite3"))
+                params = {**SCALES[options['scale']]}
+                params['students'] = max(params['students'], options['concurrency'])
+                dataset = SyntheticDataset(**params)
+                dataset.generate()
+                student_ids = dataset.student_ids[:options['concurrency']]
+
+                if options['app'] == 'asgi':
+                    if not settings.API_ASYNC_VIEWS:
+                        self.stdout.write(self.style.WARNING(
+                            "API_ASYNC_VIEWS is off, ASGI requests are served by the sync views"
+                        ))
+                    self.stdout.write(f"Load testing the ASGI app in process with {options['concurrency']} tasks")
+                    results = asyncio.run(run_tasks(student_ids, **run))
+                else:
+                    self.stdout.write(f"Load testing the WSGI app in process with {options['concurrency']} threads")
+                    results = run_threads(ClientTransport(), student_ids, **run)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{'step':<18} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+        for step in STEPS + ["total"]:
+            stats = results['total'] if step == "total" else results['steps'][step]
+            self.stdout.write(
+                f"{step:<18} {stats['throughput_rps']:8.1f} {stats['p50_ms']:7.1f}ms {stats['p95_ms']:7.1f}ms "
+                f"{stats['p99_ms']:7.1f}ms {stats['error_rate']:6.1%}"
+            )
+        self.stdout.write(f"{results['sessions']} sessions ({results['sessions_per_second']:.1f}/s)")
+        if results['total']['requests'] == 0:
+            raise CommandError("No requests completed")
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.scheduler import rebuild_review_states
+
+
+class Command(BaseCommand):
+    help = 'Recompute every spaced-repetition review state from the question attempt history'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild_review_states()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rows} review states in {(time.perf_counter() - started) * 1000:.0f}ms"
+        ))
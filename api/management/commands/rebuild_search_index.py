@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Index every course, lesson, question and hint for /search/ again, e.g. after bulk loads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        indexed = rebuild_search_index(options['batch_size'])
+        self.stdout.write(f"Indexed {indexed} documents in {(time.perf_counter() - started) * 1000:.0f}ms")
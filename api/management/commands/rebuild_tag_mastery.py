@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.tags import rebuild_tag_mastery
+
+
+class Command(BaseCommand):
+    help = "Recount every student's per-tag mastery from all question attempts (e.g. after bulk imports)"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild_tag_mastery()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rows} tag mastery rows in {(time.perf_counter() - started) * 1000:.0f}ms"
+        ))
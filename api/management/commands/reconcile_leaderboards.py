@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.leaderboard import reconcile_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Recount the global and course leaderboards from the question attempts and fix drifted entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep running, reconciling every this many seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            fixed = reconcile_leaderboards()
+            self.stdout.write(
+                f"Reconciled leaderboards in {(time.perf_counter() - started) * 1000:.0f}ms, {fixed} entries fixed"
+            )
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
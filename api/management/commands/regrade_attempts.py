@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.jobs import DERIVED_FROM_ATTEMPTS
+from api.services import jobs
+from api.services.grading import regrade_attempts
+
+
+class Command(BaseCommand):
+    help = 'Grade stored question attempts again and rebuild what is derived from the ones that changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, nargs='+', default=None, help='Only attempts at these questions')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--enqueue', action='store_true',
+                            help='Queue a regrade_attempts job for run_workers instead of running now')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            queued = jobs.enqueue(
+                'regrade_attempts', {'question_ids': options['questions'], 'batch_size': options['batch_size']}
+            )
+            self.stdout.write(f"Queued {queued}")
+            return
+
+        started = time.perf_counter()
+        changed = regrade_attempts(options['questions'], options['batch_size'])
+        self.stdout.write(f"Regraded attempts in {(time.perf_counter() - started) * 1000:.0f}ms, {changed} changed")
+        if not changed:
+            return
+
+        for name in DERIVED_FROM_ATTEMPTS:
+            started = time.perf_counter()
+            jobs.JOBS[name]()
+            self.stdout.write(f"Ran {name} in {(time.perf_counter() - started) * 1000:.0f}ms")
@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.models import Job
+from api.services import jobs
+
+
+def _every(value):
+    name, _, seconds = value.partition('=')
+    try:
+        return name, float(seconds)
+    except ValueError:
+        raise ValueError(f"Expected NAME=SECONDS, got {value!r}")
+
+
+def _worker(index, names, poll, burst):
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The parent turns Ctrl-C into SIGTERM
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    jobs.work(worker_id, names, poll=poll, burst=burst, should_stop=lambda: bool(stopping))
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the job table in worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes (default: 2)')
+        parser.add_argument('--jobs', nargs='+', default=None, help='Only run these job names')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Seconds an idle worker waits before looking for jobs again')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due')
+        parser.add_argument('--every', type=_every, action='append', default=[], metavar='NAME=SECONDS',
+                            help='Enqueue job NAME every SECONDS (deduplicated while one is pending)')
+        parser.add_argument('--stale-after', type=float, default=120,
+                            help='Requeue (or fail, when out of attempts) running jobs whose worker sent no heartbeat '
+                                 f'for this many seconds (heartbeats every {jobs.HEARTBEAT_SECONDS}s)')
+        parser.add_argument('--report', type=float, default=60, help='Seconds between throughput reports')
+
+    def handle(self, *args, **options):
+        unknown = {name for name in options['jobs'] or []} | {name for name, _ in options['every']}
+        unknown -= set(jobs.JOBS)
+        if unknown:
+            raise CommandError(f"Unknown jobs: {', '.join(sorted(unknown))}")
+
+        # Children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=_worker, args=(index, options['jobs'], options['poll'], options['burst']))
+            for index in range(options['workers'])
+        ]
+        for process in workers:
+            process.start()
+        self.stdout.write(f"Started {len(workers)} workers")
+
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+
+        started = time.perf_counter()
+        next_run = {name: 0.0 for name, _ in options['every']}
+        last_report, done_before = time.monotonic(), self.done()
+        while any(process.is_alive() for process in workers) and not stopping:
+            now = time.monotonic()
+            for name, seconds in options['every']:
+                if now >= next_run[name]:
+                    jobs.enqueue(name, dedupe_key=f"every:{name}")
+                    next_run[name] = now + seconds
+            if now - last_report >= options['report']:
+                requeued, failed = jobs.recover_stale(options['stale_after'])
+                done = self.done()
+                self.stdout.write(
+                    f"{max(0, done - done_before) / (now - last_report):.1f} jobs/s, "
+                    f"{requeued} stale jobs requeued, {failed} failed"
+                )
+                last_report, done_before = now, done
+            time.sleep(min(options['poll'], 1.0))
+
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+        for process in workers:
+            process.join()
+        self.stdout.write(
+            f"Workers stopped after {time.perf_counter() - started:.1f}s, {self.done()} jobs done in total"
+        )
+
+    @staticmethod
+    def done():
+        return Job.objects.filter(status=Job.DONE).count()
@@ -0,0 +1,47 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from api.benchmarks.dataset import SyntheticDataset
+
+
+class Command(BaseCommand):
+    help = 'Generate a large deterministic synthetic dataset for load testing and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=5)
+        parser.add_argument('--lessons', type=int, default=8, help='Lessons per course')
+        parser.add_argument('--questions', type=int, default=10, help='Questions per lesson')
+        parser.add_argument('--hints', type=int, default=2, help='Hints per question')
+        parser.add_argument('--students', type=int, default=100)
+        parser.add_argument('--attempts', type=int, default=200, help='Question attempts per student')
+        parser.add_argument('--lesson-attempts', type=int, default=None,
+                            help='Lesson attempts per student (default: attempts / 10)')
+        parser.add_argument('--days', type=int, default=90, help='Length of the generated history')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--flush', action='store_true', help='Delete ALL existing data first')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            call_command('flush', interactive=False, verbosity=0)
+
+        dataset = SyntheticDataset(
+            courses=options['courses'],
+            lessons=options['lessons'],
+            questions=options['questions'],
+            hints=options['hints'],
+            students=options['students'],
+            attempts=options['attempts'],
+            lesson_attempts=options['lesson_attempts'],
+            days=options['days'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        counts = dataset.generate(log=self.stdout.write)
+
+        total_rows = counts['attempts'] + counts['question_attempts']
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['students']} students, {counts['questions']} questions, "
+            f"{counts['attempts']} lesson attempts and {counts['question_attempts']} question attempts "
+            f"in {counts['seconds']:.1f}s ({total_rows / max(counts['seconds'], 1e-9):.0f} attempt rows/s)"
+        ))
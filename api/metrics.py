@@ -0,0 +1,126 @@
+"""
+Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Histograms are cumulative, as Prometheus expects; rolling views come from
+``rate()``/``histogram_quantile()`` over a window. Each worker process keeps
+its own registry, so scrape every worker (or run a single one) to see all
+traffic.
+"""
+import threading
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._help = {}
+        self._gauges = {}
+
+    def histogram(self, name, help_text, buckets=DURATION_BUCKETS):
+        """Declare a histogram; observations use the buckets given here"""
+        self._help[name] = (help_text, "histogram", buckets)
+
+    def gauge(self, name, help_text, collect):
+        """Declare a gauge sampled at render time: ``collect()`` returns ``[(labels, value)]``"""
+        self._gauges[name] = (help_text, collect, None)
+
+    def gauges(self, help_texts, collect):
+        """
+        Declare several gauges sampled together: ``help_texts`` maps each name
+        to its help text, and ``collect()``, called once per render, returns
+        ``{name: [(labels, value)]}``
+        """
+        for name, help_text in help_texts.items():
+            self._gauges[name] = (help_text, collect, name)
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._help[name][2])
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            snapshot = {
+                key: (list(h.buckets), list(h.counts), h.sum, h.count)
+                for key, h in self._histograms.items()
+            }
+
+        by_name = {}
+        for (name, labels), values in sorted(snapshot.items()):
+            by_name.setdefault(name, []).append((labels, values))
+
+        for name, series in by_name.items():
+            help_text = self._help[name][0]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, (buckets, counts, total, count) in series:
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        collected = {}
+        for name, (help_text, collect, key) in sorted(self._gauges.items()):
+            if key is None:
+                samples = collect()
+            else:
+                if collect not in collected:
+                    collected[collect] = collect()
+                samples = collected[collect][key]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(sorted(labels.items()))} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+registry.histogram("api_request_duration_seconds", "Wall time per request")
+registry.histogram("api_request_db_queries", "Database queries per request", COUNT_BUCKETS)
+registry.histogram("api_request_db_duration_seconds", "Database time per request")
+registry.histogram("api_request_serialization_seconds", "Response rendering time per request")
+registry.histogram("api_response_bytes", "Response body size", BYTES_BUCKETS)
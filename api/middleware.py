@@ -1,21 +1,324 @@
 # backend/api/middleware.py
-class DisableThrottlingMiddleware:
+import gzip
+import hashlib
+import logging
+import re
+import time
+import zlib
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .instrumentation import NPlusOneDetector, NPlusOneError, QueryRecorder
+from .metrics import registry
+from .services.versioning import is_catalog_etag
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+performance_logger = logging.getLogger('api.performance')
+
+
+class DisableThrottlingMiddleware(MiddlewareMixin):
     """
     Middleware to completely disable throttling for development
     """
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
+    def process_request(self, request):
         # Remove any throttling-related headers
         if hasattr(request, 'throttle'):
             request.throttle = None
-        
-        response = self.get_response(request)
-        
+
+    def process_response(self, request, response):
         # Remove throttling headers from response
         if hasattr(response, 'headers'):
             response.headers.pop('X-Throttle-State', None)
-            response.headers.pop('Retry-After', None)
+            if response.status_code == 429:
+                response.headers.pop('Retry-After', None)
         
         return response
+
+
+class PerformanceMiddleware:
+    """
+    Records wall time, DB query count and time, serialization time and
+    response size per view. Emits a Server-Timing header, feeds the
+    histograms served at /metrics and logs requests slower than
+    settings.API_SLOW_REQUEST_MS together with their SQL.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = self.start(request)
+        started = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        recorder = self.start(request)
+        started = time.perf_counter()
+        # The ORM runs in the request's thread-sensitive sync thread, so the
+        # recorder must be installed and removed there, not on the event loop
+        stack = ExitStack()
+        await sync_to_async(stack.enter_context)(recorder.record())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder, time.perf_counter() - started)
+
+    @staticmethod
+    def start(request):
+        request._render_seconds = 0.0
+        return QueryRecorder(keep_sql=getattr(settings, 'API_SLOW_REQUEST_MS', None) is not None)
+
+    def finish(self, request, response, recorder, elapsed):
+        slow_ms = getattr(settings, 'API_SLOW_REQUEST_MS', None)
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        size = 0 if response.streaming else len(response.content)
+
+        registry.observe('api_request_duration_seconds', elapsed, view=view)
+        registry.observe('api_request_db_queries', recorder.count, view=view)
+        registry.observe('api_request_db_duration_seconds', recorder.duration, view=view)
+        registry.observe('api_request_serialization_seconds', request._render_seconds, view=view)
+        registry.observe('api_response_bytes', size, view=view)
+
+        response['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+            f'render;dur={request._render_seconds * 1000:.1f}'
+        )
+
+        if slow_ms is not None and elapsed * 1000 >= slow_ms:
+            performance_logger.warning(
+                "Slow request %s %s (%s): %.1fms, %d queries in %.1fms\n%s",
+                request.method, request.get_full_path(), view, elapsed * 1000,
+                recorder.count, recorder.duration * 1000,
+                "\n".join(f"  {seconds * 1000:7.2f}ms  {sql}" for sql, seconds in recorder.queries),
+            )
+
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._render_seconds = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class NPlusOneMiddleware:
+    """
+    Staging aid: flags requests that repeat the same SQL shape at least
+    settings.API_NPLUSONE_THRESHOLD times. Logs them, or raises
+    NPlusOneError when settings.API_NPLUSONE_RAISE is set.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        detector = NPlusOneDetector(threshold=settings.API_NPLUSONE_THRESHOLD)
+        with detector.record():
+            response = self.get_response(request)
+
+        if detector.repeated():
+            message = f"Repeated queries in {request.method} {request.get_full_path()}:\n{detector.report()}"
+            if settings.API_NPLUSONE_RAISE:
+                raise NPlusOneError(message)
+            performance_logger.warning(message)
+
+        return response
+
+
+COMPRESSED_KEY = "api:compressed:{}:{}:{}"
+
+_COMPRESSIBLE = re.compile(r"^(text/|application/(json|javascript|xml)|image/svg\+xml)")
+_CODING = re.compile(r"^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    @staticmethod
+    def compress(data, best=False):
+        return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def chunk(self, data):
+        # Sync flush, so a streamed chunk reaches the client without waiting for the next
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    @staticmethod
+    def compress(data, best=False):
+        return brotli.compress(data, quality=9 if best else 5)
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=5)
+
+    def chunk(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+# In order of preference between codings the client accepts equally
+ENCODERS = {'br': BrotliEncoder, 'gzip': GzipEncoder} if brotli else {'gzip': GzipEncoder}
+
+
+def negotiate_encoding(accept_encoding):
+    """The preferred coding of ``ENCODERS`` allowed by an Accept-Encoding header, or None"""
+    weights = {}
+    for coding in accept_encoding.lower().split(','):
+        match = _CODING.match(coding)
+        if match:
+            try:
+                weights[match.group(1)] = float(match.group(2) or 1)
+            except ValueError:
+                continue
+    best, best_weight = None, 0
+    for name in ENCODERS:
+        weight = weights.get(name, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli (when the ``brotli`` package is
+    installed) or gzip, as the client's Accept-Encoding prefers. Bodies under
+    settings.API_COMPRESSION_MIN_BYTES are sent as they are; streamed
+    responses are compressed chunk by chunk.
+
+    Catalog responses (an ETag from ``versioned_condition()`` that depends on
+    the catalog version only) are compressed harder, once per catalog
+    version, path and content type, and served from the cache afterwards.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        encoding = self.encoding_for(request, response)
+        if encoding is None:
+            return response
+        return self.compress(request, response, encoding)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        encoding = self.encoding_for(request, response)
+        if encoding is None:
+            return response
+        if response.streaming:
+            return self.compress(request, response, encoding)
+        # Compressing a large body would hold up the event loop
+        return await sync_to_async(self.compress, thread_sensitive=False)(request, response, encoding)
+
+    def encoding_for(self, request, response):
+        """The coding to send ``response`` in, or None to send it as it is"""
+        if not self.compressible(response):
+            return None
+        if not response.streaming and len(response.content) < settings.API_COMPRESSION_MIN_BYTES:
+            return None
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+    def compress(self, request, response, encoding):
+        if response.streaming:
+            encoder = ENCODERS[encoding]()
+            if response.is_async:
+                response.streaming_content = self.acompress_stream(encoder, response.streaming_content)
+            else:
+                response.streaming_content = self.compress_stream(encoder, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            body = self.compressed_body(request, response, encoding)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response.headers['Content-Length'] = str(len(body))
+
+        # The representation changed, so a strong validator no longer holds
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = f"W/{etag}"
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def compressible(response):
+        return (
+            200 <= response.status_code < 300
+            and response.status_code != 204
+            and not response.has_header('Content-Encoding')
+            and 'no-transform' not in response.get('Cache-Control', '')
+            and _COMPRESSIBLE.match(response.get('Content-Type', ''))
+        )
+
+    @staticmethod
+    def compressed_body(request, response, encoding):
+        encoder = ENCODERS[encoding]
+        etag = response.get('ETag')
+        if not etag or not is_catalog_etag(etag):
+            return encoder.compress(response.content)
+
+        variant = hashlib.md5(f"{request.get_full_path()} {response['Content-Type']}".encode()).hexdigest()
+        key = COMPRESSED_KEY.format(encoding, etag.strip('"'), variant)
+        body = cache.get(key)
+        if body is None:
+            body = encoder.compress(response.content, best=True)
+            cache.set(key, body)
+        return body
+
+    @staticmethod
+    def compress_stream(encoder, chunks):
+        for chunk in chunks:
+            data = encoder.chunk(chunk)
+            if data:
+                yield data
+        yield encoder.finish()
+
+    @staticmethod
+    async def acompress_stream(encoder, chunks):
+        async for chunk in chunks:
+            data = encoder.chunk(chunk)
+            if data:
+                yield data
+        yield encoder.finish()
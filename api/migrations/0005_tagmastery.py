@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_checkpoint_lessonstats_questionstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagMastery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=50)),
+                ('attempts', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_mastery', to='api.student')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('student', 'tag'), name='unique_tag_mastery_per_student')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_tagmastery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repetitions', models.IntegerField(default=0)),
+                ('interval_days', models.FloatField(default=0)),
+                ('ease', models.FloatField(default=2.5)),
+                ('lapses', models.IntegerField(default=0)),
+                ('last_reviewed_at', models.DateTimeField()),
+                ('due_at', models.DateTimeField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_states', to='api.question')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_states', to='api.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'due_at'], name='api_reviews_student_13c130_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'question'), name='unique_review_state_per_question')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_reviewstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonFunnel',
+            fields=[
+                ('lesson', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='funnel', serialize=False, to='api.lesson')),
+                ('started', models.IntegerField(default=0)),
+                ('attempted_all', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('attempts', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('hints_used', models.IntegerField(default=0)),
+                ('points_earned', models.IntegerField(default=0)),
+                ('duration_sec', models.BigIntegerField(default=0)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to='api.lesson')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('lesson', 'granularity', 'bucket'), name='unique_activity_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LessonProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempted_questions', models.JSONField(default=list)),
+                ('correct_questions', models.JSONField(default=list)),
+                ('started_at', models.DateTimeField()),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='api.lesson')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_progress', to='api.student')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('student', 'lesson'), name='unique_lesson_progress')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='questionattempt',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_questionattempt_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='questionattempt',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='attempt',
+            constraint=models.UniqueConstraint(fields=('student', 'idempotency_key'), name='unique_attempt_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='questionattempt',
+            constraint=models.UniqueConstraint(fields=('student', 'idempotency_key'), name='unique_question_attempt_key'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HintReveal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revealed_at', models.DateTimeField(auto_now_add=True)),
+                ('hint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reveals', to='api.hint')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hint_reveals', to='api.question')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hint_reveals', to='api.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'question'], name='api_hintrev_student_46d0f7_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'hint'), name='unique_hint_reveal')],
+            },
+        ),
+    ]
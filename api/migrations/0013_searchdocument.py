@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SQLITE_INDEX = [
+    # External-content FTS5 table over api_searchdocument, with prefix
+    # indexes so short prefix queries do not scan the whole term list
+    """
+    CREATE VIRTUAL TABLE api_searchdocument_fts USING fts5(
+        title, body, tags, content='api_searchdocument', content_rowid='id', prefix='2 3'
+    )
+    """,
+    # Column weights for the built-in rank: title, body, tags
+    "INSERT INTO api_searchdocument_fts(api_searchdocument_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 4.0)')",
+    """
+    CREATE TRIGGER api_searchdocument_ai AFTER INSERT ON api_searchdocument BEGIN
+        INSERT INTO api_searchdocument_fts(rowid, title, body, tags) VALUES (new.id, new.title, new.body, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER api_searchdocument_ad AFTER DELETE ON api_searchdocument BEGIN
+        INSERT INTO api_searchdocument_fts(api_searchdocument_fts, rowid, title, body, tags)
+        VALUES ('delete', old.id, old.title, old.body, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER api_searchdocument_au AFTER UPDATE ON api_searchdocument BEGIN
+        INSERT INTO api_searchdocument_fts(api_searchdocument_fts, rowid, title, body, tags)
+        VALUES ('delete', old.id, old.title, old.body, old.tags);
+        INSERT INTO api_searchdocument_fts(rowid, title, body, tags) VALUES (new.id, new.title, new.body, new.tags);
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS api_searchdocument_au",
+    "DROP TRIGGER IF EXISTS api_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS api_searchdocument_ai",
+    "DROP TABLE IF EXISTS api_searchdocument_fts",
+]
+
+POSTGRES_INDEX = [
+    """
+    ALTER TABLE api_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A')
+        || setweight(jsonb_to_tsvector('english', tags, '["string"]'), 'B')
+        || setweight(to_tsvector('english', body), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX api_searchdocument_vector_idx ON api_searchdocument USING gin (search_vector)",
+    "CREATE INDEX api_searchdocument_tags_idx ON api_searchdocument USING gin (tags jsonb_path_ops)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS api_searchdocument_tags_idx",
+    "DROP INDEX IF EXISTS api_searchdocument_vector_idx",
+    "ALTER TABLE api_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+def index_catalog(apps, schema_editor):
+    from api.services.search import rebuild_search_index
+    rebuild_search_index(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_hintreveal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course', 'Course'), ('lesson', 'Lesson'), ('question', 'Question'), ('hint', 'Hint')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('tags', models.JSONField(default=list)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.course')),
+                ('lesson', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.lesson')),
+                ('question', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.question')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        # Other databases search the table without an index (see api/services/search.py)
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_INDEX, 'postgresql': POSTGRES_INDEX}),
+            _run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}),
+        ),
+        # Index the existing catalog; the triggers above keep FTS5 in step
+        migrations.RunPython(index_catalog, migrations.RunPython.noop),
+    ]
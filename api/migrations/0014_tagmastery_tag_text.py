@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tagmastery',
+            name='tag',
+            field=models.TextField(),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class Student(models.Model):
     name = models.CharField(max_length=100)
@@ -71,20 +72,70 @@ class Hint(models.Model):
         ordering = ['order_index']
 
 
+class SearchDocument(models.Model):
+    """
+    Searchable text of one course, lesson, question or hint, kept in sync by
+    signals and indexed by a full-text index created in migration 0013
+    (FTS5 on SQLite, a tsvector column with a GIN index on PostgreSQL)
+    """
+    KINDS = [
+        ('course', 'Course'),
+        ('lesson', 'Lesson'),
+        ('question', 'Question'),
+        ('hint', 'Hint'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.BigIntegerField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, null=True, related_name="+")
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, null=True, related_name="+")
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    tags = models.JSONField(default=list)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+
+class HintReveal(models.Model):
+    """A hint shown to a student since their last attempt at its question"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="hint_reveals")
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="hint_reveals")
+    hint = models.ForeignKey(Hint, on_delete=models.CASCADE, related_name="reveals")
+    revealed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'hint'], name='unique_hint_reveal'),
+        ]
+        indexes = [
+            models.Index(fields=['student', 'question']),  # Counted and cleared per attempt
+        ]
+
+
 class QuestionAttempt(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="question_attempts")
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="attempts")
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the attempt is accepted, which is earlier than the insert in write-behind mode
+    timestamp = models.DateTimeField(default=timezone.now)
     answer = models.JSONField()  # Student's answer
     is_correct = models.BooleanField()
     hints_used = models.IntegerField(default=0)  # Number of hints revealed
     duration_sec = models.IntegerField()
     points_earned = models.IntegerField(default=0)
+    # Client-generated key making retried submissions idempotent (Idempotency-Key header)
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
 
     def __str__(self):
         return f"{self.student.name} - {self.question.title} ({'✓' if self.is_correct else '✗'})"
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'idempotency_key'], name='unique_question_attempt_key'),
+        ]
         indexes = [
             models.Index(fields=['student', 'timestamp']),
             models.Index(fields=['question', 'timestamp']),
@@ -99,9 +150,190 @@ class Attempt(models.Model):
     correctness = models.FloatField()
     hints_used = models.IntegerField()
     duration_sec = models.IntegerField()
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'idempotency_key'], name='unique_attempt_key'),
+        ]
         indexes = [
             models.Index(fields=['student', 'timestamp']),
             models.Index(fields=['lesson', 'timestamp']),
-        ]
\ No newline at end of file
+        ]
+
+class Checkpoint(models.Model):
+    """Position reached by an incremental job, e.g. the last processed attempt id"""
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+class AttemptStats(models.Model):
+    """Running totals over all students' question attempts, maintained by compute_stats"""
+    attempts = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    hints_used = models.IntegerField(default=0)  # Total over all attempts
+    duration_histogram = models.JSONField(default=list)  # Counts per api.services.stats.DURATION_BUCKETS
+    median_duration_sec = models.FloatField(null=True, blank=True)
+    calibrated_difficulty = models.FloatField()  # 1-5 scale, like the hand-set difficulty
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class QuestionStats(AttemptStats):
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+
+    def __str__(self):
+        return f"Stats for {self.question.title}"
+
+
+class LessonStats(AttemptStats):
+    lesson = models.OneToOneField(Lesson, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+
+    def __str__(self):
+        return f"Stats for {self.lesson.title}"
+
+
+class TagMastery(models.Model):
+    """Question attempts and correct answers of a student per tag, kept up to date on every attempt"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="tag_mastery")
+    tag = models.TextField()  # Lesson tags are free-form and unbounded
+    attempts = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.student.name} - {self.tag}: {self.correct}/{self.attempts}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'tag'], name='unique_tag_mastery_per_student'),
+        ]
+
+
+class ReviewState(models.Model):
+    """SM-2 spaced-repetition state of one question for one student"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="review_states")
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="review_states")
+    repetitions = models.IntegerField(default=0)  # Successful reviews in a row
+    interval_days = models.FloatField(default=0)
+    ease = models.FloatField(default=2.5)
+    lapses = models.IntegerField(default=0)
+    last_reviewed_at = models.DateTimeField()
+    due_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.student.name} - {self.question.title} due {self.due_at:%Y-%m-%d}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'question'], name='unique_review_state_per_question'),
+        ]
+        indexes = [
+            models.Index(fields=['student', 'due_at']),  # Due list: index range scan in due order
+        ]
+
+
+class ActivityRollup(models.Model):
+    """Question attempt totals of one lesson per hour or day, maintained by aggregate_rollups"""
+    GRANULARITIES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="activity_rollups")
+    granularity = models.CharField(max_length=4, choices=GRANULARITIES)
+    bucket = models.DateTimeField()  # Start of the hour/day (UTC)
+    attempts = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    hints_used = models.IntegerField(default=0)
+    points_earned = models.IntegerField(default=0)
+    duration_sec = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['lesson', 'granularity', 'bucket'], name='unique_activity_rollup'),
+        ]
+
+
+class LessonProgress(models.Model):
+    """Distinct questions a student attempted and answered correctly in a lesson"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="lesson_progress")
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="progress")
+    attempted_questions = models.JSONField(default=list)
+    correct_questions = models.JSONField(default=list)
+    started_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)  # Every question answered correctly
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'lesson'], name='unique_lesson_progress'),
+        ]
+
+
+class LessonFunnel(models.Model):
+    """Students per completion stage of a lesson, counted from LessonProgress transitions"""
+    lesson = models.OneToOneField(Lesson, on_delete=models.CASCADE, primary_key=True, related_name="funnel")
+    started = models.IntegerField(default=0)
+    attempted_all = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+
+class LeaderboardEntry(models.Model):
+    """A student's points on one leaderboard: ``global`` or ``course:<id>``"""
+    board = models.CharField(max_length=32)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="leaderboard_entries")
+    points = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.board}: {self.student.name} {self.points}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'student'], name='unique_leaderboard_entry'),
+        ]
+        indexes = [
+            # Top-N is an index range scan; a rank is an index count of higher scores
+            models.Index(fields=['board', '-points', 'student'], name='leaderboard_rank_idx'),
+        ]
+
+
+class Job(models.Model):
+    """Background job run by ``manage.py run_workers`` (see services.jobs)"""
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+    STATUSES = [(QUEUED, "Queued"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    # At most one queued or running job per key; enqueueing it again is a no-op
+    dedupe_key = models.CharField(max_length=200, null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Touched by the running worker; a job it stops moving on is stale
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'], condition=models.Q(status__in=["queued", "running"]),
+                name='unique_pending_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'run_at']),  # Claiming: due queued jobs in order
+        ]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Student, Course, Lesson, Attempt, Question, Hint, QuestionAttempt
+from .models import Student, Course, Lesson, Attempt, Question, Hint, QuestionAttempt, ReviewState
 
 class StudentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -22,6 +22,8 @@ class AttemptSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attempt
         fields = "__all__"
+        # A repeated idempotency key is replayed by the view, not rejected
+        validators = []
 
     def validate_correctness(self, value):
         """Validate correctness is between 0 and 1"""
@@ -68,6 +70,15 @@ class QuestionSerializer(serializers.ModelSerializer):
         return value
 
 
+class QuestionSummarySerializer(serializers.ModelSerializer):
+    """A question with its number of hints; the hints are revealed one by one"""
+    hint_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Question
+        fields = "__all__"
+
+
 class QuestionAttemptSerializer(serializers.ModelSerializer):
     question_title = serializers.CharField(source='question.title', read_only=True)
     question_type = serializers.CharField(source='question.question_type', read_only=True)
@@ -75,6 +86,11 @@ class QuestionAttemptSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuestionAttempt
         fields = "__all__"
+        # A repeated idempotency key is replayed by the view, not rejected
+        validators = []
+        read_only_fields = ['timestamp']
+        # Graded by the server; only questions it cannot grade need it
+        extra_kwargs = {'is_correct': {'required': False}}
 
     def validate_hints_used(self, value):
         """Validate hints_used is non-negative"""
@@ -92,4 +108,17 @@ class QuestionAttemptSerializer(serializers.ModelSerializer):
         """Validate points earned is non-negative"""
         if value < 0:
             raise serializers.ValidationError("Points earned cannot be negative")
-        return value
\ No newline at end of file
+        return value
+
+
+class DueReviewSerializer(serializers.ModelSerializer):
+    question_title = serializers.CharField(source='question.title', read_only=True)
+    lesson = serializers.IntegerField(source='question.lesson_id', read_only=True)
+    lesson_title = serializers.CharField(source='question.lesson.title', read_only=True)
+
+    class Meta:
+        model = ReviewState
+        fields = [
+            "question", "question_title", "lesson", "lesson_title", "due_at", "last_reviewed_at",
+            "interval_days", "repetitions", "ease", "lapses",
+        ]
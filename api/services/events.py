@@ -0,0 +1,260 @@
+"""
+Student progress events pushed over server-sent events.
+
+Attempt writes publish a "student changed" message after commit; each open
+``/students/<pk>/events/`` stream is subscribed to its student's channel and
+recomputes the overview and recommendation only when told to, sending the
+parts that changed.
+
+The broker is pluggable through ``settings.API_EVENTS_BROKER``:
+- ``LocalBroker`` delivers inside the current process (default, used by tests)
+- ``PostgresBroker`` fans messages out to every worker with LISTEN/NOTIFY
+"""
+import asyncio
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBroker:
+    """Thread-safe in-process pub/sub"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel, callback):
+        """Register ``callback(message)`` for a channel and return an unsubscribe callable"""
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(channel)
+                if callbacks is not None:
+                    callbacks.discard(callback)
+                    if not callbacks:
+                        del self._subscribers[channel]
+
+        return unsubscribe
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            callback(message)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Cross-worker broker on Postgres LISTEN/NOTIFY.
+
+    Every worker process runs one listener thread with a dedicated connection
+    and hands notifications to its local subscribers.
+    """
+    pg_channel = "api_events"
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, channel, callback):
+        self._ensure_listener()
+        return super().subscribe(channel, callback)
+
+    def publish(self, channel, message):
+        payload = json.dumps({"channel": channel, "message": message})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.pg_channel, payload])
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="api-events-listener", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+
+        while True:
+            try:
+                conn = psycopg2.connect(**connection.get_connection_params())
+                conn.set_session(autocommit=True)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.pg_channel}")
+                while True:
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        payload = json.loads(notify.payload)
+                        self._deliver(payload["channel"], payload["message"])
+            except Exception:
+                logger.exception("Event listener connection lost, reconnecting")
+                time.sleep(1)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.API_EVENTS_BROKER)()
+    return _broker
+
+
+def student_channel(student_id):
+    return f"student:{student_id}"
+
+
+def publish_student_changed(student_id):
+    get_broker().publish(student_channel(student_id), {"student": student_id})
+
+
+class Subscription:
+    """Blocking view of a channel for WSGI streams"""
+
+    def __init__(self, channel):
+        self._queue = queue.SimpleQueue()
+        self._unsubscribe = get_broker().subscribe(channel, self._queue.put)
+
+    def get(self, timeout):
+        """Next message, or None if nothing arrived within ``timeout`` seconds"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        """Discard queued messages so a burst of writes triggers one refresh"""
+        while self.get(timeout=0) is not None:
+            pass
+
+    def close(self):
+        self._unsubscribe()
+
+
+class AsyncSubscription:
+    """Awaitable view of a channel for ASGI streams"""
+
+    def __init__(self, channel):
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._unsubscribe = get_broker().subscribe(
+            channel, lambda message: loop.call_soon_threadsafe(self._queue.put_nowait, message)
+        )
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self):
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    def close(self):
+        self._unsubscribe()
+
+
+def render(data):
+    # Imported here: writers only publish, and every process imports this
+    # module through the attempt ingestion path at startup, while the
+    # renderer pulls in DRF's form and template machinery
+    from rest_framework.renderers import JSONRenderer
+
+    return JSONRenderer().render(data)
+
+
+def format_event(name, data):
+    return b"event: " + name.encode() + b"\ndata: " + render(data) + b"\n\n"
+
+
+HEARTBEAT = b": keep-alive\n\n"
+
+
+class ProgressState:
+    """Last overview/recommendation sent on a stream, used to emit deltas only"""
+
+    def __init__(self):
+        self.courses = {}
+        self.recommendation = None
+
+    def events(self, overview, recommendation):
+        # Round-trip through the renderer so comparisons see what the client saw
+        overview = json.loads(render(overview))
+        recommendation = json.loads(render(recommendation))
+
+        changed_courses = [entry for entry in overview if self.courses.get(entry["course_id"]) != entry]
+        self.courses = {entry["course_id"]: entry for entry in overview}
+        if changed_courses:
+            yield format_event("overview", changed_courses)
+
+        if recommendation != self.recommendation:
+            self.recommendation = recommendation
+            yield format_event("recommendation", recommendation)
+
+
+def student_event_stream(student):
+    """Sync SSE generator: a full snapshot first, then deltas after each change"""
+    from .overview import get_student_overview
+    from .recommender import get_recommendation_batched
+
+    subscription = Subscription(student_channel(student.id))
+    state = ProgressState()
+    deadline = time.monotonic() + settings.API_EVENTS_MAX_SECONDS
+    try:
+        yield b"retry: 3000\n\n"
+        yield from state.events(get_student_overview(student), get_recommendation_batched(student))
+        while time.monotonic() < deadline:
+            if subscription.get(timeout=settings.API_EVENTS_HEARTBEAT) is None:
+                yield HEARTBEAT
+                continue
+            subscription.drain()
+            yield from state.events(get_student_overview(student), get_recommendation_batched(student))
+    finally:
+        subscription.close()
+
+
+async def astudent_event_stream(student):
+    """Async SSE generator for ASGI servers, same protocol as ``student_event_stream``"""
+    from .overview import aget_student_overview
+    from .recommender import aget_recommendation
+
+    subscription = AsyncSubscription(student_channel(student.id))
+    state = ProgressState()
+    deadline = time.monotonic() + settings.API_EVENTS_MAX_SECONDS
+    try:
+        yield b"retry: 3000\n\n"
+        overview, recommendation = await asyncio.gather(
+            aget_student_overview(student), aget_recommendation(student)
+        )
+        for event in state.events(overview, recommendation):
+            yield event
+        while time.monotonic() < deadline:
+            if await subscription.get(timeout=settings.API_EVENTS_HEARTBEAT) is None:
+                yield HEARTBEAT
+                continue
+            subscription.drain()
+            overview, recommendation = await asyncio.gather(
+                aget_student_overview(student), aget_recommendation(student)
+            )
+            for event in state.events(overview, recommendation):
+                yield event
+    finally:
+        subscription.close()
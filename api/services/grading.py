@@ -0,0 +1,254 @@
+"""
+Server-side grading of question attempts.
+
+Each question's ``correct_answer`` is compiled once into a matcher and kept
+per worker until the catalog version moves (any question, lesson or hint
+save), so grading an attempt is a dictionary lookup plus the match itself,
+with no query: the view already holds the question.
+
+- mcq: ``correct_answer`` lists the right option letters (``["A", "C"]``);
+  the answer must pick exactly those. Options may be given as ``"A) ..."``.
+- text: ``correct_answer`` lists accepted answers, compared after
+  normalising case, surrounding and repeated whitespace; an entry
+  ``{"regex": "..."}`` accepts answers whose normalised form fully matches.
+  Otherwise small typos in words are tolerated: trailing sentence
+  punctuation is ignored and an answer within one edit of an accepted
+  answer per ``CHARS_PER_EDIT`` characters (at most ``MAX_EDITS``) is
+  accepted, provided everything but its letters and spaces (digits,
+  operators, brackets) is the same, in the same order: in code ``x == 5``
+  or ``i--`` is a different answer, not a typo.
+  Candidates are narrowed with a trigram index of the accepted answers
+  before the bounded edit distance runs, so questions with many accepted
+  variants stay cheap: each edit changes at most three trigrams, so a
+  close answer shares at least one of any ``MAX_EDITS * 3 + 1`` of the
+  submitted answer's trigrams, and only the rarest ones are looked up.
+- coding: answers are judged by running test cases, which this API does not
+  do, so the client's ``is_correct`` is kept (the matcher returns None).
+"""
+import logging
+import re
+import threading
+from collections import defaultdict
+
+from ..models import Question, QuestionAttempt
+from .hints import hint_penalty
+from .versioning import bump_student_version, get_catalog_version
+
+logger = logging.getLogger("api.grading")
+
+_OPTION = re.compile(r"\s*([A-Za-z])\s*(?:[).:]|$)")
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[.!?,;:]+$")
+_LETTERS_AND_SPACES = re.compile(r"[^\W\d_]|\s")
+
+NGRAM = 3
+MAX_EDITS = 2
+CHARS_PER_EDIT = 5
+
+# Attempts read per query when regrading
+REGRADE_BATCH_SIZE = 1000
+
+
+def normalize_text(value):
+    return _WHITESPACE.sub(" ", str(value)).strip().casefold()
+
+
+def fuzzy_form(value):
+    """Normalised text without trailing sentence punctuation"""
+    return _TRAILING_PUNCTUATION.sub("", normalize_text(value)).rstrip()
+
+
+def exact_part(form):
+    """The digits, operators and brackets of ``form`` in order, which typos must not change"""
+    return _LETTERS_AND_SPACES.sub("", form)
+
+
+def ngrams(text):
+    padding = "\0" * (NGRAM - 1)
+    padded = f"{padding}{text}{padding}"
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def allowed_edits(accepted):
+    return min(MAX_EDITS, len(accepted) // CHARS_PER_EDIT)
+
+
+def within_edits(a, b, limit):
+    """Whether the Levenshtein distance of ``a`` and ``b`` is at most ``limit``, in O(limit * len) time"""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, char in enumerate(a, 1):
+        # Only cells within ``limit`` of the diagonal can stay within the limit
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        for j in range(low, high + 1):
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != b[j - 1]), over
+            )
+        if min(current[low - 1:high + 1]) > limit:
+            return False
+        previous = current
+    return previous[len(b)] <= limit
+
+
+def _option(value):
+    """``"b"``, ``"B) Paris"`` -> ``"B"``; anything else is compared as normalised text"""
+    match = _OPTION.match(str(value))
+    return match.group(1).upper() if match else normalize_text(value)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+class ChoiceMatcher:
+    def __init__(self, correct_answer):
+        self.options = frozenset(_option(value) for value in _as_list(correct_answer))
+
+    def __call__(self, answer):
+        return frozenset(_option(value) for value in _as_list(answer)) == self.options
+
+
+class TextMatcher:
+    def __init__(self, correct_answer):
+        self.accepted = set()
+        self.patterns = []
+        for value in _as_list(correct_answer):
+            if isinstance(value, dict) and 'regex' in value:
+                try:
+                    self.patterns.append(re.compile(value['regex']))
+                except re.error:
+                    logger.warning("Ignoring invalid answer pattern %r", value['regex'])
+            else:
+                self.accepted.add(normalize_text(value))
+
+        self.forms = sorted({fuzzy_form(value) for value in self.accepted})
+        self.form_set = set(self.forms)
+        self.grams = [ngrams(form) for form in self.forms]
+        self.index = defaultdict(list)
+        self.by_exact_part = defaultdict(set)
+        for position, (form, grams) in enumerate(zip(self.forms, self.grams)):
+            for gram in grams:
+                self.index[gram].append(position)
+            self.by_exact_part[exact_part(form)].add(position)
+
+    def __call__(self, answer):
+        values = _as_list(answer)
+        if len(values) != 1:
+            return False
+        text = normalize_text(values[0])
+        if text in self.accepted or any(pattern.fullmatch(text) for pattern in self.patterns):
+            return True
+        form = fuzzy_form(text)
+        return form in self.form_set or self.near(form)
+
+    def near(self, form):
+        """Whether ``form`` is within the allowed typos of an accepted answer"""
+        same_exact_part = self.by_exact_part.get(exact_part(form))
+        if not same_exact_part:
+            return False
+        grams = ngrams(form)
+        rarest = sorted(grams, key=lambda gram: len(self.index.get(gram, ())))[:MAX_EDITS * NGRAM + 1]
+        candidates = []
+        for position in {position for gram in rarest for position in self.index.get(gram, ())} & same_exact_part:
+            accepted = self.forms[position]
+            limit = allowed_edits(accepted)
+            shared = len(grams & self.grams[position])
+            # One edit changes at most NGRAM trigrams, so fewer shared ones rule the candidate out
+            if (
+                limit
+                and abs(len(accepted) - len(form)) <= limit
+                and shared >= len(self.grams[position]) - limit * NGRAM
+            ):
+                candidates.append((shared, accepted, limit))
+        # Most similar first: a match among many near-identical variants is found early
+        candidates.sort(reverse=True)
+        return any(within_edits(form, accepted, limit) for _, accepted, limit in candidates)
+
+
+def ungraded(answer):
+    return None
+
+
+def compile_matcher(question):
+    if question.question_type == 'mcq':
+        return ChoiceMatcher(question.correct_answer)
+    if question.question_type == 'text':
+        return TextMatcher(question.correct_answer)
+    return ungraded
+
+
+_matchers = (None, {})
+_matchers_lock = threading.Lock()
+
+
+def matcher_for(question):
+    """The compiled matcher of a question, compiled on first use per catalog version"""
+    global _matchers
+    version = get_catalog_version()
+    built_for, matchers = _matchers
+    if built_for != version:
+        with _matchers_lock:
+            built_for, matchers = _matchers
+            if built_for != version:
+                matchers = {}
+                _matchers = (version, matchers)
+    matcher = matchers.get(question.pk)
+    if matcher is None:
+        matcher = matchers[question.pk] = compile_matcher(question)
+    return matcher
+
+
+def grade(question, answer):
+    """Whether ``answer`` is correct, or None for questions the server does not grade"""
+    return matcher_for(question)(answer)
+
+
+def regrade_attempts(question_ids=None, batch_size=None):
+    """
+    Grade stored attempts again, e.g. after an answer key was corrected, and
+    fix ``is_correct`` and ``points_earned`` where the verdict changed;
+    returns the number of attempts changed. Statistics, rollups, mastery,
+    review states and leaderboards are derived from attempts and need a
+    rebuild afterwards (see ``api/jobs.py``).
+    """
+    batch_size = batch_size or REGRADE_BATCH_SIZE
+    questions = Question.objects.filter(question_type__in=['mcq', 'text'])
+    if question_ids:
+        questions = questions.filter(id__in=question_ids)
+    questions = questions.in_bulk()
+    if not questions:
+        return 0
+
+    changed, students, last_id = 0, set(), 0
+    while True:
+        rows = list(
+            QuestionAttempt.objects.filter(id__gt=last_id, question_id__in=list(questions)).order_by('id')
+            .values_list('id', 'question_id', 'student_id', 'answer', 'is_correct', 'hints_used')[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        updates = []
+        for attempt_id, question_id, student_id, answer, is_correct, hints_used in rows:
+            question = questions[question_id]
+            verdict = grade(question, answer)
+            if verdict is None or verdict == is_correct:
+                continue
+            points = max(0, question.points - hint_penalty(question_id, hints_used)) if verdict else 0
+            updates.append(QuestionAttempt(id=attempt_id, is_correct=verdict, points_earned=points))
+            students.add(student_id)
+        QuestionAttempt.objects.bulk_update(updates, ['is_correct', 'points_earned'], batch_size=500)
+        changed += len(updates)
+
+    for student_id in students:
+        bump_student_version(student_id)
+    return changed
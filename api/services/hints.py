@@ -0,0 +1,80 @@
+"""
+Progressive hint reveal.
+
+Question payloads can leave hints out (``?hints=count``) and clients fetch
+them one at a time from ``/questions/<pk>/hints/<n>/``. Each reveal is
+recorded, so the server knows how many hints a student has seen: the next
+attempt at the question is charged for them and clears them, and a
+student gets a question's hints fresh when they come back to it later.
+
+Hint lists are cached per question under the catalog version, so serving a
+hint and scoring an attempt do not read the hint table while the catalog
+is unchanged.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from ..models import Hint, HintReveal
+from .upsert import upsert
+from .versioning import get_catalog_version
+
+HINTS_KEY = "api:hints:{}:{}"
+
+
+def get_hints(question_id):
+    """``[{id, order_index, content, penalty_points}]`` of a question in reveal order"""
+    key = HINTS_KEY.format(get_catalog_version(), question_id)
+    hints = cache.get(key)
+    if hints is None:
+        hints = list(
+            Hint.objects.filter(question_id=question_id).order_by('order_index', 'id')
+            .values('id', 'order_index', 'content', 'penalty_points')
+        )
+        cache.set(key, hints)
+    return hints
+
+
+def reveal_hint(student_id, question_id, number):
+    """
+    Record that the student saw hint ``number`` (1-based) and return
+    ``(hint, hints_revealed)``. Hints are revealed in order; asking again for
+    one already revealed is free. Raises LookupError for a hint that does not
+    exist and ValueError while an earlier hint is still hidden.
+    """
+    hints = get_hints(question_id)
+    if not 1 <= number <= len(hints):
+        raise LookupError(f"Question {question_id} has no hint {number}")
+
+    revealed = HintReveal.objects.filter(student_id=student_id, question_id=question_id).count()
+    if number > revealed + 1:
+        raise ValueError(f"Reveal hint {revealed + 1} first")
+    if number == revealed + 1:
+        _insert(student_id, question_id, hints[number - 1]['id'])
+        revealed = number
+    return hints[number - 1], revealed
+
+
+def _insert(student_id, question_id, hint_id):
+    # A concurrent reveal of the same hint is absorbed by the unique index,
+    # in one statement rather than bulk_create's transaction around it
+    upsert(
+        HintReveal, [dict(student_id=student_id, question_id=question_id, hint_id=hint_id, revealed_at=timezone.now())],
+        conflict=('student_id', 'hint_id'),
+    )
+
+
+def consume_reveals(student_id, question_id):
+    """Clear the hints revealed for an attempt and return how many there were"""
+    if not get_hints(question_id):
+        return 0
+    table = connection.ops.quote_name(HintReveal._meta.db_table)
+    with connection.cursor() as cursor:
+        # One DELETE; QuerySet.delete() would wrap it in a transaction of its own
+        cursor.execute(f"DELETE FROM {table} WHERE student_id = %s AND question_id = %s", [student_id, question_id])
+        return cursor.rowcount
+
+
+def hint_penalty(question_id, hints_used):
+    """Points deducted for the first ``hints_used`` hints of a question"""
+    return sum(hint['penalty_points'] for hint in get_hints(question_id)[:hints_used])
@@ -0,0 +1,67 @@
+"""
+Idempotent attempt submissions keyed by the client's ``Idempotency-Key``.
+
+A retried POST carrying a key already used by the same student gets the
+first response again (200 with ``Idempotent-Replayed: true``) instead of
+creating a duplicate row. Keys seen recently by this worker are answered
+from an in-process LRU without touching the database; anything else is
+settled by the (student, idempotency_key) unique index: the insert runs in
+a savepoint and a conflict turns into a lookup of the existing row. Bulk
+writers skip duplicates with ``bulk_create(ignore_conflicts=True)``.
+
+Reusing a key for a different submission is rejected with 422.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+HEADER = "HTTP_IDEMPOTENCY_KEY"
+MAX_KEY_LENGTH = 64
+
+
+class RecentKeys:
+    """Thread-safe LRU of ``key -> value`` holding the last ``maxsize`` keys"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+recent_keys = RecentKeys(settings.API_IDEMPOTENCY_CACHE_SIZE)
+
+
+def idempotency_key(request, validated_data):
+    """The request's key (header first, then body field), or None; stored on ``validated_data``"""
+    key = request.META.get(HEADER) or validated_data.get('idempotency_key')
+    if not key:
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValidationError({"idempotency_key": f"At most {MAX_KEY_LENGTH} characters"})
+    validated_data['idempotency_key'] = key
+    return key
+
+
+def fingerprint(instance, fields):
+    """What must match for a repeated key to count as the same submission (foreign keys by id)"""
+    return tuple(instance.serializable_value(field) for field in fields)
@@ -0,0 +1,317 @@
+"""
+Write-behind ingestion of question attempts (settings.API_WRITE_BEHIND).
+
+A validated attempt is appended to a local journal and acknowledged with
+202 as soon as the line is on disk; ``flush`` later moves journal records
+into ``QuestionAttempt`` with ``bulk_create``, a batch per transaction, so a
+burst of submissions costs a few large writes instead of one write-lock
+round trip per student.
+
+The journal is a directory of append-only JSON-lines segments guarded by
+``flock``. The flusher stores its read position (segment and byte offset)
+in a ``Checkpoint`` in the same transaction as the rows, so after a crash
+it resumes exactly where the last committed batch ended. A record torn by
+a crash mid-write was never acknowledged and is skipped.
+
+Read-your-writes: every append leaves the student's journal position in the
+cache, and views decorated with ``flushes_pending`` wait for the flusher
+(``manage.py flush_attempts --interval``) to commit that student's records,
+for at most settings.API_WRITE_BEHIND_READ_WAIT seconds. Reads never flush
+themselves: on SQLite they would fight the flusher for the write lock.
+
+The journal is local to the host, so every web worker and the flusher must
+run on one host (see settings.API_WRITE_BEHIND).
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from functools import partial, wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+
+from ..models import Checkpoint, Question, QuestionAttempt, Student
+from .events import publish_student_changed
+from .leaderboard import add_points
+from .scheduler import record_review
+from .tags import record_question_attempt
+from .versioning import bump_student_version
+
+logger = logging.getLogger("api.ingest")
+
+CHECKPOINT = "ingest:question-attempts"
+PENDING_KEY = "api:ingest:pending:{}"
+FLUSHED_KEY = "api:ingest:flushed"
+# How often a read waiting for the flusher checks its progress
+WAIT_POLL_SECONDS = 0.02
+FIELDS = (
+    'student_id', 'question_id', 'answer', 'is_correct', 'hints_used', 'duration_sec', 'points_earned',
+    'idempotency_key',
+)
+
+# Positions pack the segment number above a 40-bit byte offset (1 TiB per segment)
+OFFSET_BITS = 40
+
+
+def position(segment, offset):
+    return (segment << OFFSET_BITS) | offset
+
+
+def split_position(value):
+    return value >> OFFSET_BITS, value & ((1 << OFFSET_BITS) - 1)
+
+
+class Journal:
+    """Append-only JSON-lines segments in ``directory``; the lock file names the segment being written"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def segment_path(self, segment):
+        return self.directory / f"{segment:08d}.jsonl"
+
+    @contextmanager
+    def locked(self):
+        """Exclusive lock; yields the current segment number"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "current", "a+") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                lock.seek(0)
+                yield int(lock.read() or 0)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _set_current(self, segment):
+        with open(self.directory / "current", "r+") as lock:
+            lock.truncate(0)
+            lock.write(str(segment))
+            lock.flush()
+            os.fsync(lock.fileno())
+
+    def append(self, records, fsync=True):
+        """Append ``records`` (dicts); returns the journal position just after them"""
+        data = b"".join(json.dumps(record, separators=(",", ":")).encode() + b"\n" for record in records)
+        with self.locked() as segment:
+            with open(self.segment_path(segment), "ab") as journal:
+                end = journal.tell()
+                if end and self._last_byte(segment, end) != b"\n":
+                    # A crash tore the previous append: start on a fresh line
+                    data = b"\n" + data
+                journal.write(data)
+                journal.flush()
+                if fsync:
+                    os.fsync(journal.fileno())
+                return position(segment, journal.tell())
+
+    def _last_byte(self, segment, size):
+        with open(self.segment_path(segment), "rb") as journal:
+            journal.seek(size - 1)
+            return journal.read(1)
+
+    def rotate(self, max_bytes):
+        """Start a new segment once the current one holds ``max_bytes``"""
+        with self.locked() as segment:
+            path = self.segment_path(segment)
+            if path.exists() and path.stat().st_size >= max_bytes:
+                self._set_current(segment + 1)
+
+    def read(self, start, limit):
+        """
+        Up to ``limit`` complete records from position ``start`` and the
+        position after them. Moves to the next segment once a segment that
+        is no longer written to is exhausted.
+        """
+        segment, offset = split_position(start)
+        records = []
+        path = self.segment_path(segment)
+        if path.exists():
+            with open(path, "rb") as journal:
+                journal.seek(offset)
+                while len(records) < limit:
+                    line = journal.readline()
+                    if not line.endswith(b"\n"):
+                        break  # End of the segment, or an append still in progress
+                    offset += len(line)
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        if line.strip():
+                            logger.warning("Skipping torn journal record at %s:%s", path.name, offset - len(line))
+
+        if len(records) < limit:
+            with self.locked() as current:
+                if current > segment and (not path.exists() or offset >= path.stat().st_size):
+                    return records, position(segment + 1, 0)
+        return records, position(segment, offset)
+
+    def discard_before(self, segment):
+        """Delete segments the flusher has moved past"""
+        for path in self.directory.glob("*.jsonl"):
+            if int(path.stem) < segment:
+                path.unlink(missing_ok=True)
+
+
+def get_journal():
+    return Journal(settings.API_WRITE_BEHIND_JOURNAL)
+
+
+def submit(attempt):
+    """Journal an unsaved, validated ``QuestionAttempt``; durable once this returns"""
+    record = {field: getattr(attempt, field) for field in FIELDS}
+    record['timestamp'] = attempt.timestamp.isoformat()
+    end = get_journal().append([record], fsync=settings.API_WRITE_BEHIND_FSYNC)
+    cache.set(PENDING_KEY.format(attempt.student_id), end, timeout=None)
+    # Conditional GETs must not answer 304 for a student with journaled attempts
+    bump_student_version(attempt.student_id)
+    return end
+
+
+def _stored_keys(keys):
+    """``(student_id, idempotency_key)`` pairs of ``keys`` already in the database"""
+    if not keys:
+        return set()
+    return set(
+        QuestionAttempt.objects.filter(
+            student_id__in={student_id for student_id, _ in keys}, idempotency_key__in={key for _, key in keys}
+        ).values_list('student_id', 'idempotency_key')
+    )
+
+
+def _save_batch(records):
+    """bulk_create journal records and update what post_save would have; returns the students touched"""
+    student_ids = set(Student.objects.filter(id__in={r['student_id'] for r in records}).values_list('id', flat=True))
+    question_ids = set(Question.objects.filter(id__in={r['question_id'] for r in records}).values_list('id', flat=True))
+    keys = {(r['student_id'], r.get('idempotency_key')) for r in records if r.get('idempotency_key')}
+    stored_keys = _stored_keys(keys)
+
+    while True:
+        attempts, seen_keys = [], set(stored_keys)
+        for record in records:
+            if record['student_id'] not in student_ids or record['question_id'] not in question_ids:
+                logger.warning("Dropping journaled attempt of a deleted student or question: %s", record)
+                continue
+            key = record.get('idempotency_key')
+            if key:
+                if (record['student_id'], key) in seen_keys:
+                    continue  # A retry of an attempt that is already stored
+                seen_keys.add((record['student_id'], key))
+            attempts.append(QuestionAttempt(
+                **{field: record.get(field) for field in FIELDS}, timestamp=parse_datetime(record['timestamp'])
+            ))
+        # No ignore_conflicts: the side effects below must run for inserted
+        # rows only. A key the synchronous path stored since the check above
+        # fails the batch, which is retried without it.
+        try:
+            with transaction.atomic():
+                QuestionAttempt.objects.bulk_create(attempts)
+            break
+        except IntegrityError:
+            conflicting = _stored_keys(keys) - stored_keys
+            if not conflicting:
+                raise  # Not a key stored meanwhile, so a retry would fail the same way
+            stored_keys |= conflicting
+
+    # bulk_create skips signals
+    for attempt in attempts:
+        record_question_attempt(attempt.student_id, attempt.question_id, attempt.is_correct)
+        add_points(attempt.student_id, attempt.question_id, attempt.points_earned)
+        record_review(attempt.student_id, attempt.question_id, attempt.is_correct, attempt.hints_used,
+                      attempt.timestamp)
+    touched = {attempt.student_id for attempt in attempts}
+    for student_id in touched:
+        transaction.on_commit(partial(bump_student_version, student_id))
+        transaction.on_commit(partial(publish_student_changed, student_id))
+    return touched
+
+
+def flush(batch_size=None):
+    """Move every journaled attempt into the database; returns the number of records flushed"""
+    journal = get_journal()
+    batch_size = batch_size or settings.API_WRITE_BEHIND_BATCH_SIZE
+    flushed = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = Checkpoint.objects.select_for_update().get_or_create(name=CHECKPOINT)
+            records, end = journal.read(checkpoint.position, batch_size)
+            if end == checkpoint.position:
+                break
+            if records:
+                _save_batch(records)
+            checkpoint.position = end
+            checkpoint.save(update_fields=['position', 'updated_at'])
+        cache.set(FLUSHED_KEY, end, timeout=None)
+        journal.discard_before(split_position(end)[0])
+        flushed += len(records)
+
+    cache.set(FLUSHED_KEY, checkpoint.position, timeout=None)
+    journal.rotate(settings.API_WRITE_BEHIND_SEGMENT_BYTES)
+    return flushed
+
+
+def _pending(pending, flushed):
+    return pending is not None and pending > (flushed if flushed is not None else -1)
+
+
+def ensure_flushed(student_id):
+    """
+    Wait until the flusher has committed the student's journaled attempts;
+    returns False when settings.API_WRITE_BEHIND_READ_WAIT ran out first
+    """
+    deadline = time.monotonic() + settings.API_WRITE_BEHIND_READ_WAIT
+    pending = cache.get(PENDING_KEY.format(student_id))
+    while _pending(pending, cache.get(FLUSHED_KEY)):
+        if time.monotonic() >= deadline:
+            logger.warning("Flusher has not committed attempts of student %s yet, serving without them", student_id)
+            return False
+        time.sleep(WAIT_POLL_SECONDS)
+    return True
+
+
+async def aensure_flushed(student_id):
+    """``ensure_flushed`` without holding a thread while it waits"""
+    deadline = time.monotonic() + settings.API_WRITE_BEHIND_READ_WAIT
+    pending = await cache.aget(PENDING_KEY.format(student_id))
+    while _pending(pending, await cache.aget(FLUSHED_KEY)):
+        if time.monotonic() >= deadline:
+            logger.warning("Flusher has not committed attempts of student %s yet, serving without them", student_id)
+            return False
+        await asyncio.sleep(WAIT_POLL_SECONDS)
+    return True
+
+
+def flushes_pending(student_kwarg=None, student_param=None):
+    """
+    View decorator giving a student read-your-writes over write-behind
+    attempts: the view runs once the flusher has committed the student's
+    journaled attempts. Costs two cache reads when write-behind is enabled
+    and nothing is pending, nothing when it is disabled.
+    """
+    def student_of(request, kwargs):
+        return kwargs.get(student_kwarg) if student_kwarg else request.GET.get(student_param)
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            async def inner(request, *args, **kwargs):
+                student_id = student_of(request, kwargs)
+                if settings.API_WRITE_BEHIND and student_id:
+                    await aensure_flushed(student_id)
+                return await view_func(request, *args, **kwargs)
+        else:
+            def inner(request, *args, **kwargs):
+                student_id = student_of(request, kwargs)
+                if settings.API_WRITE_BEHIND and student_id:
+                    ensure_flushed(student_id)
+                return view_func(request, *args, **kwargs)
+
+        return wraps(view_func)(inner)
+
+    return decorator
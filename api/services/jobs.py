@@ -0,0 +1,220 @@
+"""
+Database-backed background jobs for work that does not belong on the
+request path (statistics, rollups, leaderboard reconciliation, ...).
+
+Jobs are rows of ``Job``, run by ``manage.py run_workers``. A worker claims
+due jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` where the database
+supports it, so workers never wait on each other; on SQLite, which has no
+row locks, a job is claimed by a compare-and-set UPDATE from queued to
+running that exactly one worker can win.
+
+Queue depth and lag are exported at /metrics from the table, which every
+worker process shares; run and wait times are on the rows (``run_at``,
+``started_at``, ``heartbeat_at``, ``finished_at``).
+
+A failing job is retried with exponential backoff until ``max_attempts``
+and then kept as failed with its traceback. A ``dedupe_key`` allows one
+queued or running job per key, so periodic or event-driven enqueues do not
+pile up behind a slow job. While a job runs, its worker touches
+``heartbeat_at`` every ``HEARTBEAT_SECONDS``; jobs whose heartbeat stopped,
+because their worker crashed, are requeued by ``recover_stale``, or failed
+once out of attempts. A slow job that is still alive is never taken over.
+
+Job functions are registered with ``@job("name")`` (see ``api/jobs.py``)
+and receive the payload as keyword arguments.
+"""
+import logging
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, models, transaction
+from django.utils import timezone
+
+from ..metrics import registry
+from ..models import Job
+
+logger = logging.getLogger("api.jobs")
+
+JOBS = {}
+
+RETRY_BASE_SECONDS = 5
+
+HEARTBEAT_SECONDS = 30
+
+
+def job(name):
+    """Register the decorated function as the job ``name``"""
+    def register(func):
+        JOBS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, dedupe_key=None, run_at=None, max_attempts=3):
+    """Queue a job; with a ``dedupe_key`` already queued or running, return that job instead"""
+    if name not in JOBS:
+        raise ValueError(f"Unknown job {name!r}")
+    fields = dict(
+        name=name, payload=payload or {}, dedupe_key=dedupe_key, run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+    if dedupe_key is None:
+        return Job.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Job.objects.create(**fields)
+    except IntegrityError:
+        existing = Job.objects.filter(dedupe_key=dedupe_key, status__in=[Job.QUEUED, Job.RUNNING]).first()
+        if existing is None:
+            raise
+        return existing
+
+
+def _due(names):
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=timezone.now())
+    if names:
+        due = due.filter(name__in=names)
+    return due.order_by('run_at', 'id')
+
+
+def claim(worker_id, names=None, limit=1):
+    """Mark up to ``limit`` due jobs as running for ``worker_id`` and return them"""
+    now = timezone.now()
+    running = dict(
+        status=Job.RUNNING, locked_by=worker_id, started_at=now, heartbeat_at=now, attempts=models.F('attempts') + 1
+    )
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(_due(names).select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(id__in=ids).update(**running)
+    else:
+        # Compare-and-set: only one worker's UPDATE still finds the job queued
+        ids = []
+        for job_id in _due(names).values_list('id', flat=True)[:limit * 4]:
+            if Job.objects.filter(id=job_id, status=Job.QUEUED).update(**running):
+                ids.append(job_id)
+                if len(ids) == limit:
+                    break
+    return list(Job.objects.filter(id__in=ids).order_by('run_at', 'id'))
+
+
+def _beat(claimed, stop):
+    """Touch ``claimed.heartbeat_at`` until ``stop`` is set or the job is no longer ours"""
+    try:
+        while not stop.wait(HEARTBEAT_SECONDS):
+            mine = Job.objects.filter(id=claimed.id, status=Job.RUNNING, locked_by=claimed.locked_by)
+            if not mine.update(heartbeat_at=timezone.now()):
+                return
+    finally:
+        connection.close()  # The thread's own connection
+
+
+@contextmanager
+def _heartbeat(claimed):
+    stop = threading.Event()
+    beating = threading.Thread(target=_beat, args=(claimed, stop), name=f"heartbeat-{claimed.id}", daemon=True)
+    beating.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        beating.join()
+
+
+def run(claimed):
+    """Run one claimed job and record the outcome; returns True on success"""
+    try:
+        func = JOBS[claimed.name]
+        with _heartbeat(claimed):
+            func(**claimed.payload)
+    except Exception:
+        error = traceback.format_exc()
+        retry = claimed.attempts < claimed.max_attempts
+        logger.warning("Job %s failed (attempt %s/%s)", claimed, claimed.attempts, claimed.max_attempts)
+        Job.objects.filter(id=claimed.id).update(
+            status=Job.QUEUED if retry else Job.FAILED,
+            run_at=timezone.now() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (claimed.attempts - 1)),
+            finished_at=None if retry else timezone.now(),
+            locked_by="",
+            last_error=error,
+        )
+        return False
+    Job.objects.filter(id=claimed.id).update(status=Job.DONE, finished_at=timezone.now(), locked_by="")
+    return True
+
+
+def recover_stale(timeout):
+    """
+    Requeue running jobs whose heartbeat is more than ``timeout`` seconds
+    old (a few ``HEARTBEAT_SECONDS``); the lost run counts as an attempt (``claim``
+    counted it), so jobs that used up ``max_attempts`` are failed instead
+    and a job that kills its worker cannot loop forever. Returns
+    ``(requeued, failed)``.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=now - timedelta(seconds=timeout))
+    failed = stale.filter(attempts__gte=models.F('max_attempts')).update(
+        status=Job.FAILED, finished_at=now, locked_by="",
+        last_error=f"Worker lost: no heartbeat for {timeout:g}s",
+    )
+    requeued = stale.update(status=Job.QUEUED, locked_by="", run_at=now)
+    return requeued, failed
+
+
+def work(worker_id, names=None, poll=1.0, burst=False, should_stop=lambda: False, batch=1):
+    """
+    Claim and run jobs until ``should_stop()``; with ``burst``, return as
+    soon as no job is due. Returns the number of jobs run.
+    """
+    processed = 0
+    while not should_stop():
+        claimed = claim(worker_id, names, batch)
+        for item in claimed:
+            run(item)
+            processed += 1
+        if not claimed:
+            if burst:
+                return processed
+            time.sleep(poll)
+    return processed
+
+
+def queue_stats():
+    """``{(name, status): (count, oldest run_at)}`` in one query"""
+    return {
+        (row['name'], row['status']): (row['count'], row['oldest'])
+        for row in Job.objects.order_by().values('name', 'status').annotate(
+            count=models.Count('id'), oldest=models.Min('run_at')
+        )
+    }
+
+
+def prune(older_than_days=7):
+    """Delete finished jobs older than ``older_than_days``"""
+    return Job.objects.filter(
+        status__in=[Job.DONE, Job.FAILED], finished_at__lt=timezone.now() - timedelta(days=older_than_days)
+    ).delete()[0]
+
+
+def _queue_gauges():
+    stats = queue_stats()
+    now = timezone.now()
+    return {
+        "api_jobs": [({"job": name, "status": status}, count) for (name, status), (count, _) in stats.items()],
+        "api_job_queue_lag_seconds": [
+            ({"job": name}, max(0.0, (now - oldest).total_seconds()))
+            for (name, status), (count, oldest) in stats.items()
+            if status == Job.QUEUED
+        ],
+    }
+
+
+# Both from one queue_stats() query per scrape
+registry.gauges({
+    "api_jobs": "Jobs in the queue by status",
+    "api_job_queue_lag_seconds": "Age of the oldest due queued job",
+}, _queue_gauges)
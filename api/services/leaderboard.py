@@ -0,0 +1,291 @@
+"""
+Global and per-course leaderboards, maintained incrementally.
+
+Every question attempt adds its points to the student's ``LeaderboardEntry``
+on the global board and on its course's board with one upsert. Each worker
+keeps the boards it has served in an order-statistics treap keyed by
+(-points, student id), so top-N costs O(log n + N) and a student's rank
+O(log n) without touching the database.
+
+A board's version moves by one per committed write. A worker applies its
+own write to its tree when nobody else wrote in between and reloads the
+board (one query) on the next read otherwise. Trees are changed and read
+under one lock, as threaded workers share them. ``reconcile_leaderboards``
+recounts every board from the raw attempts to repair drift, e.g. after
+bulk loads that skip signals.
+"""
+import random
+import threading
+from functools import partial
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from ..models import LeaderboardEntry, Question, QuestionAttempt, Student
+from .upsert import upsert
+from .versioning import bump_leaderboard_version, get_catalog_version, get_leaderboard_version
+
+GLOBAL = "global"
+
+
+def course_board(course_id):
+    return f"course:{course_id}"
+
+
+class _Node:
+    __slots__ = ("key", "priority", "left", "right", "size")
+
+    def __init__(self, key, priority):
+        self.key = key
+        self.priority = priority
+        self.left = self.right = None
+        self.size = 1
+
+
+def _size(node):
+    return node.size if node else 0
+
+
+def _update(node):
+    node.size = 1 + _size(node.left) + _size(node.right)
+
+
+def _split(node, key):
+    """``(keys < key, keys >= key)``"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        _update(node)
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    _update(node)
+    return left, node
+
+
+def _merge(left, right):
+    """Join two treaps where every key of ``left`` is below every key of ``right``"""
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _remove(node, key):
+    if node is None:
+        return None
+    if key == node.key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        node.left = _remove(node.left, key)
+    else:
+        node.right = _remove(node.right, key)
+    _update(node)
+    return node
+
+
+class OrderStatisticTree:
+    """Sorted set (treap) with O(log n) insert, remove and rank by subtree sizes"""
+
+    def __init__(self, keys=(), seed=None):
+        self.root = None
+        self.random = random.Random(seed)
+        for key in keys:
+            self.insert(key)
+
+    def __len__(self):
+        return _size(self.root)
+
+    def insert(self, key):
+        left, right = _split(self.root, key)
+        self.root = _merge(_merge(left, _Node(key, self.random.random())), right)
+
+    def remove(self, key):
+        self.root = _remove(self.root, key)
+
+    def rank(self, key):
+        """Number of keys below ``key``"""
+        node, below = self.root, 0
+        while node is not None:
+            if node.key < key:
+                below += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return below
+
+    def first(self, n):
+        """The ``n`` smallest keys in order"""
+        keys, stack, node = [], [], self.root
+        while (stack or node is not None) and len(keys) < n:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            keys.append(node.key)
+            node = node.right
+        return keys
+
+
+class Leaderboard:
+    """One board in memory: points per student plus the tree ordering them"""
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.points = dict(rows)
+        self.tree = OrderStatisticTree((-points, student_id) for student_id, points in self.points.items())
+
+    def add(self, student_id, delta):
+        previous = self.points.get(student_id)
+        if previous is not None:
+            self.tree.remove((-previous, student_id))
+        self.points[student_id] = (previous or 0) + delta
+        self.tree.insert((-self.points[student_id], student_id))
+
+    def rank_of(self, student_id):
+        """``(rank, points)``; students with equal points share a rank"""
+        points = self.points.get(student_id)
+        if points is None:
+            return None
+        return self.tree.rank((-points,)) + 1, points
+
+    def top(self, n):
+        """``[(rank, student_id, points)]`` of the ``n`` best students"""
+        entries = []
+        for position, (negated, student_id) in enumerate(self.tree.first(n)):
+            rank = entries[-1][0] if entries and entries[-1][2] == -negated else position + 1
+            entries.append((rank, student_id, -negated))
+        return entries
+
+
+_boards = {}
+_boards_lock = threading.Lock()
+
+
+def get_board(board):
+    """This worker's copy of ``board``, reloaded when another worker wrote to it"""
+    version = get_leaderboard_version(board)
+    current = _boards.get(board)
+    if current is None or current.version != version:
+        with _boards_lock:
+            current = _boards.get(board)
+            if current is None or current.version != version:
+                current = Leaderboard(
+                    version, LeaderboardEntry.objects.filter(board=board).values_list('student_id', 'points')
+                )
+                _boards[board] = current
+    return current
+
+
+_question_courses = (None, None)
+
+
+def _course_of(question_id):
+    """Course of a question from a map rebuilt after catalog changes"""
+    global _question_courses
+    version = get_catalog_version()
+    built_for, courses = _question_courses
+    if built_for != version:
+        courses = dict(Question.objects.values_list('id', 'lesson__course_id'))
+        _question_courses = (version, courses)
+    return courses.get(question_id)
+
+
+def _upsert(student_id, boards, delta):
+    now = timezone.now()
+    upsert(
+        LeaderboardEntry,
+        (dict(board=board, student_id=student_id, points=delta, updated_at=now) for board in boards),
+        conflict=('board', 'student_id'), increment=('points',), replace=('updated_at',),
+    )
+
+
+def _apply_committed(student_id, boards, delta):
+    with _boards_lock:
+        for board in boards:
+            version = bump_leaderboard_version(board)
+            current = _boards.get(board)
+            if current is not None and current.version == version - 1:
+                current.add(student_id, delta)
+                current.version = version
+
+
+def add_points(student_id, question_id, delta):
+    """Add ``delta`` points to the student's global and course boards"""
+    boards = [GLOBAL]
+    course_id = _course_of(question_id)
+    if course_id is not None:
+        boards.append(course_board(course_id))
+    _upsert(student_id, boards, delta)
+    transaction.on_commit(partial(_apply_committed, student_id, boards, delta))
+
+
+def leaderboard(board, limit=10, student_id=None):
+    """Top ``limit`` students of a board with their names, plus one student's standing"""
+    current = get_board(board)
+    # _apply_committed mutates the tree in place from other threads
+    with _boards_lock:
+        top = current.top(limit)
+        standing = current.rank_of(student_id) if student_id is not None else None
+        students = len(current.points)
+    names = dict(Student.objects.filter(id__in=[entry[1] for entry in top]).values_list('id', 'name'))
+    return {
+        "board": board,
+        "students": students,
+        "entries": [
+            {"rank": rank, "student": sid, "name": names.get(sid), "points": points}
+            for rank, sid, points in top
+        ],
+        "me": {"student": student_id, "rank": standing[0], "points": standing[1]} if standing else None,
+    }
+
+
+def reconcile_leaderboards():
+    """
+    Recount every board from the question attempts and fix the entries that
+    drifted; returns the number of entries created, changed or removed.
+    """
+    totals = {}
+    for student_id, points in (
+        QuestionAttempt.objects.order_by().values('student_id')
+        .annotate(points=models.Sum('points_earned')).values_list('student_id', 'points')
+    ):
+        totals[(GLOBAL, student_id)] = points
+    for student_id, course_id, points in (
+        QuestionAttempt.objects.order_by().values('student_id', 'question__lesson__course_id')
+        .annotate(points=models.Sum('points_earned'))
+        .values_list('student_id', 'question__lesson__course_id', 'points')
+    ):
+        totals[(course_board(course_id), student_id)] = points
+
+    with transaction.atomic():
+        existing = {(entry.board, entry.student_id): entry for entry in LeaderboardEntry.objects.all()}
+        created = [
+            LeaderboardEntry(board=board, student_id=student_id, points=points)
+            for (board, student_id), points in totals.items()
+            if (board, student_id) not in existing
+        ]
+        changed, now = [], timezone.now()
+        for key, entry in existing.items():
+            if key in totals and entry.points != totals[key]:
+                entry.points, entry.updated_at = totals[key], now
+                changed.append(entry)
+        removed = [entry.id for key, entry in existing.items() if key not in totals]
+
+        LeaderboardEntry.objects.bulk_create(created, batch_size=5000)
+        LeaderboardEntry.objects.bulk_update(changed, ['points', 'updated_at'], batch_size=5000)
+        LeaderboardEntry.objects.filter(id__in=removed).delete()
+
+    # Every worker reloads the boards on its next read
+    with _boards_lock:
+        for board in {board for board, _ in existing} | {board for board, _ in totals}:
+            bump_leaderboard_version(board)
+        _boards.clear()
+    return len(created) + len(changed) + len(removed)
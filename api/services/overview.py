@@ -0,0 +1,87 @@
+import asyncio
+
+from django.db.models import Count
+
+from ..models import Course, Lesson, Question, Attempt, QuestionAttempt
+
+
+def _overview_querysets(student):
+    """The five independent queries a student overview is built from"""
+    return (
+        Course.objects.all(),
+        Lesson.objects.order_by('order_index').values('id', 'course_id', 'title'),
+        Question.objects.order_by().values('lesson__course_id').annotate(total=Count('id')),
+        Attempt.objects.filter(student=student).values('lesson_id', 'lesson__course_id', 'timestamp'),
+        QuestionAttempt.objects.filter(student=student).values(
+            'question_id', 'question__lesson__course_id', 'timestamp'
+        ),
+    )
+
+
+def build_overview(courses, lessons, question_totals, attempts, question_attempts):
+    """
+    Combine the raw rows into per-course progress entries:
+    - progress: share of the course's questions attempted at least once
+    - last_activity: latest lesson or question attempt in the course
+    - next_up: first lesson (by order_index) without a lesson attempt
+    """
+    lessons_per_course = {}
+    for lesson in lessons:
+        lessons_per_course.setdefault(lesson['course_id'], []).append(lesson)
+
+    total_questions_per_course = {
+        row['lesson__course_id']: row['total'] for row in question_totals
+    }
+
+    last_activities = {}
+    attempted_lesson_ids = set()
+    question_completions = {}
+
+    for attempt in attempts:
+        course_id = attempt['lesson__course_id']
+        if course_id not in last_activities or attempt['timestamp'] > last_activities[course_id]:
+            last_activities[course_id] = attempt['timestamp']
+        attempted_lesson_ids.add(attempt['lesson_id'])
+
+    for question_attempt in question_attempts:
+        course_id = question_attempt['question__lesson__course_id']
+        if course_id not in last_activities or question_attempt['timestamp'] > last_activities[course_id]:
+            last_activities[course_id] = question_attempt['timestamp']
+        question_completions.setdefault(course_id, set()).add(question_attempt['question_id'])
+
+    data = []
+    for course in courses:
+        next_up = None
+        for lesson in lessons_per_course.get(course.id, []):
+            if lesson['id'] not in attempted_lesson_ids:
+                next_up = lesson
+                break
+
+        attempted_questions = len(question_completions.get(course.id, set()))
+        total_questions = total_questions_per_course.get(course.id, 0)
+        progress = attempted_questions / total_questions if total_questions > 0 else 0
+
+        data.append({
+            "course_id": course.id,
+            "course_name": course.name,
+            "progress": progress,
+            "last_activity": last_activities.get(course.id),
+            "next_up": next_up['title'] if next_up else None
+        })
+
+    return data
+
+
+def get_student_overview(student):
+    """Per-course progress for a student in a fixed number of queries"""
+    return build_overview(*(list(queryset) for queryset in _overview_querysets(student)))
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+async def aget_student_overview(student):
+    """Async variant of ``get_student_overview`` issuing its queries concurrently"""
+    rows = await asyncio.gather(*(_alist(queryset) for queryset in _overview_querysets(student)))
+    return build_overview(*rows)
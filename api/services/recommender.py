@@ -1,9 +1,19 @@
+import asyncio
 from datetime import timedelta
-from ..models import Lesson, Attempt, Question, QuestionAttempt
+from ..models import Lesson, Attempt, Question, QuestionAttempt, TagMastery
+from .stats import lesson_difficulty
+from .tags import get_tag_mastery, mastery_gap
 from django.utils import timezone
 from django.db import models
 
-def get_recommendation(student):
+
+def _aware(value):
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value, timezone.get_current_timezone())
+    return value
+
+
+def get_recommendation(student, now=None):
     """
     Returns a deterministic recommendation for a student with:
     - lesson/course to do next
@@ -15,10 +25,11 @@ def get_recommendation(student):
     # No longer using random numbers - confidence is now data-driven
 
     # Get all lessons
-    lessons = Lesson.objects.all()
+    lessons = Lesson.objects.select_related('stats')
+    tag_mastery = get_tag_mastery(student)
     recommendations = []
 
-    now = timezone.now()  # Use timezone-aware datetime
+    now = now or timezone.now()  # Use timezone-aware datetime
 
     for lesson in lessons:
         attempts = Attempt.objects.filter(student=student, lesson=lesson).order_by('-timestamp')
@@ -35,31 +46,14 @@ def get_recommendation(student):
 
         if attempts.exists():
             last_attempt = attempts.first()
-            last_lesson_time = last_attempt.timestamp
-            if timezone.is_naive(last_lesson_time):
-                last_lesson_time = timezone.make_aware(last_lesson_time, timezone.get_current_timezone())
+            last_lesson_time = _aware(last_attempt.timestamp)
 
         if question_attempts.exists():
             last_question_attempt = question_attempts.first()
-            last_question_time = last_question_attempt.timestamp
-            if timezone.is_naive(last_question_time):
-                last_question_time = timezone.make_aware(last_question_time, timezone.get_current_timezone())
-
-        # Use the most recent activity
-        last_activity_time = None
-        if last_lesson_time and last_question_time:
-            last_activity_time = max(last_lesson_time, last_question_time)
-        elif last_lesson_time:
-            last_activity_time = last_lesson_time
-        elif last_question_time:
-            last_activity_time = last_question_time
-
-        if last_activity_time:
-            time_since_last_activity = (now - last_activity_time).days
-        else:
-            time_since_last_activity = 999
+            last_question_time = _aware(last_question_attempt.timestamp)
 
         # Question-based performance metrics
+        question_metrics = None
         if question_attempts.exists():
             # Recent question performance
             avg_correctness_7d = question_attempts.filter(
@@ -72,7 +66,6 @@ def get_recommendation(student):
 
             # Hint usage patterns
             avg_hints_used = question_attempts.aggregate(avg=models.Avg('hints_used'))['avg'] or 0
-            hint_usage_rate = min(avg_hints_used / 3, 1)  # Normalize hint usage (assuming max 3 hints per question)
 
             # Points earned ratio
             total_questions = Question.objects.filter(lesson=lesson).count()
@@ -82,156 +75,218 @@ def get_recommendation(student):
             total_earned_points = question_attempts.aggregate(
                 total=models.Sum('points_earned')
             )['total'] or 0
-            points_ratio = total_earned_points / max(total_possible_points, 1)
 
             # Question completion ratio
             unique_questions_attempted = question_attempts.values('question').distinct().count()
-            question_completion_ratio = unique_questions_attempted / max(total_questions, 1)
-        else:
-            avg_correctness_7d = 0
-            avg_correctness_30d = 0
-            hint_usage_rate = 0
-            points_ratio = 0
-            question_completion_ratio = 0
+
+            question_metrics = {
+                "avg_correctness_7d": avg_correctness_7d,
+                "avg_correctness_30d": avg_correctness_30d,
+                "avg_hints_used": avg_hints_used,
+                "total_questions": total_questions,
+                "total_possible_points": total_possible_points,
+                "total_earned_points": total_earned_points,
+                "unique_questions_attempted": unique_questions_attempted,
+                "recent_attempts_7d": question_attempts.filter(
+                    timestamp__gte=now - timedelta(days=7)
+                ).count(),
+                "recent_attempts_3d": question_attempts.filter(
+                    timestamp__gte=now - timedelta(days=3)
+                ).count(),
+            }
 
         # Legacy lesson-based metrics (for backward compatibility)
+        lesson_metrics = None
         if attempts.exists():
-            attempts_to_completion_ratio = len(attempts) / max(1, lesson.order_index)
-            legacy_hints_rate = sum([a.hints_used for a in attempts]) / max(1, len(attempts))
-            legacy_correctness_7d = attempts.filter(
-                timestamp__gte=now - timedelta(days=7)
-            ).aggregate(avg=models.Avg('correctness'))['avg'] or 0
-            legacy_correctness_30d = attempts.filter(
-                timestamp__gte=now - timedelta(days=30)
-            ).aggregate(avg=models.Avg('correctness'))['avg'] or 0
-        else:
-            attempts_to_completion_ratio = 0
-            legacy_hints_rate = 0
-            legacy_correctness_7d = 0
-            legacy_correctness_30d = 0
+            lesson_metrics = {
+                "attempt_count": len(attempts),
+                "hints_used": sum([a.hints_used for a in attempts]),
+                "avg_correctness_7d": attempts.filter(
+                    timestamp__gte=now - timedelta(days=7)
+                ).aggregate(avg=models.Avg('correctness'))['avg'] or 0,
+                "avg_correctness_30d": attempts.filter(
+                    timestamp__gte=now - timedelta(days=30)
+                ).aggregate(avg=models.Avg('correctness'))['avg'] or 0,
+            }
 
-        # Combine metrics - prioritize question-based metrics when available
-        if question_attempts.exists():
-            combined_correctness_7d = avg_correctness_7d
-            combined_correctness_30d = avg_correctness_30d
-            combined_hints_rate = hint_usage_rate
-        else:
-            combined_correctness_7d = legacy_correctness_7d
-            combined_correctness_30d = legacy_correctness_30d
-            combined_hints_rate = legacy_hints_rate
+        recommendations.append(_lesson_recommendation(
+            lesson, now, last_lesson_time, last_question_time, question_metrics, lesson_metrics, tag_mastery
+        ))
+
+    return _summarize(recommendations)
+
+
+def _lesson_recommendation(lesson, now, last_lesson_time, last_question_time, question_metrics, lesson_metrics,
+                           tag_mastery):
+    """
+    Turn the raw per-lesson metrics into features and a confidence.
+
+    ``question_metrics`` / ``lesson_metrics`` are None when the student has no
+    question / lesson attempts for the lesson; ``tag_mastery`` is the
+    student's ``{tag: (attempts, correct)}``. Shared by every engine so they
+    only differ in how the metrics are loaded.
+    """
+    has_question_attempts = question_metrics is not None
+    has_lesson_attempts = lesson_metrics is not None
+
+    # Use the most recent activity
+    last_activity_time = None
+    if last_lesson_time and last_question_time:
+        last_activity_time = max(last_lesson_time, last_question_time)
+    elif last_lesson_time:
+        last_activity_time = last_lesson_time
+    elif last_question_time:
+        last_activity_time = last_question_time
+
+    if last_activity_time:
+        time_since_last_activity = (now - last_activity_time).days
+    else:
+        time_since_last_activity = 999
+
+    if has_question_attempts:
+        avg_correctness_7d = question_metrics["avg_correctness_7d"]
+        avg_correctness_30d = question_metrics["avg_correctness_30d"]
+        hint_usage_rate = min(question_metrics["avg_hints_used"] / 3, 1)  # Normalize hint usage (assuming max 3 hints per question)
+        points_ratio = question_metrics["total_earned_points"] / max(question_metrics["total_possible_points"], 1)
+        question_completion_ratio = (
+            question_metrics["unique_questions_attempted"] / max(question_metrics["total_questions"], 1)
+        )
+    else:
+        avg_correctness_7d = 0
+        avg_correctness_30d = 0
+        hint_usage_rate = 0
+        points_ratio = 0
+        question_completion_ratio = 0
+
+    if has_lesson_attempts:
+        attempts_to_completion_ratio = lesson_metrics["attempt_count"] / max(1, lesson.order_index)
+        legacy_hints_rate = lesson_metrics["hints_used"] / max(1, lesson_metrics["attempt_count"])
+        legacy_correctness_7d = lesson_metrics["avg_correctness_7d"]
+        legacy_correctness_30d = lesson_metrics["avg_correctness_30d"]
+    else:
+        attempts_to_completion_ratio = 0
+        legacy_hints_rate = 0
+        legacy_correctness_7d = 0
+        legacy_correctness_30d = 0
 
-        # Feature 2: progress gap (consider both lesson and question completion)
-        has_lesson_attempts = attempts.exists()
-        has_question_attempts = question_attempts.exists()
-        combined_progress = (attempts_to_completion_ratio + question_completion_ratio) / 2
-        progress_gap = 1 if not (has_lesson_attempts or has_question_attempts) else 1 - combined_progress
+    # Combine metrics - prioritize question-based metrics when available
+    if has_question_attempts:
+        combined_correctness_7d = avg_correctness_7d
+        combined_correctness_30d = avg_correctness_30d
+        combined_hints_rate = hint_usage_rate
+    else:
+        combined_correctness_7d = legacy_correctness_7d
+        combined_correctness_30d = legacy_correctness_30d
+        combined_hints_rate = legacy_hints_rate
 
-        # Feature 3: tag mastery gap (simplified)
+    # Feature 2: progress gap (consider both lesson and question completion)
+    combined_progress = (attempts_to_completion_ratio + question_completion_ratio) / 2
+    progress_gap = 1 if not (has_lesson_attempts or has_question_attempts) else 1 - combined_progress
+
+    # Feature 3: tag mastery gap over the lesson's tags (untagged lessons fall back to activity)
+    tag_mastery_gap = mastery_gap(lesson.tags, tag_mastery)
+    if tag_mastery_gap is None:
         tag_mastery_gap = 0.5 if (has_lesson_attempts or has_question_attempts) else 1.0
 
-        # Feature 4: difficulty drift (consider points earned as performance indicator)
-        course_difficulty = lesson.course.difficulty / 5
-        if question_attempts.exists():
-            performance_indicator = points_ratio  # Use points ratio as performance indicator
+    # Feature 4: difficulty drift (consider points earned as performance indicator)
+    # Calibrated from all students' attempts once compute_stats has seen the lesson
+    course_difficulty = lesson_difficulty(lesson) / 5
+    if has_question_attempts:
+        performance_indicator = points_ratio  # Use points ratio as performance indicator
+    else:
+        performance_indicator = combined_correctness_30d
+    difficulty_drift = course_difficulty - performance_indicator
+
+    # Feature 5: hint dependency (new feature)
+    hint_dependency = combined_hints_rate  # Higher values indicate more hint usage
+
+    # Weighted scoring - heavily prioritize lessons with recent activity
+    # Lower score = higher priority (better recommendation)
+
+    # Boost lessons with recent attempts (much higher priority)
+    recent_activity_boost = 0
+    if has_question_attempts:
+        recent_attempts = question_metrics["recent_attempts_7d"]
+        recent_activity_boost = min(recent_attempts * 0.3, 1.0)  # Up to 30% boost for recent activity
+
+    score = (
+        0.25 * min(time_since_last_activity/30, 1) +  # Recency (higher weight)
+        0.15 * progress_gap +                           # Completion gap
+        0.10 * tag_mastery_gap +                       # Concept mastery
+        0.15 * (1 - combined_correctness_7d) +        # Recent performance gap
+        0.10 * max(0, difficulty_drift) +              # Difficulty alignment
+        0.15 * hint_dependency +                       # Hint usage (higher = more help needed)
+        0.10 * (1 - question_completion_ratio)        # Question completion (prioritize incomplete lessons)
+    ) - recent_activity_boost  # Subtract boost to lower score (better recommendation)
+
+    # Confidence is based on recent activity and data freshness
+    # Make confidence more responsive to recent attempts
+
+    # Recent activity factor (most important for confidence)
+    recent_activity_factor = 0
+    if has_question_attempts:
+        # Count attempts in last 7 days and in last 3 days (even more recent)
+        recent_attempts_7d = question_metrics["recent_attempts_7d"]
+        recent_attempts_3d = question_metrics["recent_attempts_3d"]
+
+        # More gradual confidence boost - each attempt adds less
+        recent_activity_factor = min(0.25, recent_attempts_3d * 0.05 + recent_attempts_7d * 0.02)
+
+    # Data freshness factor
+    data_freshness_factor = 0
+    if last_activity_time:
+        days_since_activity = (now - last_activity_time).days
+        if days_since_activity <= 1:
+            data_freshness_factor = 0.15  # Very fresh data
+        elif days_since_activity <= 3:
+            data_freshness_factor = 0.10  # Fresh data
+        elif days_since_activity <= 7:
+            data_freshness_factor = 0.05  # Recent data
         else:
-            performance_indicator = combined_correctness_30d
-        difficulty_drift = course_difficulty - performance_indicator
+            data_freshness_factor = 0.02  # Stale data
 
-        # Feature 5: hint dependency (new feature)
-        hint_dependency = combined_hints_rate  # Higher values indicate more hint usage
+    # Performance factor (based on recent performance)
+    performance_factor = 0
+    if has_question_attempts:
+        recent_performance = combined_correctness_7d
+        performance_factor = recent_performance * 0.2
 
-        # Weighted scoring - heavily prioritize lessons with recent activity
-        # Lower score = higher priority (better recommendation)
-        
-        # Boost lessons with recent attempts (much higher priority)
-        recent_activity_boost = 0
-        if question_attempts.exists():
-            recent_attempts = question_attempts.filter(
-                timestamp__gte=now - timedelta(days=7)
-            ).count()
-            recent_activity_boost = min(recent_attempts * 0.3, 1.0)  # Up to 30% boost for recent activity
-        
-        score = (
-            0.25 * min(time_since_last_activity/30, 1) +  # Recency (higher weight)
-            0.15 * progress_gap +                           # Completion gap
-            0.10 * tag_mastery_gap +                       # Concept mastery
-            0.15 * (1 - combined_correctness_7d) +        # Recent performance gap
-            0.10 * max(0, difficulty_drift) +              # Difficulty alignment
-            0.15 * hint_dependency +                       # Hint usage (higher = more help needed)
-            0.10 * (1 - question_completion_ratio)        # Question completion (prioritize incomplete lessons)
-        ) - recent_activity_boost  # Subtract boost to lower score (better recommendation)
-
-        # Confidence is based on recent activity and data freshness
-        # Make confidence more responsive to recent attempts
-        
-        # Recent activity factor (most important for confidence)
-        recent_activity_factor = 0
-        if question_attempts.exists():
-            # Count attempts in last 7 days
-            recent_attempts_7d = question_attempts.filter(
-                timestamp__gte=now - timedelta(days=7)
-            ).count()
-            # Count attempts in last 3 days (even more recent)
-            recent_attempts_3d = question_attempts.filter(
-                timestamp__gte=now - timedelta(days=3)
-            ).count()
-            
-            # More gradual confidence boost - each attempt adds less
-            recent_activity_factor = min(0.25, recent_attempts_3d * 0.05 + recent_attempts_7d * 0.02)
-        
-        # Data freshness factor
-        data_freshness_factor = 0
-        if last_activity_time:
-            days_since_activity = (now - last_activity_time).days
-            if days_since_activity <= 1:
-                data_freshness_factor = 0.15  # Very fresh data
-            elif days_since_activity <= 3:
-                data_freshness_factor = 0.10  # Fresh data
-            elif days_since_activity <= 7:
-                data_freshness_factor = 0.05  # Recent data
-            else:
-                data_freshness_factor = 0.02  # Stale data
-        
-        # Performance factor (based on recent performance)
-        performance_factor = 0
-        if question_attempts.exists():
-            recent_performance = combined_correctness_7d
-            performance_factor = recent_performance * 0.2
-        
-        # Base confidence starts lower and builds up with activity
-        base_confidence = 0.3  # Start with lower base confidence
-        
-        # Calculate dynamic confidence
-        confidence = max(0.1, min(0.95, 
-            base_confidence + 
-            recent_activity_factor + 
-            data_freshness_factor + 
-            performance_factor
-        ))
-        
-        # Add small variation based on lesson to make it more dynamic
-        lesson_variation = (lesson.id % 7) * 0.02  # Small variation based on lesson ID
-        confidence = max(0.1, min(0.95, confidence + lesson_variation))
-
-        # Collect recommendation
-        recommendations.append({
-            "lesson": lesson.title,
-            "features": {
-                "time_since_last_activity": time_since_last_activity,
-                "avg_correctness_7d": combined_correctness_7d,
-                "avg_correctness_30d": combined_correctness_30d,
-                "progress_gap": progress_gap,
-                "tag_mastery_gap": tag_mastery_gap,
-                "hints_rate": combined_hints_rate,
-                "hint_dependency": hint_dependency,
-                "difficulty_drift": difficulty_drift,
-                "question_completion_ratio": question_completion_ratio,
-                "points_ratio": points_ratio,
-                "attempts_to_completion_ratio": attempts_to_completion_ratio
-            },
-            "confidence": confidence
-        })
+    # Base confidence starts lower and builds up with activity
+    base_confidence = 0.3  # Start with lower base confidence
+
+    # Calculate dynamic confidence
+    confidence = max(0.1, min(0.95,
+        base_confidence +
+        recent_activity_factor +
+        data_freshness_factor +
+        performance_factor
+    ))
+
+    # Add small variation based on lesson to make it more dynamic
+    lesson_variation = (lesson.id % 7) * 0.02  # Small variation based on lesson ID
+    confidence = max(0.1, min(0.95, confidence + lesson_variation))
+
+    # Collect recommendation
+    return {
+        "lesson": lesson.title,
+        "features": {
+            "time_since_last_activity": time_since_last_activity,
+            "avg_correctness_7d": combined_correctness_7d,
+            "avg_correctness_30d": combined_correctness_30d,
+            "progress_gap": progress_gap,
+            "tag_mastery_gap": tag_mastery_gap,
+            "hints_rate": combined_hints_rate,
+            "hint_dependency": hint_dependency,
+            "difficulty_drift": difficulty_drift,
+            "question_completion_ratio": question_completion_ratio,
+            "points_ratio": points_ratio,
+            "attempts_to_completion_ratio": attempts_to_completion_ratio
+        },
+        "confidence": confidence
+    }
 
+
+def _summarize(recommendations):
     # Sort by confidence descending
     recommendations.sort(key=lambda x: x["confidence"], reverse=True)
 
@@ -244,3 +299,106 @@ def get_recommendation(student):
         "confidence": top["confidence"] if top else 0,
         "alternatives": alternatives
     }
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def _batched_querysets(student):
+    """Everything the batched engines need, in five independent queries"""
+    return (
+        Lesson.objects.select_related('course', 'stats'),
+        Attempt.objects.filter(student=student).values(
+            'lesson_id', 'timestamp', 'correctness', 'hints_used'
+        ),
+        QuestionAttempt.objects.filter(student=student).values(
+            'question_id', 'question__lesson_id', 'timestamp', 'is_correct', 'hints_used', 'points_earned'
+        ),
+        Question.objects.order_by().values('lesson_id').annotate(
+            count=models.Count('id'), points=models.Sum('points')
+        ),
+        TagMastery.objects.filter(student=student).values_list('tag', 'attempts', 'correct'),
+    )
+
+
+def _rank_batched(lessons, attempts, question_attempts, question_totals, tag_mastery_rows, now):
+    """Compute every lesson's metrics in memory from the rows of ``_batched_querysets``"""
+    week_ago = now - timedelta(days=7)
+    month_ago = now - timedelta(days=30)
+    three_days_ago = now - timedelta(days=3)
+
+    attempts_by_lesson = {}
+    for attempt in attempts:
+        attempts_by_lesson.setdefault(attempt['lesson_id'], []).append(attempt)
+    question_attempts_by_lesson = {}
+    for question_attempt in question_attempts:
+        question_attempts_by_lesson.setdefault(question_attempt['question__lesson_id'], []).append(question_attempt)
+    totals = {row['lesson_id']: row for row in question_totals}
+    tag_mastery = {tag: (tag_attempts, correct) for tag, tag_attempts, correct in tag_mastery_rows}
+
+    recommendations = []
+    for lesson in lessons:
+        lesson_attempts = attempts_by_lesson.get(lesson.id, [])
+        lesson_question_attempts = question_attempts_by_lesson.get(lesson.id, [])
+
+        last_lesson_time = _aware(max((a['timestamp'] for a in lesson_attempts), default=None))
+        last_question_time = _aware(max((qa['timestamp'] for qa in lesson_question_attempts), default=None))
+
+        question_metrics = None
+        if lesson_question_attempts:
+            lesson_totals = totals.get(lesson.id, {})
+            question_metrics = {
+                "avg_correctness_7d": _mean([
+                    qa['is_correct'] for qa in lesson_question_attempts if qa['timestamp'] >= week_ago
+                ]) or 0,
+                "avg_correctness_30d": _mean([
+                    qa['is_correct'] for qa in lesson_question_attempts if qa['timestamp'] >= month_ago
+                ]) or 0,
+                "avg_hints_used": _mean([qa['hints_used'] for qa in lesson_question_attempts]) or 0,
+                "total_questions": lesson_totals.get('count', 0),
+                "total_possible_points": lesson_totals.get('points') or 0,
+                "total_earned_points": sum(qa['points_earned'] for qa in lesson_question_attempts),
+                "unique_questions_attempted": len({qa['question_id'] for qa in lesson_question_attempts}),
+                "recent_attempts_7d": sum(1 for qa in lesson_question_attempts if qa['timestamp'] >= week_ago),
+                "recent_attempts_3d": sum(1 for qa in lesson_question_attempts if qa['timestamp'] >= three_days_ago),
+            }
+
+        lesson_metrics = None
+        if lesson_attempts:
+            lesson_metrics = {
+                "attempt_count": len(lesson_attempts),
+                "hints_used": sum(a['hints_used'] for a in lesson_attempts),
+                "avg_correctness_7d": _mean([
+                    a['correctness'] for a in lesson_attempts if a['timestamp'] >= week_ago
+                ]) or 0,
+                "avg_correctness_30d": _mean([
+                    a['correctness'] for a in lesson_attempts if a['timestamp'] >= month_ago
+                ]) or 0,
+            }
+
+        recommendations.append(_lesson_recommendation(
+            lesson, now, last_lesson_time, last_question_time, question_metrics, lesson_metrics, tag_mastery
+        ))
+
+    return _summarize(recommendations)
+
+
+def get_recommendation_batched(student, now=None):
+    """
+    Same result as ``get_recommendation`` from five queries in total instead
+    of a dozen per lesson. Used by the API; ``get_recommendation`` stays as
+    the reference implementation.
+    """
+    rows = [list(queryset) for queryset in _batched_querysets(student)]
+    return _rank_batched(*rows, now or timezone.now())
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+async def aget_recommendation(student, now=None):
+    """Async variant of ``get_recommendation_batched`` running its queries concurrently"""
+    rows = await asyncio.gather(*(_alist(queryset) for queryset in _batched_querysets(student)))
+    return _rank_batched(*rows, now or timezone.now())
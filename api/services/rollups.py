@@ -0,0 +1,234 @@
+"""
+Pre-aggregated course and lesson analytics.
+
+``aggregate_rollups`` consumes new question attempts behind a checkpoint
+and maintains three tables:
+- ``ActivityRollup``: attempts, correct answers, hints, points and time per
+  lesson per hour and per day
+- ``LessonProgress``: the distinct questions each student attempted and
+  answered correctly in a lesson
+- ``LessonFunnel``: students who started a lesson, attempted every question
+  and answered every question correctly, counted when a student's progress
+  crosses a stage
+
+The analytics endpoints read only these tables, so their cost depends on
+the number of lessons and buckets shown, never on the attempt history.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from ..models import ActivityRollup, LessonFunnel, LessonProgress, Question, QuestionAttempt
+from .checkpoints import consume, reset
+from .upsert import upsert
+
+CHECKPOINT = "rollups:question-attempts"
+GRANULARITIES = ("hour", "day")
+TOTALS = ("attempts", "correct", "hints_used", "points_earned", "duration_sec")
+
+# Rows per UPDATE/upsert statement; bulk_update cost grows with the square of it
+UPDATE_BATCH_SIZE = 500
+
+
+def bucket_start(timestamp, granularity):
+    """Start of the UTC hour or day holding ``timestamp``"""
+    hour = timestamp.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return hour if granularity == "hour" else hour.replace(hour=0)
+
+
+def _roll_up(rows):
+    totals = {}
+    for _, _, lesson_id, _, timestamp, is_correct, hints_used, points_earned, duration_sec in rows:
+        for granularity in GRANULARITIES:
+            key = (lesson_id, granularity, bucket_start(timestamp, granularity))
+            entry = totals.setdefault(key, dict.fromkeys(TOTALS, 0))
+            entry["attempts"] += 1
+            entry["correct"] += bool(is_correct)
+            entry["hints_used"] += hints_used
+            entry["points_earned"] += points_earned
+            entry["duration_sec"] += duration_sec
+
+    upsert(
+        ActivityRollup,
+        (dict(lesson_id=lesson_id, granularity=granularity, bucket=bucket, **entry)
+         for (lesson_id, granularity, bucket), entry in totals.items()),
+        conflict=('lesson_id', 'granularity', 'bucket'), increment=TOTALS, batch_size=UPDATE_BATCH_SIZE,
+    )
+
+
+def _stages(progress, question_count):
+    if progress is None:
+        return (False, False, False)
+    return (True, len(progress.attempted_questions) >= question_count, progress.completed_at is not None)
+
+
+def _advance_progress(rows):
+    by_pair = {}
+    for _, question_id, lesson_id, student_id, timestamp, is_correct, *_ in rows:
+        by_pair.setdefault((student_id, lesson_id), []).append((question_id, is_correct, timestamp))
+    lesson_ids = {lesson_id for _, lesson_id in by_pair}
+
+    existing = {
+        (progress.student_id, progress.lesson_id): progress
+        for progress in LessonProgress.objects.filter(
+            student_id__in={student_id for student_id, _ in by_pair}, lesson_id__in=lesson_ids
+        )
+    }
+    question_counts = dict(
+        Question.objects.filter(lesson_id__in=lesson_ids).order_by().values('lesson_id')
+        .annotate(count=models.Count('id')).values_list('lesson_id', 'count')
+    )
+
+    created, updated, funnel_deltas = [], [], {}
+    for (student_id, lesson_id), answers in by_pair.items():
+        question_count = question_counts.get(lesson_id, 0)
+        progress = existing.get((student_id, lesson_id))
+        before = _stages(progress, question_count)
+        if progress is None:
+            progress = LessonProgress(
+                student_id=student_id, lesson_id=lesson_id, started_at=answers[0][2],
+                attempted_questions=[], correct_questions=[],
+            )
+            created.append(progress)
+        else:
+            updated.append(progress)
+
+        attempted, correct = set(progress.attempted_questions), set(progress.correct_questions)
+        for question_id, is_correct, timestamp in answers:
+            attempted.add(question_id)
+            if is_correct:
+                correct.add(question_id)
+            if progress.completed_at is None and question_count and len(correct) >= question_count:
+                progress.completed_at = timestamp
+        progress.attempted_questions, progress.correct_questions = sorted(attempted), sorted(correct)
+
+        after = _stages(progress, question_count)
+        deltas = funnel_deltas.setdefault(lesson_id, [0, 0, 0])
+        for stage, (was, now) in enumerate(zip(before, after)):
+            deltas[stage] += int(now and not was)
+
+    LessonProgress.objects.bulk_create(created)
+    LessonProgress.objects.bulk_update(
+        updated, ['attempted_questions', 'correct_questions', 'completed_at'], batch_size=UPDATE_BATCH_SIZE
+    )
+
+    funnels = LessonFunnel.objects.in_bulk(list(funnel_deltas))
+    new_funnels = []
+    for lesson_id, (started, attempted_all, completed) in funnel_deltas.items():
+        funnel = funnels.get(lesson_id)
+        if funnel is None:
+            funnel = LessonFunnel(lesson_id=lesson_id)
+            new_funnels.append(funnel)
+        funnel.started += started
+        funnel.attempted_all += attempted_all
+        funnel.completed += completed
+    LessonFunnel.objects.bulk_create(new_funnels)
+    LessonFunnel.objects.bulk_update(
+        list(funnels.values()), ['started', 'attempted_all', 'completed'], batch_size=UPDATE_BATCH_SIZE
+    )
+
+
+def _aggregate_batch(rows):
+    _roll_up(rows)
+    _advance_progress(rows)
+
+
+def aggregate_rollups(batch_size=None):
+    """Fold question attempts newer than the checkpoint in; returns the number processed"""
+    return consume(
+        CHECKPOINT, QuestionAttempt.objects.all(),
+        ['question_id', 'question__lesson_id', 'student_id', 'timestamp', 'is_correct', 'hints_used',
+         'points_earned', 'duration_sec'],
+        _aggregate_batch, batch_size or settings.API_ROLLUP_BATCH_SIZE, created_field='timestamp',
+    )
+
+
+def rebuild_rollups(batch_size=None):
+    """Drop every rollup and aggregate all attempts again"""
+    with transaction.atomic():
+        ActivityRollup.objects.all().delete()
+        LessonProgress.objects.all().delete()
+        LessonFunnel.objects.all().delete()
+        reset(CHECKPOINT)
+    return aggregate_rollups(batch_size)
+
+
+def _funnel(lesson):
+    try:
+        funnel = lesson.funnel
+    except LessonFunnel.DoesNotExist:
+        funnel = LessonFunnel(lesson=lesson)
+    return {
+        "lesson_id": lesson.id,
+        "title": lesson.title,
+        "order_index": lesson.order_index,
+        "started": funnel.started,
+        "attempted_all": funnel.attempted_all,
+        "completed": funnel.completed,
+    }
+
+
+def _activity(rollups):
+    """Per-bucket averages plus totals over the window from summed rollup rows"""
+    series = []
+    totals = dict.fromkeys(TOTALS, 0)
+    for row in rollups:
+        attempts = row["attempts"]
+        for field in TOTALS:
+            totals[field] += row[field]
+        series.append({
+            "bucket": row["bucket"],
+            "attempts": attempts,
+            "correct_rate": row["correct"] / attempts if attempts else 0,
+            "avg_points": row["points_earned"] / attempts if attempts else 0,
+            "avg_hints": row["hints_used"] / attempts if attempts else 0,
+            "avg_duration_sec": row["duration_sec"] / attempts if attempts else 0,
+        })
+    attempts = totals["attempts"]
+    summary = {
+        "attempts": attempts,
+        "correct_rate": totals["correct"] / attempts if attempts else 0,
+        "avg_points": totals["points_earned"] / attempts if attempts else 0,
+        "avg_hints": totals["hints_used"] / attempts if attempts else 0,
+    }
+    return series, summary
+
+
+def _rollup_rows(granularity, since, **filters):
+    return (
+        ActivityRollup.objects.filter(granularity=granularity, bucket__gte=bucket_start(since, granularity), **filters)
+        .values('bucket')
+        .annotate(**{field: models.Sum(field) for field in TOTALS})
+        .order_by('bucket')
+    )
+
+
+def course_analytics(course, granularity="day", days=30, now=None):
+    """Lesson funnel and activity series of a course, from the rollup tables only (two queries)"""
+    since = (now or timezone.now()) - timedelta(days=days)
+    lessons = course.lessons.select_related('funnel').order_by('order_index')
+    series, summary = _activity(_rollup_rows(granularity, since, lesson__course=course))
+    return {
+        "course": {"id": course.id, "name": course.name},
+        "granularity": granularity,
+        "since": since,
+        "funnel": [_funnel(lesson) for lesson in lessons],
+        "activity": series,
+        "summary": summary,
+    }
+
+
+def lesson_analytics(lesson, granularity="day", days=30, now=None):
+    """Funnel and activity series of one lesson; load it with ``select_related('funnel')``"""
+    since = (now or timezone.now()) - timedelta(days=days)
+    series, summary = _activity(_rollup_rows(granularity, since, lesson=lesson))
+    return {
+        "lesson": {"id": lesson.id, "title": lesson.title, "course_id": lesson.course_id},
+        "granularity": granularity,
+        "since": since,
+        "funnel": _funnel(lesson),
+        "activity": series,
+        "summary": summary,
+    }
@@ -0,0 +1,105 @@
+"""
+Spaced-repetition review scheduling (SM-2).
+
+Every question attempt is a review of that question: it is graded 0-5 from
+correctness and hints used, and the student's ``ReviewState`` for the
+question gets a new interval, ease and ``due_at``. The due list is then a
+range scan of the (student, due_at) index, which acts as a per-student
+priority queue: O(log n) to find the first due question plus the rows
+returned, whatever the length of the attempt history.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import QuestionAttempt, ReviewState
+from .upsert import upsert
+
+MIN_EASE = 1.3
+# Intervals grow geometrically; cap them so due_at stays a valid date
+MAX_INTERVAL_DAYS = 36500
+
+STATE_FIELDS = [field for field in ReviewState._meta.concrete_fields if not field.primary_key]
+
+
+def review_quality(is_correct, hints_used):
+    """SM-2 grade: 5 unaided, 4/3 with one/more hints, 1 for a wrong answer"""
+    if not is_correct:
+        return 1
+    if hints_used <= 0:
+        return 5
+    return 4 if hints_used == 1 else 3
+
+
+def apply_review(state, quality, reviewed_at):
+    """Advance ``state`` by one review of grade ``quality`` (0-5) at ``reviewed_at``"""
+    if quality < 3:
+        state.repetitions = 0
+        state.interval_days = 1
+        state.lapses += 1
+    else:
+        state.repetitions += 1
+        if state.repetitions == 1:
+            state.interval_days = 1
+        elif state.repetitions == 2:
+            state.interval_days = 6
+        else:
+            state.interval_days = min(round(state.interval_days * state.ease, 2), MAX_INTERVAL_DAYS)
+    state.ease = max(MIN_EASE, state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    state.last_reviewed_at = reviewed_at
+    state.due_at = reviewed_at + timedelta(days=state.interval_days)
+    return state
+
+
+def record_review(student_id, question_id, is_correct, hints_used, reviewed_at):
+    """
+    Fold one attempt into the student's review state of the question: one
+    locked read and one write, so simultaneous attempts at the question are
+    applied one after the other (the lock lasts until the attempt's
+    transaction commits). A first attempt inserts the state unless a
+    simultaneous one got there first, which is then applied as an update.
+    """
+    quality = review_quality(is_correct, hints_used)
+    states = ReviewState.objects.select_for_update().filter(student_id=student_id, question_id=question_id)
+    with transaction.atomic(savepoint=False):
+        state = states.first()
+        if state is None:
+            first = apply_review(ReviewState(student_id=student_id, question_id=question_id), quality, reviewed_at)
+            row = {field.attname: getattr(first, field.attname) for field in STATE_FIELDS}
+            if upsert(ReviewState, [row], conflict=('student_id', 'question_id')):
+                return
+            state = states.get()
+        apply_review(state, quality, reviewed_at).save()
+
+
+def due_reviews(student, now=None, limit=20):
+    """The student's questions due at ``now``, most overdue first"""
+    now = now or timezone.now()
+    return list(
+        ReviewState.objects.filter(student=student, due_at__lte=now)
+        .select_related('question__lesson')
+        .order_by('due_at')[:limit]
+    )
+
+
+def rebuild_review_states(batch_size=5000):
+    """Replay every question attempt in time order (after bulk loads that skip signals)"""
+    def states():
+        state = None
+        for student_id, question_id, is_correct, hints_used, timestamp in (
+            QuestionAttempt.objects.order_by('student_id', 'question_id', 'timestamp', 'id')
+            .values_list('student_id', 'question_id', 'is_correct', 'hints_used', 'timestamp')
+            .iterator(chunk_size=batch_size)
+        ):
+            if state is None or (state.student_id, state.question_id) != (student_id, question_id):
+                if state is not None:
+                    yield state
+                state = ReviewState(student_id=student_id, question_id=question_id)
+            apply_review(state, review_quality(is_correct, hints_used), timestamp)
+        if state is not None:
+            yield state
+
+    with transaction.atomic():
+        ReviewState.objects.all().delete()
+        return len(ReviewState.objects.bulk_create(states(), batch_size=batch_size))
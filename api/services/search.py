@@ -0,0 +1,210 @@
+"""
+Full-text search over courses, lessons, questions and hints.
+
+Each catalog object has one ``SearchDocument`` (title, body, tags and the
+course/lesson/question it belongs to), written by signals on save and
+removed on delete. The index behind it depends on the database (migration
+0013):
+- SQLite: an external-content FTS5 table kept in sync by triggers, ranked
+  by bm25 with title matches weighted above tags and body
+- PostgreSQL: a generated ``tsvector`` column with a GIN index, ranked by
+  ``ts_rank_cd``; tags filter through a GIN index on the JSON column
+- anything else: ``icontains`` over the document table, unranked
+
+Every query term is a prefix, so ``recur`` finds "recursion". A search is a
+single query whose cost follows the number of matching documents, not the
+size of the catalog.
+"""
+import json
+import re
+
+from django.apps import apps as django_apps
+from django.db import connection, transaction
+from django.db.models import Q
+
+from ..models import Lesson, Question, SearchDocument
+
+KINDS = tuple(kind for kind, _ in SearchDocument.KINDS)
+MAX_TERMS = 8
+
+_TERM = re.compile(r"\w+")
+
+
+def terms(query):
+    return _TERM.findall(query.lower())[:MAX_TERMS]
+
+
+def _options_text(options):
+    return " ".join(str(option) for option in options or [])
+
+
+def document_for(instance):
+    """Unsaved ``SearchDocument`` fields for a catalog object"""
+    # By model name rather than class, so migrations can pass historical models
+    kind = instance._meta.model_name
+    if kind == 'course':
+        return dict(kind=kind, course_id=instance.id, lesson_id=None, question_id=None,
+                    title=instance.name, body=instance.description, tags=[])
+    if kind == 'lesson':
+        return dict(kind=kind, course_id=instance.course_id, lesson_id=instance.id, question_id=None,
+                    title=instance.title, body="", tags=instance.tags or [])
+    if kind == 'question':
+        return dict(kind=kind, course_id=instance.lesson.course_id, lesson_id=instance.lesson_id,
+                    question_id=instance.id, title=instance.title,
+                    body=f"{instance.content} {_options_text(instance.options)}".strip(), tags=instance.tags or [])
+    if kind == 'hint':
+        question = instance.question
+        return dict(kind=kind, course_id=question.lesson.course_id, lesson_id=question.lesson_id,
+                    question_id=question.id, title=f"Hint {instance.order_index}",
+                    body=instance.content, tags=[])
+    raise TypeError(f"{type(instance).__name__} is not searchable")
+
+
+def index_object(instance):
+    """Write the search document of a saved course, lesson, question or hint"""
+    fields = document_for(instance)
+    with transaction.atomic():
+        SearchDocument.objects.update_or_create(kind=fields.pop('kind'), object_id=instance.id, defaults=fields)
+        # Children follow a lesson or question that moved
+        if isinstance(instance, Lesson):
+            SearchDocument.objects.filter(lesson_id=instance.id).exclude(course_id=instance.course_id).update(
+                course_id=instance.course_id
+            )
+        elif isinstance(instance, Question):
+            SearchDocument.objects.filter(question_id=instance.id).exclude(lesson_id=instance.lesson_id).update(
+                course_id=fields['course_id'], lesson_id=instance.lesson_id
+            )
+
+
+def remove_object(instance):
+    SearchDocument.objects.filter(kind=type(instance).__name__.lower(), object_id=instance.id).delete()
+
+
+def rebuild_search_index(batch_size=5000, apps=None):
+    """
+    Drop every search document and index the whole catalog again; returns
+    the number indexed. Migrations pass their ``apps`` registry.
+    """
+    apps = apps or django_apps
+    Course, Lesson, Question, Hint, SearchDocument = (
+        apps.get_model('api', name) for name in ('Course', 'Lesson', 'Question', 'Hint', 'SearchDocument')
+    )
+
+    def documents():
+        for course in Course.objects.iterator(chunk_size=batch_size):
+            yield SearchDocument(object_id=course.id, **document_for(course))
+        for lesson in Lesson.objects.iterator(chunk_size=batch_size):
+            yield SearchDocument(object_id=lesson.id, **document_for(lesson))
+        for question in Question.objects.select_related('lesson').iterator(chunk_size=batch_size):
+            yield SearchDocument(object_id=question.id, **document_for(question))
+        for hint in Hint.objects.select_related('question__lesson').iterator(chunk_size=batch_size):
+            yield SearchDocument(object_id=hint.id, **document_for(hint))
+
+    indexed, batch = 0, []
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for document in documents():
+            batch.append(document)
+            if len(batch) == batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                indexed += len(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        indexed += len(batch)
+    return indexed
+
+
+def _filters(kinds, course_id, params):
+    sql = []
+    if kinds:
+        sql.append(f"d.kind IN ({', '.join(['%s'] * len(kinds))})")
+        params.extend(kinds)
+    if course_id is not None:
+        sql.append("d.course_id = %s")
+        params.append(course_id)
+    return sql
+
+
+def _result(kind, object_id, title, course_id, lesson_id, question_id, snippet, score):
+    return {
+        "type": kind,
+        "id": object_id,
+        "title": title,
+        "snippet": snippet,
+        "course": course_id,
+        "lesson": lesson_id,
+        "question": question_id,
+        "score": round(score, 4) if score is not None else None,
+    }
+
+
+def _search_sqlite(words, kinds, course_id, tags, limit):
+    match = " AND ".join(f'"{word}"*' for word in words)
+    if tags:
+        # The FTS column filter narrows by tag token, json_each makes it exact
+        tag_match = " AND ".join(f'"{" ".join(terms(tag))}"' for tag in tags if terms(tag))
+        if tag_match:
+            match = f"({match}) AND tags : ({tag_match})" if match else f"tags : ({tag_match})"
+    if not match:
+        return []
+    params = [match]
+    where = ["api_searchdocument_fts MATCH %s", *_filters(kinds, course_id, params)]
+    for tag in tags:
+        where.append("EXISTS (SELECT 1 FROM json_each(d.tags) WHERE json_each.value = %s)")
+        params.append(tag)
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT d.kind, d.object_id, d.title, d.course_id, d.lesson_id, d.question_id, "
+            "snippet(api_searchdocument_fts, 1, '[', ']', '…', 12), -rank "
+            "FROM api_searchdocument_fts JOIN api_searchdocument d ON d.id = api_searchdocument_fts.rowid "
+            f"WHERE {' AND '.join(where)} ORDER BY rank LIMIT %s",
+            params,
+        )
+        return [_result(*row) for row in cursor.fetchall()]
+
+
+def _search_postgresql(words, kinds, course_id, tags, limit):
+    params = [" & ".join(f"{word}:*" for word in words)] if words else []
+    where = ["d.search_vector @@ q"] if words else []
+    where += _filters(kinds, course_id, params)
+    if tags:
+        where.append("d.tags @> %s::jsonb")
+        params.append(json.dumps(tags))
+    query = "to_tsquery('english', %s)" if words else "NULL::tsquery"
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT d.kind, d.object_id, d.title, d.course_id, d.lesson_id, d.question_id, "
+            "ts_headline('english', d.body, q, 'StartSel=[, StopSel=], MaxWords=15, MinWords=5'), "
+            "ts_rank_cd(d.search_vector, q) AS score "
+            f"FROM api_searchdocument d, {query} q "
+            f"WHERE {' AND '.join(where) or 'TRUE'} ORDER BY score DESC NULLS LAST, d.id LIMIT %s",
+            params,
+        )
+        return [_result(*row) for row in cursor.fetchall()]
+
+
+def _search_fallback(words, kinds, course_id, tags, limit):
+    documents = SearchDocument.objects.order_by('id')
+    for word in words:
+        documents = documents.filter(Q(title__icontains=word) | Q(body__icontains=word))
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    if course_id is not None:
+        documents = documents.filter(course_id=course_id)
+    for tag in tags:
+        documents = documents.filter(tags__contains=[tag])
+    return [
+        _result(d.kind, d.object_id, d.title, d.course_id, d.lesson_id, d.question_id, d.body[:120], None)
+        for d in documents[:limit]
+    ]
+
+
+def search(query, kinds=(), course_id=None, tags=(), limit=20):
+    """Best matching documents for ``query`` (prefix terms), optionally filtered by kind, course and tags"""
+    words, tags = terms(query), list(tags)
+    if not words and not tags:
+        return []
+    backend = {'sqlite': _search_sqlite, 'postgresql': _search_postgresql}.get(connection.vendor, _search_fallback)
+    return backend(words, list(kinds), course_id, tags, limit)
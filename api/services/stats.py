@@ -0,0 +1,129 @@
+"""
+Empirical question and lesson difficulty from all students' attempts.
+
+``update_stats`` folds the question attempts created since its last run
+into per-question and per-lesson running totals (attempts, correct answers,
+hints, a duration histogram) and derives a calibrated 1-5 difficulty from
+them. Attempts are consumed behind a checkpoint (see ``checkpoints``), so
+each is counted exactly once and an interrupted run simply resumes.
+Readers such as the recommender get the result from one row per lesson
+instead of aggregating attempts per request.
+"""
+import bisect
+
+from django.conf import settings
+from django.db import transaction
+
+from ..models import Lesson, LessonStats, Question, QuestionAttempt, QuestionStats
+from .checkpoints import consume, reset
+
+CHECKPOINT = "stats:question-attempts"
+
+# Upper bounds (seconds) of the duration histogram buckets; one more bucket
+# collects everything longer
+DURATION_BUCKETS = [5, 10, 20, 30, 45, 60, 90, 120, 180, 300, 600, 1200]
+
+
+def calibrated_difficulty(attempts, correct, prior_difficulty, prior_attempts=None):
+    """
+    Difficulty on the 1-5 scale from the observed correct rate.
+
+    The hand-set difficulty acts as ``prior_attempts`` virtual attempts
+    (difficulty 1 ~ always correct, 5 ~ never), so items with little data
+    stay close to it and move toward the evidence as attempts accumulate.
+    """
+    if prior_attempts is None:
+        prior_attempts = settings.API_DIFFICULTY_PRIOR_ATTEMPTS
+    prior_rate = 1 - (min(max(prior_difficulty, 1), 5) - 1) / 4
+    rate = (correct + prior_attempts * prior_rate) / (attempts + prior_attempts) if attempts + prior_attempts else prior_rate
+    return 1 + 4 * (1 - rate)
+
+
+def median_duration(histogram):
+    """Median interpolated inside the histogram bucket holding the middle attempt"""
+    total = sum(histogram)
+    if not total:
+        return None
+    middle = total / 2
+    seen = 0
+    for index, count in enumerate(histogram):
+        if count and seen + count >= middle:
+            lower = DURATION_BUCKETS[index - 1] if index else 0
+            upper = DURATION_BUCKETS[index] if index < len(DURATION_BUCKETS) else lower * 2
+            return lower + (upper - lower) * (middle - seen) / count
+        seen += count
+    return None
+
+
+def _fold(stats, rows):
+    """Add attempt rows ``(is_correct, hints_used, duration_sec)`` to a stats object's totals"""
+    histogram = stats.duration_histogram or [0] * (len(DURATION_BUCKETS) + 1)
+    for is_correct, hints_used, duration_sec in rows:
+        stats.attempts += 1
+        stats.correct += bool(is_correct)
+        stats.hints_used += hints_used
+        histogram[bisect.bisect_left(DURATION_BUCKETS, duration_sec)] += 1
+    stats.duration_histogram = histogram
+    stats.median_duration_sec = median_duration(histogram)
+
+
+def _apply(model, key, grouped, priors):
+    """Fold ``{id: rows}`` into ``model`` stats rows keyed by ``key``, creating missing ones"""
+    existing = model.objects.in_bulk(list(grouped))
+    created, updated = [], []
+    for pk, rows in grouped.items():
+        stats = existing.get(pk)
+        if stats is None:
+            stats = model(**{key: pk}, attempts=0, correct=0, hints_used=0, duration_histogram=[])
+            created.append(stats)
+        else:
+            updated.append(stats)
+        _fold(stats, rows)
+        stats.calibrated_difficulty = calibrated_difficulty(stats.attempts, stats.correct, priors[pk])
+
+    model.objects.bulk_create(created)
+    model.objects.bulk_update(updated, [
+        'attempts', 'correct', 'hints_used', 'duration_histogram', 'median_duration_sec', 'calibrated_difficulty',
+    ])
+
+
+def _fold_batch(rows):
+    by_question, by_lesson = {}, {}
+    for _, question_id, lesson_id, *values in rows:
+        by_question.setdefault(question_id, []).append(values)
+        by_lesson.setdefault(lesson_id, []).append(values)
+
+    question_priors = dict(Question.objects.filter(id__in=list(by_question)).values_list('id', 'difficulty'))
+    lesson_priors = dict(Lesson.objects.filter(id__in=list(by_lesson)).values_list('id', 'course__difficulty'))
+    _apply(QuestionStats, 'question_id', by_question, question_priors)
+    _apply(LessonStats, 'lesson_id', by_lesson, lesson_priors)
+
+
+def update_stats(batch_size=None):
+    """Fold question attempts newer than the checkpoint in; returns the number processed"""
+    return consume(
+        CHECKPOINT, QuestionAttempt.objects.all(),
+        ['question_id', 'question__lesson_id', 'is_correct', 'hints_used', 'duration_sec'],
+        _fold_batch, batch_size or settings.API_STATS_BATCH_SIZE, created_field='timestamp',
+    )
+
+
+def rebuild_stats(batch_size=None):
+    """Drop every statistic and recount all attempts"""
+    with transaction.atomic():
+        QuestionStats.objects.all().delete()
+        LessonStats.objects.all().delete()
+        reset(CHECKPOINT)
+    return update_stats(batch_size)
+
+
+def lesson_difficulty(lesson):
+    """
+    Calibrated difficulty of a lesson, falling back to its course's hand-set
+    difficulty before any attempt has been processed. Load lessons with
+    ``select_related('course', 'stats')`` to avoid a query per lesson.
+    """
+    try:
+        return lesson.stats.calibrated_difficulty
+    except LessonStats.DoesNotExist:
+        return lesson.course.difficulty
@@ -0,0 +1,145 @@
+"""
+Inverted tag index over the catalog and per-student tag mastery.
+
+The index maps tags to lesson and question ids and back. It is built from
+the ``tags`` JSON fields in two queries the first time it is needed after a
+catalog change (the catalog version moves) and then served from memory.
+
+``TagMastery`` rows count a student's question attempts and correct answers
+per tag. Every attempt increments the rows of its question's and lesson's
+tags with one upsert, so reading a student's mastery is one small query and
+scoring a lesson costs O(tags in lesson).
+"""
+import threading
+
+from django.db import models, transaction
+from django.db.models import F
+
+from ..models import Lesson, Question, QuestionAttempt, TagMastery
+from .upsert import upsert
+from .versioning import get_catalog_version
+
+
+class TagIndex:
+    def __init__(self, lessons, questions):
+        """``lessons``: ``(id, tags)`` rows, ``questions``: ``(id, lesson_id, tags)`` rows"""
+        self.lesson_tags = {lesson_id: frozenset(tags or ()) for lesson_id, tags in lessons}
+        self.question_tags = {}
+        self.lessons_by_tag = {}
+        self.questions_by_tag = {}
+        for lesson_id, tags in self.lesson_tags.items():
+            for tag in tags:
+                self.lessons_by_tag.setdefault(tag, set()).add(lesson_id)
+        for question_id, lesson_id, tags in questions:
+            # A question also exercises the tags of its lesson
+            tags = frozenset(tags or ()) | self.lesson_tags.get(lesson_id, frozenset())
+            self.question_tags[question_id] = tags
+            for tag in tags:
+                self.questions_by_tag.setdefault(tag, set()).add(question_id)
+
+    @classmethod
+    def build(cls):
+        return cls(
+            Lesson.objects.values_list('id', 'tags'),
+            Question.objects.values_list('id', 'lesson_id', 'tags'),
+        )
+
+    def tags_for_question(self, question_id):
+        return self.question_tags.get(question_id, frozenset())
+
+    def lessons_for_tag(self, tag):
+        return self.lessons_by_tag.get(tag, set())
+
+    def questions_for_tag(self, tag):
+        return self.questions_by_tag.get(tag, set())
+
+
+_index = (None, None)
+_index_lock = threading.Lock()
+
+
+def get_tag_index():
+    """The index of the current catalog version, rebuilt after catalog changes"""
+    global _index
+    version = get_catalog_version()
+    built_for, index = _index
+    if built_for != version:
+        with _index_lock:
+            built_for, index = _index
+            if built_for != version:
+                index = TagIndex.build()
+                _index = (version, index)
+    return index
+
+
+def _increment(student_id, counts):
+    """Add ``{tag: (attempts, correct)}`` to a student's mastery rows"""
+    upsert(
+        TagMastery,
+        (dict(student_id=student_id, tag=tag, attempts=attempts, correct=correct)
+         for tag, (attempts, correct) in counts.items()),
+        conflict=('student_id', 'tag'), increment=('attempts', 'correct'),
+    )
+
+
+def record_question_attempt(student_id, question_id, is_correct):
+    tags = get_tag_index().tags_for_question(question_id)
+    if tags:
+        _increment(student_id, {tag: (1, int(bool(is_correct))) for tag in tags})
+
+
+def forget_question_attempt(student_id, question_id, is_correct):
+    """Undo ``record_question_attempt`` for a deleted attempt; never creates rows"""
+    tags = get_tag_index().tags_for_question(question_id)
+    if tags:
+        TagMastery.objects.filter(student_id=student_id, tag__in=tags).update(
+            attempts=F('attempts') - 1, correct=F('correct') - int(bool(is_correct))
+        )
+
+
+def get_tag_mastery(student):
+    """``{tag: (attempts, correct)}`` of one student"""
+    return {
+        tag: (attempts, correct)
+        for tag, attempts, correct in TagMastery.objects.filter(student=student).values_list(
+            'tag', 'attempts', 'correct'
+        )
+    }
+
+
+def mastery_gap(tags, mastery):
+    """
+    1 - average correct rate over ``tags``; a tag the student never
+    practised counts as fully unmastered. None for an untagged lesson.
+    """
+    if not tags:
+        return None
+    gaps = []
+    for tag in tags:
+        attempts, correct = mastery.get(tag, (0, 0))
+        gaps.append(1 - correct / attempts if attempts else 1)
+    return sum(gaps) / len(gaps)
+
+
+def rebuild_tag_mastery():
+    """Recount every student's mastery from all question attempts (after bulk loads)"""
+    index = get_tag_index()
+    totals = {}
+    per_question = QuestionAttempt.objects.order_by().values('student_id', 'question_id').annotate(
+        attempts=models.Count('id'), correct=models.Count('id', filter=models.Q(is_correct=True))
+    )
+    for row in per_question.iterator(chunk_size=10000):
+        for tag in index.tags_for_question(row['question_id']):
+            attempts, correct = totals.get((row['student_id'], tag), (0, 0))
+            totals[(row['student_id'], tag)] = (attempts + row['attempts'], correct + row['correct'])
+
+    with transaction.atomic():
+        TagMastery.objects.all().delete()
+        TagMastery.objects.bulk_create(
+            (
+                TagMastery(student_id=student_id, tag=tag, attempts=attempts, correct=correct)
+                for (student_id, tag), (attempts, correct) in totals.items()
+            ),
+            batch_size=5000,
+        )
+    return len(totals)
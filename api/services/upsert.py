@@ -0,0 +1,81 @@
+"""
+Counters kept with one upsert per write.
+
+``upsert`` adds rows to a table keyed by a unique constraint: a row whose
+key exists has its ``increment`` columns added to the stored ones (and its
+``replace`` columns overwritten), any other row is inserted. On SQLite and
+PostgreSQL that is ``INSERT ... ON CONFLICT DO UPDATE``, one statement per
+chunk of rows, so concurrent writers never lose an increment and no
+transaction is opened around it. Without ``increment`` or ``replace``
+columns a conflicting row is dropped (``DO NOTHING``).
+
+Other databases get an UPDATE per row and an INSERT in a savepoint for the
+keys it did not match, retried as an UPDATE when a concurrent writer
+inserted the key first.
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+
+def _upsert_sql(model, fields, rows, conflict, increment, replace):
+    ops = connection.ops
+    table = ops.quote_name(model._meta.db_table)
+    columns = ", ".join(ops.quote_name(field.column) for field in fields)
+    values = ", ".join([f"({', '.join(['%s'] * len(fields))})"] * len(rows))
+    params = [
+        field.get_db_prep_save(row[field.attname], connection) for row in rows for field in fields
+    ]
+    target = ", ".join(ops.quote_name(model._meta.get_field(name).column) for name in conflict)
+    changes = [
+        f"{column} = {table}.{column} + excluded.{column}"
+        for column in (ops.quote_name(model._meta.get_field(name).column) for name in increment)
+    ] + [
+        f"{column} = excluded.{column}"
+        for column in (ops.quote_name(model._meta.get_field(name).column) for name in replace)
+    ]
+    action = f"DO UPDATE SET {', '.join(changes)}" if changes else "DO NOTHING"
+    return f"INSERT INTO {table} ({columns}) VALUES {values} ON CONFLICT ({target}) {action}", params
+
+
+def _upsert_each(model, rows, conflict, increment, replace):
+    written = 0
+    for row in rows:
+        matched = model.objects.filter(**{name: row[name] for name in conflict})
+        changes = {name: F(name) + row[name] for name in increment} | {name: row[name] for name in replace}
+        if changes and matched.update(**changes):
+            written += 1
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(**row)
+            written += 1
+        except IntegrityError:
+            if changes:
+                written += matched.update(**changes)
+    return written
+
+
+def upsert(model, rows, conflict, increment=(), replace=(), batch_size=None):
+    """
+    Insert ``rows`` (dicts of field attnames, e.g. ``student_id``) into
+    ``model``, adding ``increment`` and overwriting ``replace`` fields of
+    rows whose ``conflict`` fields match a stored one; returns the number
+    of rows inserted or updated. Keys must be distinct within one call:
+    PostgreSQL cannot update a row twice in one statement.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return _upsert_each(model, rows, conflict, increment, replace)
+
+    fields = [model._meta.get_field(name) for name in rows[0]]
+    size = connection.ops.bulk_batch_size(fields, rows)
+    if batch_size:
+        size = min(size, batch_size)
+    written = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), size):
+            cursor.execute(*_upsert_sql(model, fields, rows[start:start + size], conflict, increment, replace))
+            written += cursor.rowcount
+    return written
@@ -0,0 +1,149 @@
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+CATALOG_VERSION_KEY = "api:version:catalog"
+STUDENT_VERSION_KEY = "api:version:student:{}"
+LEADERBOARD_VERSION_KEY = "api:version:leaderboard:{}"
+
+
+def _new_version(previous=None):
+    """
+    Versions are nanosecond timestamps so they double as Last-Modified values
+    and a cache that lost its keys never hands out an old version again.
+    """
+    version = time.time_ns()
+    if previous is not None and version <= previous:
+        version = previous + 1
+    return version
+
+
+def _student_key(student_id):
+    return STUDENT_VERSION_KEY.format(student_id)
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(key):
+    version = _new_version(cache.get(key))
+    cache.set(key, version, timeout=None)
+    return version
+
+
+def get_catalog_version():
+    """Version shared by courses, lessons, questions and hints"""
+    return _get_versions([CATALOG_VERSION_KEY])[0]
+
+
+def bump_catalog_version():
+    return _bump(CATALOG_VERSION_KEY)
+
+
+def get_student_version(student_id):
+    """Version of a single student's activity (attempts and profile)"""
+    return _get_versions([_student_key(student_id)])[0]
+
+
+def bump_student_version(student_id):
+    return _bump(_student_key(student_id))
+
+
+def bump_student_versions(student_ids):
+    """``bump_student_version`` for many students, two cache round trips per call"""
+    keys = [_student_key(student_id) for student_id in student_ids]
+    previous = cache.get_many(keys)
+    cache.set_many({key: _new_version(previous.get(key)) for key in keys}, timeout=None)
+
+
+def get_leaderboard_version(board):
+    """Version of one leaderboard's entries"""
+    return _get_versions([LEADERBOARD_VERSION_KEY.format(board)])[0]
+
+
+def bump_leaderboard_version(board):
+    """
+    Leaderboard versions move by exactly one per write (an atomic ``incr``),
+    so a writer can tell whether anyone else wrote since the version it has.
+    A lost key starts again from a new timestamp, above every old version.
+    """
+    key = LEADERBOARD_VERSION_KEY.format(board)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _new_version(), timeout=None)
+        return cache.get(key)
+
+
+def is_catalog_etag(etag):
+    """Whether an ETag set by ``versioned_condition()`` depends on the catalog version only"""
+    return etag.startswith('"catalog-') and '.student-' not in etag
+
+
+def versioned_condition(student_kwarg=None, student_param=None):
+    """
+    ``condition()`` wired to the catalog version and, optionally, the activity
+    version of the student named by a URL kwarg or a query parameter.
+
+    ETag and Last-Modified come from the cache only, so a matching
+    If-None-Match is answered with a 304 before the view runs any query.
+    """
+    def _versions(request, kwargs):
+        stamp = getattr(request, "_api_versions", None)
+        if stamp is None:
+            student_id = None
+            if student_kwarg:
+                student_id = kwargs.get(student_kwarg)
+            elif student_param:
+                student_id = request.GET.get(student_param)
+
+            keys = [CATALOG_VERSION_KEY]
+            if student_id:
+                keys.append(_student_key(student_id))
+            versions = _get_versions(keys)
+
+            tag = f"catalog-{versions[0]}"
+            if student_id:
+                tag += f".student-{student_id}-{versions[1]}"
+            stamp = (f'"{tag}"', max(versions))
+            request._api_versions = stamp
+        return stamp
+
+    def etag_func(request, *args, **kwargs):
+        return _versions(request, kwargs)[0]
+
+    def last_modified_func(request, *args, **kwargs):
+        return datetime.fromtimestamp(_versions(request, kwargs)[1] / 1e9, tz=dt_timezone.utc)
+
+    conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)
+
+    def _no_cache(response):
+        # Let browsers and CloudFront keep the body but always revalidate
+        if not response.has_header("Cache-Control"):
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def decorator(view_func):
+        conditional_view = conditional(view_func)
+
+        if iscoroutinefunction(view_func):
+            async def inner(request, *args, **kwargs):
+                return _no_cache(await conditional_view(request, *args, **kwargs))
+        else:
+            def inner(request, *args, **kwargs):
+                return _no_cache(conditional_view(request, *args, **kwargs))
+
+        return wraps(view_func)(inner)
+
+    return decorator
@@ -0,0 +1,75 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import Student, Course, Lesson, Attempt, Question, Hint, QuestionAttempt
+from .services.events import publish_student_changed
+from .services.leaderboard import add_points
+from .services.scheduler import record_review
+from .services.search import index_object, remove_object
+from .services.tags import forget_question_attempt, record_question_attempt
+from .services.versioning import bump_catalog_version, bump_student_version
+
+
+def bump_now_and_on_commit(bump, *args):
+    """
+    Bump a version now, for reads later in this transaction, and again once
+    it commits: a concurrent request may have read the old rows in between
+    and cached or tagged them with the first bump.
+    """
+    bump(*args)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(partial(bump, *args))
+
+
+def catalog_changed(sender, **kwargs):
+    bump_now_and_on_commit(bump_catalog_version)
+
+
+def search_document_saved(sender, instance, **kwargs):
+    index_object(instance)
+
+
+def search_document_deleted(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+def student_changed(sender, instance, **kwargs):
+    bump_now_and_on_commit(bump_student_version, instance.pk)
+
+
+def student_activity_changed(sender, instance, **kwargs):
+    bump_now_and_on_commit(bump_student_version, instance.student_id)
+    transaction.on_commit(partial(publish_student_changed, instance.student_id))
+
+
+def question_attempt_saved(sender, instance, created, **kwargs):
+    if created:
+        record_question_attempt(instance.student_id, instance.question_id, instance.is_correct)
+        add_points(instance.student_id, instance.question_id, instance.points_earned)
+        record_review(
+            instance.student_id, instance.question_id, instance.is_correct, instance.hints_used, instance.timestamp
+        )
+
+
+def question_attempt_deleted(sender, instance, **kwargs):
+    forget_question_attempt(instance.student_id, instance.question_id, instance.is_correct)
+    add_points(instance.student_id, instance.question_id, -instance.points_earned)
+
+
+for model in (Course, Lesson, Question, Hint):
+    post_save.connect(catalog_changed, sender=model)
+    post_delete.connect(catalog_changed, sender=model)
+    post_save.connect(search_document_saved, sender=model)
+    post_delete.connect(search_document_deleted, sender=model)
+
+post_save.connect(student_changed, sender=Student)
+post_delete.connect(student_changed, sender=Student)
+
+for model in (Attempt, QuestionAttempt):
+    post_save.connect(student_activity_changed, sender=model)
+    post_delete.connect(student_activity_changed, sender=model)
+
+post_save.connect(question_attempt_saved, sender=QuestionAttempt)
+post_delete.connect(question_attempt_deleted, sender=QuestionAttempt)
@@ -1,7 +1,22 @@
+import io
+import json
+import time
+from datetime import timedelta
+
 import pytest
+from asgiref.sync import async_to_sync
 from rest_framework.test import APIClient
+from django.db import connection
+from django.test import RequestFactory
 from django.urls import reverse
-from .models import Student, Course, Lesson, Attempt
+from django.utils import timezone
+from .models import (
+    Student, Course, Lesson, Attempt, Question, Hint, QuestionAttempt, Checkpoint, QuestionStats, LessonStats,
+    ReviewState, Job, HintReveal
+)
+from .views import (
+    AsyncStudentOverview, AsyncStudentRecommendation, AsyncStudentQuestionAttempts, AsyncLessonQuestions
+)
 
 
 @pytest.mark.django_db
@@ -286,3 +301,1629 @@ class TestRecommenderDeterminism:
             assert 'confidence' in alt
             assert isinstance(alt['lesson'], str)
             assert isinstance(alt['confidence'], (int, float))
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    @pytest.fixture
+    def client(self):
+        return APIClient()
+
+    @pytest.fixture
+    def sample_data(self):
+        student = Student.objects.create(name="Test Student", email="test@example.com")
+        course = Course.objects.create(name="Python 101", description="Learn Python", difficulty=2)
+        lesson = Lesson.objects.create(course=course, title="Variables", tags=["python"], order_index=1)
+        return student, course, lesson
+
+    def test_catalog_not_modified_without_queries(self, client, sample_data, django_assert_num_queries):
+        url = reverse('course-list')
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+    def test_catalog_etag_changes_on_catalog_write(self, client, sample_data):
+        student, course, lesson = sample_data
+        url = reverse('lesson-list')
+        etag = client.get(url).headers['ETag']
+
+        Lesson.objects.create(course=course, title="Loops", tags=["python"], order_index=2)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_overview_etag_tracks_student_activity(self, client, sample_data):
+        student, course, lesson = sample_data
+        url = reverse('student-overview', kwargs={'pk': student.id})
+        etag = client.get(url).headers['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        Attempt.objects.create(student=student, lesson=lesson, correctness=1, hints_used=0, duration_sec=60)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data[0]['next_up'] is None
+
+    def test_etag_read_before_commit_is_invalidated_by_the_commit(
+        self, client, sample_data, django_capture_on_commit_callbacks
+    ):
+        student, course, lesson = sample_data
+        url = reverse('course-list')
+        with django_capture_on_commit_callbacks(execute=True):
+            Course.objects.create(name="SQL", description="d", difficulty=1)
+            # A concurrent reader tags the rows it saw mid-transaction
+            etag = client.get(url).headers['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    @pytest.fixture
+    def sample_data(self):
+        student = Student.objects.create(name="Test Student", email="test@example.com")
+        course = Course.objects.create(name="Python 101", description="Learn Python", difficulty=2)
+        lessons = [
+            Lesson.objects.create(course=course, title=f"Lesson {i}", tags=["python"], order_index=i)
+            for i in range(1, 4)
+        ]
+        questions = [
+            Question.objects.create(
+                lesson=lesson, title=f"Q{i}", content="?", correct_answer=["A"], order_index=i, points=10
+            )
+            for i, lesson in enumerate(lessons[:2], 1)
+        ]
+        Hint.objects.create(question=questions[0], content="Hint", order_index=1, penalty_points=2)
+        Attempt.objects.create(student=student, lesson=lessons[0], correctness=0.7, hints_used=1, duration_sec=100)
+        QuestionAttempt.objects.create(
+            student=student, question=questions[0], answer=["A"], is_correct=True, hints_used=1,
+            duration_sec=30, points_earned=8
+        )
+        QuestionAttempt.objects.create(
+            student=student, question=questions[1], answer=["B"], is_correct=False, duration_sec=40
+        )
+        return student, lessons
+
+    def call(self, view, path, **kwargs):
+        request = RequestFactory().get(path)
+        return async_to_sync(view.as_view())(request, **kwargs)
+
+    def test_async_recommendation_matches_sync_engine(self, sample_data):
+        from .services.recommender import get_recommendation, aget_recommendation
+        student, lessons = sample_data
+        now = timezone.now()
+
+        assert async_to_sync(aget_recommendation)(student, now=now) == get_recommendation(student, now=now)
+
+    def test_async_overview_matches_sync_view(self, sample_data):
+        student, lessons = sample_data
+        url = reverse('student-overview', kwargs={'pk': student.id})
+        sync_response = APIClient().get(url)
+
+        response = self.call(AsyncStudentOverview, url, pk=student.id)
+        assert response.status_code == 200
+        assert response.content == sync_response.content
+        assert response.headers['ETag'] == sync_response.headers['ETag']
+
+    def test_async_lesson_questions_matches_sync_view(self, sample_data):
+        student, lessons = sample_data
+        url = f"{reverse('lesson-questions', kwargs={'lesson_id': lessons[0].id})}?student={student.id}"
+        sync_response = APIClient().get(url)
+
+        response = self.call(AsyncLessonQuestions, url, lesson_id=lessons[0].id)
+        assert response.status_code == 200
+        assert json.loads(response.content) == json.loads(sync_response.content)
+
+    def test_async_views_not_found(self, sample_data):
+        response = self.call(AsyncStudentQuestionAttempts, '/', pk=999)
+        assert response.status_code == 404
+        response = self.call(AsyncStudentRecommendation, '/', pk=999)
+        assert json.loads(response.content) == {"error": "Student not found"}
+
+
+@pytest.mark.django_db
+class TestProgressEvents:
+    @pytest.fixture
+    def sample_data(self):
+        student = Student.objects.create(name="Test Student", email="test@example.com")
+        course = Course.objects.create(name="Python 101", description="Learn Python", difficulty=2)
+        lesson = Lesson.objects.create(course=course, title="Variables", tags=["python"], order_index=1)
+        question = Question.objects.create(
+            lesson=lesson, title="Q1", content="?", correct_answer=["A"], order_index=1
+        )
+        return student, question
+
+    def test_local_broker_delivers_to_channel_subscribers(self):
+        from .services.events import LocalBroker
+        broker = LocalBroker()
+        received = []
+        unsubscribe = broker.subscribe("student:1", received.append)
+        broker.publish("student:1", {"student": 1})
+        broker.publish("student:2", {"student": 2})
+        unsubscribe()
+        broker.publish("student:1", {"student": 1})
+
+        assert received == [{"student": 1}]
+
+    def test_stream_pushes_delta_after_attempt_commit(self, sample_data, django_capture_on_commit_callbacks,
+                                                      settings):
+        settings.API_EVENTS_ON_WSGI = True
+        student, question = sample_data
+        response = APIClient().get(reverse('student-events', kwargs={'pk': student.id}))
+        assert response['Content-Type'] == 'text/event-stream'
+        stream = iter(response.streaming_content)
+
+        assert next(stream).startswith(b"retry:")
+        assert next(stream).startswith(b"event: overview")
+        assert next(stream).startswith(b"event: recommendation")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            QuestionAttempt.objects.create(
+                student=student, question=question, answer=["A"], is_correct=True, duration_sec=20
+            )
+
+        delta = next(stream)
+        assert delta.startswith(b"event: overview")
+        payload = json.loads(delta.split(b"data: ", 1)[1])
+        assert payload[0]['progress'] == 1
+        response.close()
+
+    def test_sync_workers_refuse_streams(self, sample_data):
+        student, _ = sample_data
+        response = APIClient().get(reverse('student-events', kwargs={'pk': student.id}))
+        assert response.status_code == 503
+        assert response['Retry-After'] == '300'
+        assert not response.streaming
+
+    def test_stream_unknown_student(self):
+        response = APIClient().get(reverse('student-events', kwargs={'pk': 999}))
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestPerformanceInstrumentation:
+    @pytest.fixture
+    def course(self):
+        return Course.objects.create(name="Python 101", description="Learn Python", difficulty=2)
+
+    def test_server_timing_header(self, course):
+        response = APIClient().get(reverse('course-list'))
+
+        timing = response.headers['Server-Timing']
+        assert 'app;dur=' in timing
+        assert 'desc="1 queries"' in timing
+        assert 'render;dur=' in timing
+
+    def test_metrics_endpoint_exposes_histograms(self, course):
+        APIClient().get(reverse('course-list'))
+        response = APIClient().get(reverse('metrics'))
+
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert '# TYPE api_request_duration_seconds histogram' in body
+        assert 'api_request_db_queries_count{view="course-list"}' in body
+        assert 'api_response_bytes_bucket{view="course-list",le="+Inf"}' in body
+
+    def test_metrics_are_only_served_to_allowed_scrapers(self, settings):
+        settings.API_METRICS_ALLOWED_IPS = ['10.0.0.0/8']
+        settings.API_METRICS_TOKEN = "s3cret"
+        url = reverse('metrics')
+        assert APIClient(REMOTE_ADDR='203.0.113.5').get(url).status_code == 403
+        assert APIClient(REMOTE_ADDR='203.0.113.5').get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+        assert APIClient(REMOTE_ADDR='203.0.113.5').get(url, HTTP_AUTHORIZATION='Bearer s3cret').status_code == 200
+        assert APIClient(REMOTE_ADDR='10.1.2.3').get(url).status_code == 200
+
+        settings.API_METRICS_TOKEN = None
+        assert APIClient(REMOTE_ADDR='203.0.113.5').get(url, HTTP_AUTHORIZATION='Bearer ').status_code == 403
+
+    def test_slow_requests_logged_with_queries(self, course, settings, caplog):
+        settings.API_SLOW_REQUEST_MS = 0
+        with caplog.at_level('WARNING', logger='api.performance'):
+            APIClient().get(reverse('course-list'))
+
+        assert 'Slow request GET /api/courses/' in caplog.text
+        assert 'FROM "api_course"' in caplog.text
+
+    def test_async_stack_records_queries(self, course):
+        from django.test import AsyncClient
+
+        response = async_to_sync(AsyncClient().get)(reverse('course-list'))
+
+        assert response.status_code == 200
+        assert 'desc="1 queries"' in response.headers['Server-Timing']
+
+    def test_middleware_stays_async_under_asgi(self):
+        from asgiref.sync import iscoroutinefunction
+        from .middleware import DisableThrottlingMiddleware, PerformanceMiddleware
+
+        async def get_response(request):
+            return None
+
+        assert iscoroutinefunction(PerformanceMiddleware(get_response))
+        assert iscoroutinefunction(DisableThrottlingMiddleware(get_response))
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    def build_catalog(self, scale):
+        student = Student.objects.create(name="Test Student", email="test@example.com")
+        for c in range(scale):
+            course = Course.objects.create(name=f"Course {c}", description="", difficulty=3)
+            for l in range(scale):
+                lesson = Lesson.objects.create(course=course, title=f"Lesson {l}", tags=["t"], order_index=l)
+                Attempt.objects.create(student=student, lesson=lesson, correctness=0.5, hints_used=1, duration_sec=60)
+                for q in range(scale):
+                    question = Question.objects.create(
+                        lesson=lesson, title=f"Q{q}", content="?", correct_answer=["A"], order_index=q
+                    )
+                    Hint.objects.create(question=question, content="Hint", order_index=1)
+                    QuestionAttempt.objects.create(
+                        student=student, question=question, answer=["A"], is_correct=True, duration_sec=10
+                    )
+        return student, lesson, question
+
+    def requests_for(self, student, lesson, question):
+        return {
+            'student-overview': ('get', reverse('student-overview', kwargs={'pk': student.id}), None),
+            'student-recommendation': ('get', reverse('student-recommendation', kwargs={'pk': student.id}), None),
+            'student-events': ('get', reverse('student-events', kwargs={'pk': student.id}), None),
+            'student-question-attempts': (
+                'get', reverse('student-question-attempts', kwargs={'pk': student.id}), None
+            ),
+            'student-reviews-due': ('get', reverse('student-reviews-due', kwargs={'pk': student.id}), None),
+            'course-list': ('get', reverse('course-list'), None),
+            'course-analytics': ('get', reverse('course-analytics', kwargs={'pk': lesson.course_id}), None),
+            'course-leaderboard': (
+                'get', f"{reverse('course-leaderboard', kwargs={'pk': lesson.course_id})}?student={student.id}", None
+            ),
+            'lesson-list': ('get', f"{reverse('lesson-list')}?student={student.id}", None),
+            'lesson-questions': (
+                'get', f"{reverse('lesson-questions', kwargs={'lesson_id': lesson.id})}?student={student.id}", None
+            ),
+            'lesson-analytics': ('get', reverse('lesson-analytics', kwargs={'lesson_id': lesson.id}), None),
+            'question-list': ('get', reverse('question-list'), None),
+            'question-detail': ('get', reverse('question-detail', kwargs={'pk': question.id}), None),
+            'question-hint': (
+                'post', reverse('question-hint', kwargs={'pk': question.id, 'number': 1}), {'student': student.id}
+            ),
+            'question-attempt-create': ('post', reverse('question-attempt-create'), {
+                'student': student.id, 'question': question.id, 'answer': ['A'], 'is_correct': True,
+                'hints_used': 1, 'duration_sec': 30
+            }),
+            'attempt-create': ('post', reverse('attempt-create'), {
+                'student': student.id, 'lesson': lesson.id, 'correctness': 0.5, 'hints_used': 0, 'duration_sec': 30
+            }),
+            'leaderboard': ('get', f"{reverse('leaderboard')}?student={student.id}", None),
+            'analyze-code': ('post', reverse('analyze-code'), {'code': 'let x = 1;'}),
+            'search': ('get', f"{reverse('search')}?q=q&tags=python", None),
+        }
+
+    def test_every_route_declares_a_budget(self):
+        from .urls import urlpatterns, QUERY_BUDGETS
+        assert {pattern.name for pattern in urlpatterns} == set(QUERY_BUDGETS)
+
+    @pytest.mark.parametrize('scale', [1, 4])
+    def test_endpoints_stay_within_budget(self, scale, query_budget, settings):
+        from .urls import QUERY_BUDGETS
+        settings.API_EVENTS_ON_WSGI = True
+        requests = self.requests_for(*self.build_catalog(scale))
+        client = APIClient()
+
+        for name, (method, url, data) in requests.items():
+            with query_budget(QUERY_BUDGETS[name]):
+                response = getattr(client, method)(url, data, format='json')
+            assert response.status_code < 400, name
+
+    def test_detector_flags_repeated_statement_shapes(self, query_budget):
+        from .instrumentation import NPlusOneDetector
+        course = Course.objects.create(name="Course", description="", difficulty=1)
+        for i in range(5):
+            Lesson.objects.create(course=course, title=f"L{i}", tags=[], order_index=i)
+
+        detector = NPlusOneDetector(threshold=5)
+        with detector.record():
+            for lesson in Lesson.objects.all():
+                lesson.course.name
+        assert detector.repeated()[0][1] == 5
+        assert 'FROM "api_course"' in detector.report()
+
+
+@pytest.mark.django_db
+class TestSyntheticDataset:
+    def test_seed_scale_generates_requested_rows(self):
+        from django.core.management import call_command
+        call_command(
+            'seed_scale', courses=2, lessons=3, questions=4, students=5, attempts=30, days=30, seed=7,
+            batch_size=16, stdout=io.StringIO()
+        )
+
+        assert Course.objects.count() == 2
+        assert Question.objects.count() == 24
+        assert Hint.objects.count() == 48
+        assert QuestionAttempt.objects.count() == 150
+        assert Attempt.objects.count() == 15
+
+        # Timestamps come from the generator, spread over the history window
+        oldest = QuestionAttempt.objects.order_by('timestamp').first().timestamp
+        newest = QuestionAttempt.objects.order_by('-timestamp').first().timestamp
+        assert newest <= timezone.now()
+        assert newest - oldest > timedelta(days=1)
+
+    def test_generation_is_deterministic(self):
+        from .benchmarks.dataset import SyntheticDataset
+        now = timezone.now()
+
+        def snapshot():
+            dataset = SyntheticDataset(courses=1, lessons=2, questions=3, students=2, attempts=20, seed=3, now=now)
+            dataset.generate()
+            rows = list(QuestionAttempt.objects.order_by('id').values_list(
+                'question__title', 'timestamp', 'is_correct', 'hints_used', 'duration_sec', 'points_earned'
+            ))
+            QuestionAttempt.objects.all().delete()
+            Course.objects.all().delete()
+            Student.objects.all().delete()
+            return rows
+
+        assert snapshot() == snapshot()
+
+
+@pytest.mark.django_db
+class TestSeedDemo:
+    def test_seed_demo_is_repeatable_and_keeps_other_students(self):
+        from django.core.management import call_command
+        other = Student.objects.create(id=2, name="Other", email="other@example.com")
+
+        for _ in range(2):
+            call_command('seed_demo', stdout=io.StringIO())
+
+        assert Course.objects.count() == 5
+        assert Lesson.objects.count() == 23
+        assert Question.objects.count() == 30
+        assert Hint.objects.count() == 34
+        assert Attempt.objects.filter(student_id=1).count() == 7
+        assert Student.objects.filter(id=other.id).exists()
+        assert list(
+            Question.objects.filter(title="Variable Declaration").first().hints.values_list('order_index', 'penalty_points')
+        ) == [(1, 2), (2, 3)]
+
+        results = APIClient().get(reverse('search'), {'q': 'variable'}).json()['results']
+        assert ('question', Question.objects.filter(title="Variable Declaration").first().id) in {
+            (result['type'], result['id']) for result in results
+        }
+
+    def test_seed_demo_invalidates_every_student(self):
+        from django.core.management import call_command
+        from .services.versioning import get_student_version
+        other = Student.objects.create(id=2, name="Other", email="other@example.com")
+        call_command('seed_demo', stdout=io.StringIO())
+        QuestionAttempt.objects.create(
+            student=other, question=Question.objects.first(), answer=["A"], is_correct=True, duration_sec=5
+        )
+        version = get_student_version(other.id)
+        url = reverse('student-overview', kwargs={'pk': other.id})
+        etag = APIClient().get(url)['ETag']
+
+        call_command('seed_demo', stdout=io.StringIO())  # Empties the other student's attempts too
+        assert get_student_version(other.id) > version
+        assert APIClient().get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+class TestBenchmarkSuite:
+    def test_benchmark_scale_covers_every_route(self):
+        from .benchmarks.suite import benchmark_scale
+        from .urls import QUERY_BUDGETS
+        params = dict(courses=1, lessons=2, questions=3, students=2, attempts=10)
+
+        results = benchmark_scale(params, iterations=2)
+
+        assert set(results['routes']) == set(QUERY_BUDGETS) - {'student-events'}
+        for name, route in results['routes'].items():
+            assert route['status'] < 400
+            assert route['queries'] <= QUERY_BUDGETS[name]
+            assert route['p50_ms'] <= route['p95_ms'] <= route['p99_ms']
+            assert route['peak_kb'] > 0
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        from .benchmarks.suite import compare
+
+        def run(queries, p50_ms, peak_kb):
+            route = {'queries': queries, 'p50_ms': p50_ms, 'p95_ms': p50_ms, 'peak_kb': peak_kb}
+            return {'scales': {'small': {'routes': {'course-list': route}}}}
+
+        baseline = run(1, 10.0, 100.0)
+        assert compare(run(1, 14.0, 120.0), baseline) == []
+        assert compare(run(2, 10.0, 100.0), baseline) == ['small/course-list: queries 1 -> 2']
+        assert len(compare(run(1, 20.0, 200.0), baseline)) == 2
+        assert len(compare(run(1, 20.0, 150.0), baseline)) == 1  # +50KiB is below the noise floor
+        assert compare(run(1, 20.0, 100.0), {'scales': {}}) == []
+
+
+@pytest.mark.django_db
+class TestRecommenderHarness:
+    def test_engines_match_reference_across_scaling_curve(self):
+        from .benchmarks.recommender import scaling_curve
+        points = scaling_curve(['batched', 'async'], [3, 6], [20], repeat=1)
+
+        assert [(point['lessons'], point['attempts']) for point in points] == [(3, 20), (6, 20)]
+        for point in points:
+            for stats in point['engines'].values():
+                assert stats['differences'] == []
+                assert stats['queries'] == 5
+
+    def test_compare_results_tolerates_float_noise_only(self):
+        from .benchmarks.recommender import compare_results
+        expected = {"recommendation": "A", "confidence": 0.3, "alternatives": [{"confidence": 0.1}]}
+
+        assert compare_results(expected, {**expected, "confidence": 0.1 + 0.2}) == []
+        assert compare_results(expected, {**expected, "recommendation": "B"}) == [
+            "result.recommendation: 'A' != 'B'"
+        ]
+        assert compare_results(expected, {**expected, "alternatives": []}) == [
+            "result.alternatives: 1 items != 0 items"
+        ]
+
+    def test_query_breakdown_groups_statement_shapes(self):
+        from .benchmarks.recommender import build_fixture, query_breakdown, ENGINES
+        student, now = build_fixture(lessons=4, attempts=10)
+
+        breakdown = query_breakdown(ENGINES['reference'], student, now)
+        assert max(count for _, count, _ in breakdown) >= 4
+        assert sum(count for _, count, _ in query_breakdown(ENGINES['batched'], student, now)) == 5
+
+
+class TestLoadGenerator:
+    def test_session_walks_lessons_questions_answers_and_progress(self):
+        import random
+        from .benchmarks.load import student_session
+        session = student_session(7, random.Random(0), answers=2)
+
+        requests = [session.send(None)]
+        replies = [
+            [{"id": 3}],
+            {"questions": [{"id": 11, "correct_answer": ["A"]}, {"id": 12, "correct_answer": ["B"]}]},
+            {}, {}, {}, {},
+        ]
+        for reply in replies:
+            try:
+                requests.append(session.send(reply))
+            except StopIteration:
+                break
+
+        assert [step for step, *_ in requests] == [
+            'lessons', 'lesson-questions', 'answer', 'answer', 'overview', 'recommendation'
+        ]
+        assert requests[1][2] == '/api/lessons/3/questions/?student=7'
+        assert {request[3]['question'] for request in requests[2:4]} == {11, 12}
+
+    def test_run_threads_reports_throughput_and_errors_per_step(self):
+        from .benchmarks.load import run_threads
+
+        class FakeTransport:
+            def request(self, method, path, body):
+                if 'lessons/?' in path:
+                    return 200, b'[{"id": 1}]'
+                if 'questions' in path:
+                    return 200, b'{"questions": [{"id": 5, "correct_answer": ["A"]}]}'
+                if 'recommendation' in path:
+                    return 500, b''
+                return 200, b'{}'
+
+        results = run_threads(FakeTransport(), [1, 2], concurrency=2, duration=0.2)
+
+        assert results['sessions'] > 0
+        assert results['steps']['answer']['requests'] == results['sessions']
+        assert results['steps']['recommendation']['error_rate'] == 1
+        assert results['steps']['overview']['errors'] == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('no_checkpoint_lag')
+class TestDifficultyStats:
+    def test_only_new_attempts_are_folded_in(self, lesson, question, students, record_attempt):
+        from .services.stats import update_stats
+        record_attempt(students[0], question, True, duration_sec=8)
+        record_attempt(students[1], question, False, duration_sec=50, hints_used=2)
+
+        assert update_stats() == 2
+        assert update_stats() == 0
+
+        record_attempt(students[0], question, True, duration_sec=25)
+        assert update_stats(batch_size=1) == 1
+
+        stats = QuestionStats.objects.get(question=question)
+        assert (stats.attempts, stats.correct, stats.hints_used) == (3, 2, 2)
+        assert sum(stats.duration_histogram) == 3
+        assert 20 <= stats.median_duration_sec <= 30
+        assert LessonStats.objects.get(lesson=lesson).attempts == 3
+        assert Checkpoint.objects.get(name='stats:question-attempts').position == QuestionAttempt.objects.latest('id').id
+
+    def test_recent_attempts_wait_for_the_lag(self, question, students, record_attempt, settings):
+        from .services.stats import update_stats
+        settings.API_CHECKPOINT_LAG_SECONDS = 60
+        now = timezone.now()
+        settled = record_attempt(students[0], question, True, now - timedelta(minutes=5))
+        record_attempt(students[1], question, True)
+        # settled rows behind an unsettled id wait too, so the checkpoint cannot pass it
+        record_attempt(students[2], question, True, now - timedelta(minutes=5))
+
+        assert update_stats() == 1
+        assert Checkpoint.objects.get(name='stats:question-attempts').position == settled.id
+
+        settings.API_CHECKPOINT_LAG_SECONDS = 0
+        assert update_stats() == 2
+        assert QuestionStats.objects.get(question=question).attempts == 3
+
+    def test_calibrated_difficulty_moves_from_prior_toward_evidence(self):
+        from .services.stats import calibrated_difficulty
+        assert calibrated_difficulty(0, 0, prior_difficulty=3, prior_attempts=10) == 3
+        assert calibrated_difficulty(10, 10, prior_difficulty=3, prior_attempts=10) == 2
+        assert calibrated_difficulty(1000, 0, prior_difficulty=3, prior_attempts=10) > 4.9
+
+    def test_recommender_uses_calibrated_difficulty(self, question, students, record_attempt):
+        from .services.recommender import get_recommendation, get_recommendation_batched
+        from .services.stats import update_stats
+        for _ in range(30):
+            record_attempt(students[1], question, False)
+        record_attempt(students[0], question, False)
+        now = timezone.now()
+        before = get_recommendation(students[0], now=now)
+
+        update_stats()
+        after = get_recommendation(students[0], now=now)
+
+        assert after['reason_features']['difficulty_drift'] > before['reason_features']['difficulty_drift']
+        assert get_recommendation_batched(students[0], now=now) == after
+
+
+@pytest.mark.django_db
+class TestTagMastery:
+    @pytest.fixture
+    def catalog(self, student):
+        course = Course.objects.create(name="Course", description="d", difficulty=2)
+        loops = Lesson.objects.create(course=course, title="Loops", tags=["python", "loops"], order_index=1)
+        recursion = Lesson.objects.create(course=course, title="Recursion", tags=["recursion"], order_index=2)
+        question = Question.objects.create(
+            lesson=loops, title="For", content="?", correct_answer=["A"], order_index=1, tags=["syntax"]
+        )
+        return student, question, loops, recursion
+
+    def test_index_maps_tags_both_ways_and_follows_catalog_changes(self, catalog):
+        from .services.tags import get_tag_index
+        student, question, loops, recursion = catalog
+
+        index = get_tag_index()
+        assert index.tags_for_question(question.id) == {"python", "loops", "syntax"}
+        assert index.lessons_for_tag("recursion") == {recursion.id}
+        assert index.questions_for_tag("loops") == {question.id}
+
+        recursion.tags = ["recursion", "python"]
+        recursion.save()
+        assert get_tag_index().lessons_for_tag("python") == {loops.id, recursion.id}
+
+    def test_attempts_update_mastery_incrementally(self, catalog, answer):
+        from .services.tags import get_tag_mastery, rebuild_tag_mastery
+        student, question, loops, recursion = catalog
+
+        assert answer(student, question, True).status_code == 201
+        assert answer(student, question, False).status_code == 201
+        assert get_tag_mastery(student) == {"python": (2, 1), "loops": (2, 1), "syntax": (2, 1)}
+
+        QuestionAttempt.objects.filter(is_correct=False).delete()
+        assert get_tag_mastery(student)["loops"] == (1, 1)
+
+        incremental = get_tag_mastery(student)
+        rebuild_tag_mastery()
+        assert get_tag_mastery(student) == incremental
+
+    def test_long_tags_are_tracked(self, catalog, answer):
+        from .services.tags import get_tag_mastery
+        student, question, loops, recursion = catalog
+        tag = "x" * 200
+        question.tags = [tag]
+        question.save()
+
+        assert answer(student, question, True).status_code == 201
+        assert get_tag_mastery(student)[tag] == (1, 1)
+
+    def test_recommender_scores_real_tag_mastery(self, catalog, answer):
+        from .services.recommender import get_recommendation, get_recommendation_batched
+        student, question, loops, recursion = catalog
+        answer(student, question, True)
+        answer(student, question, False)
+        now = timezone.now()
+
+        result = get_recommendation(student, now=now)
+        gaps = {entry['lesson']: entry['features']['tag_mastery_gap'] for entry in
+                [{'lesson': result['recommendation'], 'features': result['reason_features']}, *result['alternatives']]}
+
+        assert gaps == {"Loops": 0.5, "Recursion": 1.0}
+        assert get_recommendation_batched(student, now=now) == result
+
+
+@pytest.mark.django_db
+class TestReviewScheduler:
+    def test_sm2_intervals_grow_on_success_and_reset_on_lapse(self):
+        from .services.scheduler import apply_review
+        state = ReviewState(student_id=1, question_id=1)
+        now = timezone.now()
+
+        intervals = [apply_review(state, 5, now).interval_days for _ in range(4)]
+        assert intervals[:2] == [1, 6]
+        assert intervals[2] > 6 and intervals[3] > intervals[2]
+
+        for _ in range(100):
+            apply_review(state, 5, now)
+        assert state.interval_days == 36500
+
+        apply_review(state, 1, now)
+        assert (state.repetitions, state.interval_days, state.lapses) == (0, 1, 1)
+        assert state.ease >= 1.3
+        assert state.due_at == now + timedelta(days=1)
+
+    def test_due_endpoint_lists_due_questions_most_overdue_first(self, student, questions, answer):
+        for question in questions:
+            assert answer(student, question, question.order_index != 2).status_code == 201
+        ReviewState.objects.filter(question=questions[0]).update(due_at=timezone.now() - timedelta(days=3))
+        ReviewState.objects.filter(question=questions[1]).update(due_at=timezone.now() - timedelta(days=1))
+
+        url = reverse('student-reviews-due', kwargs={'pk': student.id})
+        response = APIClient().get(url)
+        assert response.status_code == 200
+        assert [item['question'] for item in response.json()] == [questions[0].id, questions[1].id]
+        assert response.json()[0]['lesson_title'] == "Lesson"
+
+        assert len(APIClient().get(url, {'limit': 1}).json()) == 1
+        assert APIClient().get(url, {'limit': 0}).status_code == 400
+        assert APIClient().get(reverse('student-reviews-due', kwargs={'pk': 999})).status_code == 404
+
+    def test_rebuild_replays_history_like_live_updates(self, student, questions, answer):
+        from .services.scheduler import rebuild_review_states
+        for is_correct, hints_used in [(True, 0), (False, 0), (True, 1), (True, 0)]:
+            answer(student, questions[0], is_correct, hints_used)
+        fields = ('question_id', 'repetitions', 'interval_days', 'ease', 'lapses', 'due_at')
+        live = list(ReviewState.objects.values_list(*fields))
+
+        assert rebuild_review_states() == 1
+        assert list(ReviewState.objects.values_list(*fields)) == live
+
+    @pytest.mark.skipif(not connection.features.has_select_for_update, reason="no row locks on this database")
+    def test_reviews_lock_the_state_they_update(self, student, question, answer):
+        from django.test.utils import CaptureQueriesContext
+        answer(student, question)
+        with CaptureQueriesContext(connection) as queries:
+            answer(student, question, is_correct=False)
+        table = ReviewState._meta.db_table
+        assert any(table in query['sql'] and 'FOR UPDATE' in query['sql'] for query in queries)
+        assert ReviewState.objects.get().lapses == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('no_checkpoint_lag')
+class TestCohortAnalytics:
+    def test_incremental_aggregation_matches_rebuild(self, lesson, questions, students, record_attempt):
+        from .models import ActivityRollup, LessonFunnel
+        from .services.rollups import aggregate_rollups, rebuild_rollups
+        (q1, q2), (s1, s2, s3) = questions, students
+        now = timezone.now()
+
+        record_attempt(s1, q1, True, now - timedelta(days=1))
+        record_attempt(s2, q1, False, now - timedelta(days=1), hints_used=2)
+        assert aggregate_rollups(batch_size=1) == 2
+        assert aggregate_rollups() == 0
+
+        record_attempt(s1, q2, True, now)
+        record_attempt(s2, q2, False, now)
+        record_attempt(s3, q1, True, now)
+        assert aggregate_rollups() == 3
+
+        fields = ('granularity', 'bucket', 'attempts', 'correct', 'hints_used', 'points_earned', 'duration_sec')
+        incremental = sorted(ActivityRollup.objects.values_list(*fields))
+        funnel = LessonFunnel.objects.values_list('started', 'attempted_all', 'completed').get(lesson=lesson)
+        assert funnel == (3, 2, 1)
+        assert sum(row[2] for row in incremental if row[0] == 'day') == 5
+
+        assert rebuild_rollups() == 5
+        assert sorted(ActivityRollup.objects.values_list(*fields)) == incremental
+        assert LessonFunnel.objects.values_list('started', 'attempted_all', 'completed').get(lesson=lesson) == funnel
+
+    def test_analytics_endpoints_read_rollups(self, lesson, questions, students, record_attempt):
+        from .services.rollups import aggregate_rollups
+        course, (q1, q2), (s1, s2, _) = lesson.course, questions, students
+        now = timezone.now()
+        record_attempt(s1, q1, True, now - timedelta(days=2))
+        record_attempt(s1, q2, True, now)
+        record_attempt(s2, q1, False, now, hints_used=1)
+        record_attempt(s1, q1, True, now - timedelta(days=60))
+        aggregate_rollups()
+
+        response = APIClient().get(reverse('course-analytics', kwargs={'pk': course.id}), {'days': 7})
+        assert response.status_code == 200
+        data = response.json()
+        assert data['funnel'] == [{
+            'lesson_id': lesson.id, 'title': "Lesson", 'order_index': 1,
+            'started': 2, 'attempted_all': 1, 'completed': 1,
+        }]
+        assert [point['attempts'] for point in data['activity']] == [1, 2]
+        assert data['activity'][-1]['correct_rate'] == 0.5
+        assert data['summary']['attempts'] == 3
+
+        hourly = APIClient().get(
+            reverse('lesson-analytics', kwargs={'lesson_id': lesson.id}), {'granularity': 'hour', 'days': 1}
+        ).json()
+        assert hourly['summary']['attempts'] == 2
+        assert hourly['funnel']['started'] == 2
+
+        assert APIClient().get(reverse('course-analytics', kwargs={'pk': course.id}), {'days': 0}).status_code == 400
+        assert APIClient().get(
+            reverse('lesson-analytics', kwargs={'lesson_id': lesson.id}), {'granularity': 'week'}
+        ).status_code == 400
+        assert APIClient().get(reverse('course-analytics', kwargs={'pk': 999})).status_code == 404
+
+
+@pytest.mark.django_db
+class TestUpsert:
+    @pytest.mark.parametrize('vendor', ['native', 'other'])
+    def test_increments_replaces_or_ignores_conflicting_rows(self, students, questions, vendor, monkeypatch):
+        from .models import LeaderboardEntry, TagMastery
+        from .services.upsert import upsert
+        if vendor == 'other':
+            monkeypatch.setattr(connection, 'vendor', 'other')
+        s1, s2, _ = students
+        earlier, later = timezone.now() - timedelta(hours=1), timezone.now()
+
+        upsert(TagMastery, [dict(student_id=s1.id, tag="loops", attempts=1, correct=1)],
+               conflict=('student_id', 'tag'), increment=('attempts', 'correct'))
+        upsert(TagMastery, [dict(student_id=s1.id, tag=tag, attempts=2, correct=0) for tag in ("loops", "io")],
+               conflict=('student_id', 'tag'), increment=('attempts', 'correct'), batch_size=1)
+        assert sorted(TagMastery.objects.values_list('tag', 'attempts', 'correct')) == [("io", 2, 0), ("loops", 3, 1)]
+
+        for when in (earlier, later):
+            upsert(LeaderboardEntry, [dict(board="global", student_id=s2.id, points=5, updated_at=when)],
+                   conflict=('board', 'student_id'), increment=('points',), replace=('updated_at',))
+        assert LeaderboardEntry.objects.values_list('points', 'updated_at').get() == (10, later)
+
+        reveal = dict(student_id=s1.id, question_id=questions[0].id, hint_id=Hint.objects.create(
+            question=questions[0], content="h", order_index=1).id, revealed_at=later)
+        upsert(HintReveal, [reveal, reveal], conflict=('student_id', 'hint_id'))
+        assert HintReveal.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestLeaderboard:
+    @pytest.fixture
+    def catalog(self, students):
+        courses = [Course.objects.create(name=f"C{i}", description="d", difficulty=2) for i in range(2)]
+        questions = [
+            Question.objects.create(
+                lesson=Lesson.objects.create(course=course, title="L", tags=[], order_index=1),
+                title="Q", content="?", correct_answer=["A"], order_index=1, points=10,
+            )
+            for course in courses
+        ]
+        return courses, questions, students
+
+    def test_order_statistic_tree_matches_sorted_list(self):
+        import random
+        from .services.leaderboard import OrderStatisticTree
+        rng = random.Random(7)
+        tree, reference = OrderStatisticTree(seed=1), []
+        for _ in range(500):
+            key = (rng.randrange(-50, 0), rng.randrange(1000))
+            if key in reference:
+                tree.remove(key)
+                reference.remove(key)
+            else:
+                tree.insert(key)
+                reference.append(key)
+        reference.sort()
+
+        assert len(tree) == len(reference)
+        assert tree.first(20) == reference[:20]
+        for key in reference[::17]:
+            assert tree.rank(key) == reference.index(key)
+
+    def test_boards_follow_attempts_and_share_ranks_on_ties(self, catalog, django_capture_on_commit_callbacks, answer):
+        (c1, c2), (q1, q2), (s1, s2, s3) = catalog
+        with django_capture_on_commit_callbacks(execute=True):
+            answer(s1, q1)
+            answer(s1, q2)
+            answer(s2, q1)
+            answer(s3, q2, is_correct=False)
+
+        data = APIClient().get(reverse('leaderboard'), {'student': s2.id}).json()
+        assert [(e['rank'], e['name'], e['points']) for e in data['entries']] == [(1, "S0", 20), (2, "S1", 10), (3, "S2", 0)]
+        assert data['me'] == {'student': s2.id, 'rank': 2, 'points': 10}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            answer(s2, q1)
+        course = APIClient().get(reverse('course-leaderboard', kwargs={'pk': c1.id}), {'student': s1.id}).json()
+        assert [(e['rank'], e['points']) for e in course['entries']] == [(1, 20), (2, 10)]
+        assert course['me']['rank'] == 2
+
+        tied = APIClient().get(reverse('leaderboard'), {'limit': 2}).json()
+        assert [(e['rank'], e['points']) for e in tied['entries']] == [(1, 20), (1, 20)]
+        assert tied['me'] is None
+        assert APIClient().get(reverse('leaderboard'), {'limit': 0}).status_code == 400
+        assert APIClient().get(reverse('course-leaderboard', kwargs={'pk': 999})).status_code == 404
+
+    def test_reconcile_repairs_drift_and_reloads_workers(self, catalog, django_capture_on_commit_callbacks, answer):
+        from .models import LeaderboardEntry
+        from .services.leaderboard import GLOBAL, get_board, reconcile_leaderboards
+        _, (q1, _), (s1, s2, _) = catalog
+        with django_capture_on_commit_callbacks(execute=True):
+            answer(s1, q1)
+        assert get_board(GLOBAL).rank_of(s1.id) == (1, 10)
+        assert reconcile_leaderboards() == 0
+
+        LeaderboardEntry.objects.filter(student=s1).update(points=999)
+        QuestionAttempt.objects.bulk_create([
+            QuestionAttempt(student=s2, question=q1, answer=["A"], is_correct=True, points_earned=30, duration_sec=5)
+        ])
+        assert reconcile_leaderboards() == 4
+        board = get_board(GLOBAL)
+        assert board.top(2) == [(1, s2.id, 30), (2, s1.id, 10)]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_reads_wait_for_writes_to_the_tree(self, catalog, answer):
+        import threading
+        from .services import leaderboard
+        _, (q1, _), (s1, _, _) = catalog
+        answer(s1, q1)
+        leaderboard.get_board(leaderboard.GLOBAL)
+        results = []
+
+        with leaderboard._boards_lock:
+            reader = threading.Thread(target=lambda: results.append(leaderboard.leaderboard(leaderboard.GLOBAL)))
+            reader.start()
+            reader.join(0.1)
+            assert reader.is_alive() and not results
+        reader.join()
+        assert results[0]['entries'][0]['student'] == s1.id
+
+
+@pytest.mark.django_db
+class TestWriteBehind:
+    @pytest.fixture
+    def write_behind(self, settings, tmp_path):
+        settings.API_WRITE_BEHIND = True
+        settings.API_WRITE_BEHIND_JOURNAL = tmp_path / "journal"
+        settings.API_WRITE_BEHIND_FSYNC = False
+        return tmp_path / "journal"
+
+    def test_submissions_are_acknowledged_then_flushed_in_a_batch(self, write_behind, catalog, query_budget, answer):
+        from .models import TagMastery
+        from .services.ingest import flush
+        student, _, question = catalog
+
+        with query_budget(3):  # validation and points only, no write
+            response = answer(student, question)
+        assert response.status_code == 202
+        assert response.json()['id'] is None and response.json()['points_earned'] == 10
+        answer(student, question)
+        assert not QuestionAttempt.objects.exists()
+
+        assert flush() == 2
+        assert flush() == 0
+        attempts = list(QuestionAttempt.objects.all())
+        assert len(attempts) == 2 and attempts[0].timestamp < attempts[1].timestamp
+        assert TagMastery.objects.get(student=student, tag="loops").attempts == 2
+
+    def test_reads_wait_for_the_flusher(self, write_behind, catalog, answer, settings, monkeypatch):
+        from .services import ingest
+        student, _, question = catalog
+        answer(student, question)
+        url = reverse('student-question-attempts', kwargs={'pk': student.id})
+
+        # The flusher commits while the read waits; the read does not flush itself
+        waits = []
+
+        def flusher_runs(seconds):
+            waits.append(seconds)
+            ingest.flush()
+        monkeypatch.setattr(ingest.time, 'sleep', flusher_runs)
+        assert len(APIClient().get(url).json()) == 1
+        assert len(waits) == 1
+        monkeypatch.undo()
+
+        # Without a flusher the read gives up after API_WRITE_BEHIND_READ_WAIT
+        settings.API_WRITE_BEHIND_READ_WAIT = 0.05
+        answer(student, question)
+        assert len(APIClient().get(url).json()) == 1
+        async_view = async_to_sync(AsyncStudentQuestionAttempts.as_view())
+        assert len(json.loads(async_view(RequestFactory().get('/'), pk=student.id).content)) == 1
+        assert ingest.flush() == 1
+        assert len(APIClient().get(url).json()) == 2
+
+    def test_recovers_from_torn_records_and_resumes_after_rotation(self, write_behind, catalog, settings, answer):
+        from .services.ingest import CHECKPOINT, flush, get_journal, split_position
+        student, _, question = catalog
+        journal = get_journal()
+        answer(student, question)
+        with open(journal.segment_path(0), "ab") as segment:
+            segment.write(b'{"student_id": 1, "quest')  # crash in the middle of an append
+        answer(student, question)
+
+        settings.API_WRITE_BEHIND_SEGMENT_BYTES = 1
+        assert flush() == 2
+        answer(student, question)
+        assert flush() == 1
+        assert QuestionAttempt.objects.count() == 3
+        assert split_position(Checkpoint.objects.get(name=CHECKPOINT).position)[0] == 1
+        assert [path.name for path in sorted(write_behind.glob("*.jsonl"))] == ["00000001.jsonl"]
+
+    def test_a_key_stored_concurrently_is_neither_inserted_nor_counted_twice(self, write_behind, catalog, monkeypatch):
+        from .models import TagMastery
+        from .services import ingest
+        student, _, question = catalog
+        for key in ("k1", "k2"):
+            APIClient().post(reverse('question-attempt-create'), {
+                'student': student.id, 'question': question.id, 'answer': ['A'], 'hints_used': 0,
+                'duration_sec': 20, 'idempotency_key': key,
+            }, format='json')
+        QuestionAttempt.objects.create(
+            student=student, question=question, answer=['A'], is_correct=True, duration_sec=5, idempotency_key="k1"
+        )
+
+        # The synchronous path stored "k1" just after the flush looked the keys up
+        stored_keys, lookups = ingest._stored_keys, []
+
+        def racing_stored_keys(keys):
+            lookups.append(keys)
+            return set() if len(lookups) == 1 else stored_keys(keys)
+        monkeypatch.setattr(ingest, '_stored_keys', racing_stored_keys)
+
+        assert ingest.flush() == 2
+        assert len(lookups) == 2
+        assert sorted(QuestionAttempt.objects.values_list('idempotency_key', flat=True)) == ["k1", "k2"]
+        # The stored "k1" counted once through its signals, the flush adds "k2" only
+        assert TagMastery.objects.get(student=student, tag="loops").attempts == 2
+
+    def test_other_integrity_errors_fail_the_flush_instead_of_retrying(self, write_behind, catalog, monkeypatch):
+        from django.db import IntegrityError
+        from .services.ingest import CHECKPOINT, flush
+        student, _, question = catalog
+        body = {'student': student.id, 'question': question.id, 'answer': ['A'], 'hints_used': 0,
+                'duration_sec': 20, 'idempotency_key': "k1"}
+        APIClient().post(reverse('question-attempt-create'), body, format='json')
+
+        calls = []
+
+        def failing_bulk_create(objs, *args, **kwargs):
+            calls.append(objs)
+            raise IntegrityError("NOT NULL constraint failed")
+        monkeypatch.setattr(QuestionAttempt.objects, 'bulk_create', failing_bulk_create)
+
+        with pytest.raises(IntegrityError):
+            flush()
+        assert len(calls) == 1
+        # The record stays in the journal for the next flush
+        assert not Checkpoint.objects.filter(name=CHECKPOINT, position__gt=0).exists()
+        monkeypatch.undo()
+        assert flush() == 1
+
+
+@pytest.mark.django_db
+class TestIdempotentSubmissions:
+    def test_retries_replay_the_first_response(self, catalog, query_budget, answer):
+        from .services.idempotency import recent_keys
+        student, lesson, question = catalog
+        first = answer(student, question, key="k-1")
+        assert first.status_code == 201
+
+        with query_budget(2):  # validation only: the worker remembers the key
+            retry = answer(student, question, key="k-1")
+        assert retry.status_code == 200 and retry['Idempotent-Replayed'] == 'true'
+        assert retry.json() == first.json()
+
+        recent_keys.clear()  # e.g. a retry landing on another worker
+        assert answer(student, question, key="k-1").json()['id'] == first.json()['id']
+        assert QuestionAttempt.objects.count() == 1
+        assert answer(student, question, key="k-2").status_code == 201
+        assert QuestionAttempt.objects.count() == 2
+
+        body = {'student': student.id, 'lesson': lesson.id, 'correctness': 0.5, 'hints_used': 0,
+                'duration_sec': 30, 'idempotency_key': "lesson-1"}
+        assert APIClient().post(reverse('attempt-create'), body, format='json').status_code == 201
+        assert APIClient().post(reverse('attempt-create'), body, format='json').status_code == 200
+        assert Attempt.objects.count() == 1
+
+    def test_reusing_a_key_for_another_submission_is_rejected(self, catalog, answer):
+        from .services.idempotency import recent_keys
+        student, _, question = catalog
+        answer(student, question, key="k-1")
+        assert answer(student, question, False, key="k-1").status_code == 422
+        recent_keys.clear()
+        assert answer(student, question, False, key="k-1").status_code == 422
+        assert answer(student, question, key="x" * 65).status_code == 400
+
+    def test_write_behind_flusher_drops_duplicates(self, catalog, settings, tmp_path, answer):
+        from .services.idempotency import recent_keys
+        from .services.ingest import flush
+        settings.API_WRITE_BEHIND = True
+        settings.API_WRITE_BEHIND_JOURNAL = tmp_path / "journal"
+        settings.API_WRITE_BEHIND_FSYNC = False
+        student, _, question = catalog
+
+        assert answer(student, question, key="k-1").status_code == 202
+        assert answer(student, question, key="k-1").status_code == 200
+        recent_keys.clear()
+        assert answer(student, question, key="k-1").status_code == 202
+        assert flush() == 2
+        assert QuestionAttempt.objects.get().idempotency_key == "k-1"
+
+
+@pytest.mark.django_db
+class TestJobQueue:
+    @pytest.fixture
+    def calls(self):
+        from .services import jobs
+        calls = []
+
+        def record(fail=False):
+            calls.append(fail)
+            if fail:
+                raise RuntimeError("boom")
+
+        jobs.JOBS["record"] = record
+        yield calls
+        del jobs.JOBS["record"]
+
+    def test_dedupe_key_returns_the_pending_job(self, calls):
+        from .services.jobs import enqueue, work
+        first = enqueue("record", dedupe_key="nightly")
+        assert enqueue("record", dedupe_key="nightly").id == first.id
+        assert enqueue("record").id != first.id
+        with pytest.raises(ValueError):
+            enqueue("no-such-job")
+
+        assert work("w1", burst=True) == 2
+        assert calls == [False, False]
+        assert set(Job.objects.values_list('status', flat=True)) == {Job.DONE}
+        assert enqueue("record", dedupe_key="nightly").id != first.id  # Finished jobs free the key
+
+    def test_failed_jobs_retry_with_backoff_then_fail(self, calls):
+        from .services.jobs import claim, enqueue, run
+        queued = enqueue("record", {"fail": True}, max_attempts=2)
+        assert run(claim("w1")[0]) is False
+        queued.refresh_from_db()
+        assert queued.status == Job.QUEUED and queued.attempts == 1 and queued.run_at > timezone.now()
+        assert claim("w1") == []  # Not due until the backoff passed
+
+        Job.objects.update(run_at=timezone.now())
+        run(claim("w1")[0])
+        queued.refresh_from_db()
+        assert queued.status == Job.FAILED and queued.attempts == 2 and "boom" in queued.last_error
+
+    def test_claims_are_exclusive_and_stale_jobs_are_requeued(self, calls):
+        from .services.jobs import claim, enqueue, recover_stale
+        enqueue("record")
+        claimed = claim("w1", limit=5)
+        assert len(claimed) == 1 and claimed[0].locked_by == "w1"
+        assert claim("w2") == []
+
+        assert recover_stale(timeout=60) == (0, 0)
+        Job.objects.update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+        assert recover_stale(timeout=60) == (1, 0)
+        assert claim("w2")[0].locked_by == "w2"
+
+    def test_stale_jobs_fail_once_out_of_attempts(self, calls):
+        from .services.jobs import claim, enqueue, recover_stale
+        stale = enqueue("record", max_attempts=2)
+        for expected in [(1, 0), (0, 1)]:
+            # The worker dies mid-job each time
+            claim("w1")
+            Job.objects.update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+            assert recover_stale(timeout=60) == expected
+
+        stale.refresh_from_db()
+        assert stale.status == Job.FAILED and stale.attempts == 2 and "Worker lost" in stale.last_error
+        assert claim("w1") == []
+
+    def test_long_jobs_keep_their_heartbeat(self, calls):
+        from .services.jobs import claim, enqueue, recover_stale
+        enqueue("record")
+        claim("w1")
+        Job.objects.update(started_at=timezone.now() - timedelta(hours=1))
+        assert recover_stale(timeout=60) == (0, 0)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_running_jobs_send_heartbeats(self, monkeypatch):
+        from .services import jobs
+        monkeypatch.setattr(jobs, "HEARTBEAT_SECONDS", 0.01)
+        monkeypatch.setitem(jobs.JOBS, "slow", lambda: time.sleep(0.2))
+        jobs.enqueue("slow")
+        claimed = jobs.claim("w1")[0]
+
+        assert jobs.run(claimed)
+        finished = Job.objects.get()
+        assert finished.heartbeat_at > claimed.heartbeat_at
+
+    def test_queue_metrics(self, calls):
+        from .services.jobs import enqueue
+        enqueue("record")
+        enqueue("record", run_at=timezone.now() - timedelta(seconds=30))
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            body = APIClient().get('/metrics').content.decode()
+        assert sum('"api_job"' in query['sql'] for query in queries) == 1
+        assert 'api_jobs{job="record",status="queued"} 2' in body
+        lag = next(line for line in body.splitlines() if line.startswith('api_job_queue_lag_seconds{job="record"}'))
+        assert float(lag.split()[-1]) >= 30
+
+
+@pytest.mark.django_db
+class TestHintReveal:
+    @pytest.fixture
+    def catalog(self, catalog):
+        _, _, question = catalog
+        for n in (1, 2, 3):
+            Hint.objects.create(question=question, content=f"Hint {n}", order_index=n, penalty_points=n)
+        return catalog
+
+    def reveal(self, student, question, number):
+        return APIClient().post(
+            reverse('question-hint', kwargs={'pk': question.id, 'number': number}), {'student': student.id},
+            format='json'
+        )
+
+    def test_hints_are_revealed_in_order(self, catalog, query_budget):
+        student, _, question = catalog
+        assert self.reveal(student, question, 2).status_code == 409
+
+        first = self.reveal(student, question, 1)
+        assert first.status_code == 200
+        assert first.json() == {
+            "question": question.id, "hint": 1, "content": "Hint 1", "penalty_points": 1,
+            "hints_revealed": 1, "hint_count": 3,
+        }
+        with query_budget(3):  # Hint list served from the cache
+            assert self.reveal(student, question, 2).json()['hints_revealed'] == 2
+        assert self.reveal(student, question, 1).json()['hints_revealed'] == 2  # Already revealed
+        assert HintReveal.objects.count() == 2
+
+        assert self.reveal(student, question, 4).status_code == 404
+        missing = APIClient().post(reverse('question-hint', kwargs={'pk': 999, 'number': 1}), {'student': student.id})
+        assert missing.json() == {"error": "Question not found"}
+
+    def test_attempts_are_charged_for_revealed_hints(self, catalog, answer):
+        student, _, question = catalog
+        self.reveal(student, question, 1)
+        self.reveal(student, question, 2)
+
+        response = answer(student, question)
+        assert response.json()['hints_used'] == 2
+        assert response.json()['points_earned'] == 10 - 1 - 2
+        assert not HintReveal.objects.exists()  # The next attempt starts with no hints
+
+        # Clients that show hints themselves still report them
+        response = answer(student, question, hints_used=1)
+        assert response.json()['points_earned'] == 9
+
+    def test_questions_can_leave_hints_out(self, catalog):
+        _, lesson, question = catalog
+        # Existing clients keep getting every hint
+        full = APIClient().get(reverse('question-detail', kwargs={'pk': question.id})).json()
+        assert len(full['hints']) == 3
+        assert len(APIClient().get(reverse('lesson-questions', kwargs={'lesson_id': lesson.id})).json()
+                   ['questions'][0]['hints']) == 3
+
+        lean = APIClient().get(reverse('question-detail', kwargs={'pk': question.id}), {'hints': 'count'}).json()
+        assert 'hints' not in lean and lean['hint_count'] == 3
+        listed = APIClient().get(reverse('question-list'), {'hints': 'count'}).json()
+        assert 'hints' not in listed[0] and listed[0]['hint_count'] == 3
+        lesson_questions = APIClient().get(
+            reverse('lesson-questions', kwargs={'lesson_id': lesson.id}), {'hints': 'count'}
+        ).json()
+        assert 'hints' not in lesson_questions['questions'][0]
+        assert lesson_questions['questions'][0]['hint_count'] == 3
+
+        async_view = async_to_sync(AsyncLessonQuestions.as_view())
+        response = async_view(RequestFactory().get('/', {'hints': 'count'}), lesson_id=lesson.id)
+        assert json.loads(response.content)['questions'][0]['hint_count'] == 3
+
+
+@pytest.mark.django_db
+class TestGrading:
+    def question(self, lesson, question_type, correct_answer):
+        return Question.objects.create(
+            lesson=lesson, title="Q", content="?", question_type=question_type, correct_answer=correct_answer,
+            order_index=1, points=10
+        )
+
+    def test_matchers(self, lesson):
+        from .services.grading import grade
+        mcq = self.question(lesson, 'mcq', ["A", "C"])
+        assert grade(mcq, ["c", "A) Paris"]) is True
+        assert grade(mcq, ["A"]) is False
+        assert grade(mcq, ["A", "B", "C"]) is False
+
+        text = self.question(lesson, 'text', ["Mount Everest", {"regex": r"(mt\.?|mount) everest"}, {"regex": "("}])
+        assert grade(text, ["  mount   EVEREST "]) is True
+        assert grade(text, "Mt. Everest") is True
+        assert grade(text, ["K2"]) is False
+
+        coding = self.question(lesson, 'coding', [{"test_cases": []}])
+        assert grade(coding, ["def f(): pass"]) is None
+
+    def test_attempts_are_graded_on_the_server(self, lesson, student, query_budget):
+        question = self.question(lesson, 'mcq', ["B"])
+        client = APIClient()
+
+        def submit(question, answer, **extra):
+            return client.post(reverse('question-attempt-create'), {
+                'student': student.id, 'question': question.id, 'answer': answer, 'duration_sec': 20, **extra
+            }, format='json')
+
+        response = submit(question, ["A"], is_correct=True)
+        assert response.status_code == 201
+        assert response.json()['is_correct'] is False and response.json()['points_earned'] == 0
+        with query_budget(7):  # The matcher is compiled once per catalog version
+            assert submit(question, ["B"]).json()['is_correct'] is True
+
+        question.correct_answer = ["A"]
+        question.save()
+        assert submit(question, ["A"]).json()['is_correct'] is True
+
+        coding = self.question(lesson, 'coding', [{"test_cases": []}])
+        assert submit(coding, ["code"]).status_code == 400
+        assert submit(coding, ["code"], is_correct=True).json()['is_correct'] is True
+
+
+@pytest.mark.django_db
+class TestFuzzyGrading:
+    @pytest.fixture
+    def lesson(self):
+        course = Course.objects.create(name="Course", description="d", difficulty=2)
+        return Lesson.objects.create(course=course, title="Lesson", tags=[], order_index=1)
+
+    def test_bounded_edit_distance(self):
+        import random
+        from .services.grading import within_edits
+
+        def distance(a, b):
+            previous = list(range(len(b) + 1))
+            for i, char in enumerate(a, 1):
+                current = [i]
+                for j, other in enumerate(b, 1):
+                    current.append(min(previous[j] + 1, current[-1] + 1, previous[j - 1] + (char != other)))
+                previous = current
+            return previous[-1]
+
+        rng = random.Random(7)
+        for _ in range(2000):
+            a, b = ("".join(rng.choice("abc") for _ in range(rng.randint(0, 7))) for _ in range(2))
+            limit = rng.randint(0, 3)
+            assert within_edits(a, b, limit) == (distance(a, b) <= limit), (a, b, limit)
+
+    def test_text_answers_tolerate_typos(self, lesson):
+        from .services.grading import grade
+        accepted = ["photosynthesis", "the mitochondria", "Pi", "version 3.11"] + [f"variant {n}" for n in range(200)]
+        question = Question.objects.create(
+            lesson=lesson, title="Q", content="?", question_type='text', correct_answer=accepted, order_index=1
+        )
+        assert grade(question, ["Photosynthesis!"]) is True
+        assert grade(question, ["photosynthsis"]) is True  # One typo
+        assert grade(question, ["fotosynthesis"]) is True  # Two typos in a long answer
+        assert grade(question, ["fotosinthesis"]) is False  # Three
+        assert grade(question, ["the mitocondria"]) is True
+        assert grade(question, ["Po"]) is False  # Short answers must be exact
+        assert grade(question, ["version 3.12"]) is False  # Numbers must be exact
+        assert grade(question, ["varaint 42"]) is True
+
+    def test_operators_and_brackets_are_not_typos(self):
+        from .services.grading import TextMatcher
+        assert TextMatcher(["x = 5"])(["X = 5."]) is True
+        assert TextMatcher(["x = 5"])(["x == 5"]) is False
+        assert TextMatcher(["x = 5"])(["x != 5"]) is False
+        assert TextMatcher(["a < b"])(["a > b"]) is False
+        assert TextMatcher(["i++"])(["i--"]) is False
+        assert TextMatcher(["i++"])(["i"]) is False
+        assert TextMatcher(["<div>"])(["</div>"]) is False
+        assert TextMatcher(["len(x)"])(["len x"]) is False
+        assert TextMatcher(["print(name)"])(["prnt(name)"]) is True  # A typo in a word still passes
+
+    def test_regrading_fixes_attempts_and_rebuilds_derived_data(self, lesson):
+        from django.core.management import call_command
+        from .models import LeaderboardEntry
+        student = Student.objects.create(name="S", email="s@example.com")
+        question = Question.objects.create(
+            lesson=lesson, title="Q", content="?", question_type='text', correct_answer=["Paris"], order_index=1,
+            points=10
+        )
+        Hint.objects.create(question=question, content="h", order_index=1, penalty_points=3)
+        attempt = QuestionAttempt.objects.create(
+            student=student, question=question, answer=["Lyon"], is_correct=False, hints_used=1, duration_sec=10
+        )
+
+        question.correct_answer = ["Paris", "Lyon"]  # The answer key was incomplete
+        question.save()
+        out = io.StringIO()
+        call_command('regrade_attempts', stdout=out)
+        assert "1 changed" in out.getvalue()
+        attempt.refresh_from_db()
+        assert attempt.is_correct and attempt.points_earned == 7
+        assert LeaderboardEntry.objects.get(board="global", student=student).points == 7
+
+        call_command('regrade_attempts', '--enqueue', stdout=io.StringIO())
+        assert Job.objects.get().name == "regrade_attempts"
+
+
+@pytest.mark.django_db
+class TestSearch:
+    @pytest.fixture
+    def catalog(self):
+        course = Course.objects.create(name="Python Basics", description="Learn recursion and loops", difficulty=2)
+        other = Course.objects.create(name="Databases", description="Indexes and joins", difficulty=3)
+        lesson = Lesson.objects.create(course=course, title="Recursion", tags=["python", "functions"], order_index=1)
+        question = Question.objects.create(
+            lesson=lesson, title="Recursive factorial", content="Write factorial using recursion",
+            correct_answer=["A"], order_index=1, tags=["python", "recursion"]
+        )
+        Hint.objects.create(question=question, content="Think about the base case of the recursion", order_index=1)
+        sql = Lesson.objects.create(course=other, title="Recursive queries", tags=["sql"], order_index=1)
+        return course, other, lesson, question, sql
+
+    def search(self, **params):
+        response = APIClient().get(reverse('search'), params)
+        assert response.status_code == 200, response.content
+        return [(result['type'], result['id']) for result in response.json()['results']]
+
+    def test_prefix_terms_match_and_title_matches_rank_first(self, catalog, query_budget):
+        course, other, lesson, question, sql = catalog
+        with query_budget(1):
+            results = self.search(q="recur")
+        assert set(results) == {
+            ('course', course.id), ('lesson', lesson.id), ('lesson', sql.id), ('question', question.id),
+            ('hint', question.hints.get().id),
+        }
+        # Title matches (both lessons and the question) outrank body-only ones
+        assert {result[0] for result in results[:3]} == {'lesson', 'question'}
+        assert self.search(q="recursive fact") == [('question', question.id)]
+        assert self.search(q="nothing like this") == []
+
+    def test_filters_by_type_course_and_tags(self, catalog):
+        course, other, lesson, question, sql = catalog
+        assert set(self.search(q="recur", type="lesson")) == {('lesson', lesson.id), ('lesson', sql.id)}
+        assert set(self.search(q="recur", type="course,hint")) == {
+            ('course', course.id), ('hint', question.hints.get().id)
+        }
+        assert ('lesson', sql.id) not in self.search(q="recur", course=course.id)
+        assert self.search(q="recur", tags="python,recursion") == [('question', question.id)]
+        assert set(self.search(tags="python")) == {('lesson', lesson.id), ('question', question.id)}
+
+    def test_index_follows_saves_and_deletes(self, catalog):
+        course, other, lesson, question, sql = catalog
+        question.title = "Iterative fibonacci"
+        question.save()
+        assert ('question', question.id) in self.search(q="fibonacci")
+        assert self.search(q="recursive fact") == []
+
+        lesson.course = other
+        lesson.save()
+        assert ('question', question.id) in self.search(q="fibonacci", course=other.id)
+
+        question.delete()
+        assert self.search(q="fibonacci") == []
+        assert self.search(q="base case") == []  # Its hint went with it
+
+    def test_rebuild_indexes_bulk_loaded_rows(self, catalog):
+        from django.core.management import call_command
+        course, other, lesson, question, sql = catalog
+        Question.objects.bulk_create([
+            Question(lesson=lesson, title=f"Bulk {n}", content="memoization", correct_answer=["A"], order_index=n)
+            for n in range(2, 5)
+        ])
+        assert self.search(q="memo") == []
+
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        assert "Indexed 9 documents" in out.getvalue()
+        assert len(self.search(q="memo")) == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_migration_indexes_the_existing_catalog(self):
+        from django.db.migrations.executor import MigrationExecutor
+        executor = MigrationExecutor(connection)
+        latest = executor.loader.graph.leaf_nodes('api')
+        executor.migrate([('api', '0012_hintreveal')])
+        try:
+            apps = executor.loader.project_state([('api', '0012_hintreveal')]).apps
+            course = apps.get_model('api', 'Course').objects.create(name="Recursion", description="d", difficulty=1)
+            apps.get_model('api', 'Lesson').objects.create(course=course, title="Base cases", tags=[], order_index=1)
+        finally:
+            MigrationExecutor(connection).migrate(latest)
+        assert self.search(q="recur") == [('course', course.id)]
+        assert len(self.search(q="base")) == 1
+
+    def test_rejects_bad_parameters(self, catalog):
+        client = APIClient()
+        assert client.get(reverse('search')).status_code == 400
+        assert client.get(reverse('search'), {'q': 'x', 'type': 'student'}).status_code == 400
+        assert client.get(reverse('search'), {'q': 'x', 'limit': 0}).status_code == 400
+
+
+@pytest.mark.django_db
+class TestCompression:
+    @pytest.fixture
+    def lesson(self, lesson):
+        for n in range(30):
+            Question.objects.create(
+                lesson=lesson, title=f"Question {n}", content="Which option is right?" * 3, correct_answer=["A"],
+                order_index=n
+            )
+        return lesson
+
+    def test_large_responses_are_gzipped_when_accepted(self, lesson):
+        import gzip
+        client = APIClient()
+        plain = client.get(reverse('question-list'))
+        assert 'Content-Encoding' not in plain.headers
+        assert plain.headers['Vary'].endswith('Accept-Encoding')
+
+        response = client.get(reverse('question-list'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert int(response.headers['Content-Length']) == len(response.content) < len(plain.content) / 4
+        assert gzip.decompress(response.content) == plain.content
+        assert response.headers['ETag'] == f"W/{plain.headers['ETag']}"
+        # The weak tag still revalidates
+        assert client.get(
+            reverse('question-list'), HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response.headers['ETag']
+        ).status_code == 304
+
+    def test_small_or_refused_responses_are_left_alone(self, lesson, settings):
+        client = APIClient()
+        url = reverse('question-list')
+        assert 'Content-Encoding' not in client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity').headers
+        assert 'Content-Encoding' not in client.get(url, HTTP_ACCEPT_ENCODING='compress').headers
+        settings.API_COMPRESSION_MIN_BYTES = 10 ** 6
+        assert 'Content-Encoding' not in client.get(url, HTTP_ACCEPT_ENCODING='gzip').headers
+
+    def test_catalog_payloads_are_compressed_once_per_version(self, lesson, monkeypatch):
+        from . import middleware
+        compressed = []
+        compress = middleware.GzipEncoder.compress
+        monkeypatch.setattr(middleware.GzipEncoder, 'compress', staticmethod(
+            lambda data, best=False: compressed.append(best) or compress(data, best)
+        ))
+        client = APIClient()
+        for _ in range(3):
+            client.get(reverse('question-list'), HTTP_ACCEPT_ENCODING='gzip')
+        assert compressed == [True]
+
+        Question.objects.filter(lesson=lesson).first().save()  # New catalog version
+        client.get(reverse('question-list'), HTTP_ACCEPT_ENCODING='gzip')
+        client.get(reverse('question-list'), {'hints': 'count'}, HTTP_ACCEPT_ENCODING='gzip')
+        assert compressed == [True, True, True]
+
+        # Student-specific payloads change with every answer and are not cached
+        student = Student.objects.create(name="S", email="s@example.com")
+        for _ in range(2):
+            client.get(reverse('lesson-questions', kwargs={'lesson_id': lesson.id}), {'student': student.id},
+                       HTTP_ACCEPT_ENCODING='gzip')
+        assert compressed == [True, True, True, False, False]
+
+    def test_streamed_chunks_are_compressed_as_they_come(self):
+        import zlib
+        from django.http import StreamingHttpResponse
+        from .middleware import CompressionMiddleware
+        events = [f"data: {n}\n\n".encode() * 200 for n in range(3)]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(events), content_type='text/event-stream')
+        )
+        response = middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        assert response.headers['Content-Encoding'] == 'gzip'
+
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        received = [decompressor.decompress(chunk) for chunk in response.streaming_content]
+        # Every event can be decoded on arrival, before the stream ends
+        assert received[:3] == events and b"".join(received) == b"".join(events)
+
+    def test_async_stack_compresses(self, lesson):
+        import gzip
+        from django.test import AsyncClient
+        plain = APIClient().get(reverse('question-list'))
+
+        response = async_to_sync(AsyncClient().get)(reverse('question-list'), headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.content) == plain.content
+
+    def test_every_middleware_runs_async_under_asgi(self, settings):
+        from django.utils.module_loading import import_string
+        # One sync-only middleware would push the rest of the chain into a thread
+        for path in settings.MIDDLEWARE:
+            assert getattr(import_string(path), 'async_capable', False), path
+
+    def test_brotli_is_preferred_when_installed(self, lesson):
+        brotli = pytest.importorskip('brotli')
+        response = APIClient().get(reverse('question-list'), HTTP_ACCEPT_ENCODING='gzip, br')
+        assert response.headers['Content-Encoding'] == 'br'
+        assert json.loads(brotli.decompress(response.content))
+
+
+@pytest.mark.django_db
+class TestWarmUp:
+    def test_warm_up_primes_the_catalog_structures(self, query_budget):
+        from .services.tags import get_tag_index
+        from .warmup import warm_up
+        course = Course.objects.create(name="Course", description="d", difficulty=2)
+        lesson = Lesson.objects.create(course=course, title="Lesson", tags=["loops"], order_index=1)
+        Question.objects.create(lesson=lesson, title="Q", content="?", correct_answer=["A"], order_index=1)
+        Student.objects.create(name="S", email="s@example.com")
+
+        steps = warm_up()
+        assert list(steps) == ["urls", "database", "catalog", "recommendation"]
+        with query_budget(0):
+            get_tag_index()
+
+    def test_server_profile(self, monkeypatch):
+        import runpy
+        from django.conf import settings as django_settings
+        path = django_settings.BASE_DIR / 'backend' / 'gunicorn.conf.py'
+        monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+
+        config = runpy.run_path(str(path))
+        assert config['preload_app'] and config['wsgi_app'] == 'backend.wsgi:application'
+        assert config['workers'] == 2 * config['cores'] + 1
+        assert 0 < config['max_requests_jitter'] < config['max_requests']
+        assert all(callable(config[hook]) for hook in ('when_ready', 'pre_fork', 'post_fork', 'post_worker_init'))
+
+        monkeypatch.setenv('GUNICORN_WORKER', 'uvicorn')
+        monkeypatch.setenv('API_ASYNC_VIEWS', '0')
+        config = runpy.run_path(str(path))
+        assert config['wsgi_app'] == 'backend.asgi:application'
+        assert config['worker_class'] == 'uvicorn.workers.UvicornWorker'
+
+
+class TestStartupProfiles:
+    def test_api_only_profile_boots_and_serves(self):
+        from .benchmarks.startup import profile_startup
+        result = profile_startup('backend.settings_api', requests=5, runs=1)
+        assert set(result['routes']) == {'revalidate', 'analyze-code'}
+        assert result['setup_ms'] < result['ready_ms']
+
+    def test_api_only_profile_drops_unused_apps_and_middleware(self):
+        import importlib
+        full, lean = importlib.import_module('backend.settings'), importlib.import_module('backend.settings_api')
+        assert not any(app.startswith('django.contrib.') for app in lean.INSTALLED_APPS)
+        assert set(lean.MIDDLEWARE) < set(full.MIDDLEWARE)
+        assert lean.DATABASES == full.DATABASES
+
+
+class TestSharedCacheCheck:
+    def test_several_workers_need_a_shared_cache(self, monkeypatch, settings):
+        from .checks import check_shared_cache
+        monkeypatch.setenv('WEB_CONCURRENCY', '4')
+        assert [error.id for error in check_shared_cache(None)] == ['api.E001']
+
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        assert check_shared_cache(None) == []
+
+    def test_a_single_worker_may_keep_its_own_cache(self, monkeypatch):
+        from .checks import check_shared_cache
+        monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+        assert check_shared_cache(None) == []
+
+
+class TestServerProfileCache:
+    def test_a_process_local_cache_runs_a_single_worker(self, settings):
+        import runpy
+        from unittest import mock
+        config = runpy.run_path(str(settings.BASE_DIR / 'backend' / 'gunicorn.conf.py'))
+        assert config['timeout'] == 30
+
+        server = mock.Mock(num_workers=1)
+        config['nworkers_changed'](server, 1, None)
+        server.log.warning.assert_not_called()
+
+        server.num_workers = 4
+        config['nworkers_changed'](server, 4, 1)
+        assert server.num_workers == 1
+        assert 'API_CACHE_URL' in server.log.warning.call_args.args[2]
+
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        server.num_workers = 4
+        config['nworkers_changed'](server, 4, 1)
+        assert server.num_workers == 4
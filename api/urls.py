@@ -1,20 +1,63 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     StudentOverview, StudentRecommendation, AttemptCreate, AnalyzeCode,
     CourseList, LessonList, QuestionList, QuestionDetail, QuestionAttemptCreate,
-    StudentQuestionAttempts, LessonQuestions
+    StudentQuestionAttempts, LessonQuestions, AsyncStudentOverview,
+    AsyncStudentRecommendation, AsyncStudentQuestionAttempts, AsyncLessonQuestions,
+    StudentEvents, StudentDueReviews, CourseAnalytics, LessonAnalytics, GlobalLeaderboard,
+    CourseLeaderboard, QuestionHint, Search
 )
 
+# Under ASGI the hot read endpoints are served by their async counterparts
+if settings.API_ASYNC_VIEWS:
+    StudentOverview = AsyncStudentOverview
+    StudentRecommendation = AsyncStudentRecommendation
+    StudentQuestionAttempts = AsyncStudentQuestionAttempts
+    LessonQuestions = AsyncLessonQuestions
+
 urlpatterns = [
     path('students/<int:pk>/overview/', StudentOverview.as_view(), name='student-overview'),
     path('students/<int:pk>/recommendation/', StudentRecommendation.as_view(), name='student-recommendation'),
+    path('students/<int:pk>/events/', StudentEvents.as_view(), name='student-events'),
     path('students/<int:pk>/question-attempts/', StudentQuestionAttempts.as_view(), name='student-question-attempts'),
+    path('students/<int:pk>/reviews/due/', StudentDueReviews.as_view(), name='student-reviews-due'),
     path('courses/', CourseList.as_view(), name='course-list'),
+    path('courses/<int:pk>/analytics/', CourseAnalytics.as_view(), name='course-analytics'),
+    path('courses/<int:pk>/leaderboard/', CourseLeaderboard.as_view(), name='course-leaderboard'),
     path('lessons/', LessonList.as_view(), name='lesson-list'),
     path('lessons/<int:lesson_id>/questions/', LessonQuestions.as_view(), name='lesson-questions'),
+    path('lessons/<int:lesson_id>/analytics/', LessonAnalytics.as_view(), name='lesson-analytics'),
     path('questions/', QuestionList.as_view(), name='question-list'),
     path('questions/<int:pk>/', QuestionDetail.as_view(), name='question-detail'),
+    path('questions/<int:pk>/hints/<int:number>/', QuestionHint.as_view(), name='question-hint'),
     path('question-attempts/', QuestionAttemptCreate.as_view(), name='question-attempt-create'),
     path('attempts/', AttemptCreate.as_view(), name='attempt-create'),
+    path('leaderboard/', GlobalLeaderboard.as_view(), name='leaderboard'),
     path('analyze-code/', AnalyzeCode.as_view(), name='analyze-code'),
+    path('search/', Search.as_view(), name='search'),
 ]
+
+# Maximum queries per request, independent of data size. Enforced for every
+# named route above by TestQueryBudgets; new endpoints must declare one.
+QUERY_BUDGETS = {
+    'student-overview': 6,
+    'student-recommendation': 6,
+    'student-events': 1,
+    'student-question-attempts': 2,
+    'student-reviews-due': 2,
+    'course-list': 1,
+    'course-analytics': 3,
+    'course-leaderboard': 3,
+    'lesson-list': 2,
+    'lesson-questions': 5,
+    'lesson-analytics': 2,
+    'question-list': 2,
+    'question-detail': 2,
+    'question-hint': 4,
+    'question-attempt-create': 9,
+    'attempt-create': 3,
+    'leaderboard': 2,
+    'analyze-code': 0,
+    'search': 1,
+}
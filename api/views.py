@@ -1,13 +1,38 @@
+import asyncio
+import hmac
+import ipaddress
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 from .models import Student, Course, Lesson, Attempt, Question, Hint, QuestionAttempt
+from .metrics import registry
 from .serializers import (
     StudentSerializer, CourseSerializer, LessonSerializer, AttemptSerializer,
-    QuestionSerializer, HintSerializer, QuestionAttemptSerializer
+    QuestionSerializer, QuestionSummarySerializer, HintSerializer, QuestionAttemptSerializer, DueReviewSerializer
 )
-from .services.recommender import get_recommendation
+from .services.events import student_event_stream, astudent_event_stream
+from .services.grading import grade
+from .services.hints import consume_reveals, get_hints, hint_penalty, reveal_hint
+from .services.idempotency import fingerprint, idempotency_key, recent_keys
+from .services.ingest import flushes_pending, submit
+from .services.overview import get_student_overview, aget_student_overview
+from .services.leaderboard import GLOBAL, course_board, leaderboard
+from .services.recommender import get_recommendation_batched, aget_recommendation
+from .services.rollups import GRANULARITIES, course_analytics, lesson_analytics
+from .services.scheduler import due_reviews
+from .services.search import KINDS, search
+from .services.versioning import versioned_condition
 
 # Custom throttling classes - Disabled for development
 class StrictAnonRateThrottle:
@@ -21,11 +46,13 @@ class StrictUserRateThrottle:
         return True
 
 # Generic views for courses and lessons
+@method_decorator(versioned_condition(), name='get')
 class CourseList(generics.ListAPIView):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     throttle_classes = []  # Explicitly disable throttling
 
+@method_decorator(versioned_condition(student_param='student'), name='get')
 class LessonList(APIView):
     throttle_classes = []  # Explicitly disable throttling
 
@@ -58,6 +85,8 @@ class LessonList(APIView):
         return Response(serializer.data)
 
 # Student Overview
+@method_decorator(flushes_pending(student_kwarg='pk'), name='get')
+@method_decorator(versioned_condition(student_kwarg='pk'), name='get')
 class StudentOverview(APIView):
     throttle_classes = []  # Explicitly disable throttling
 
@@ -67,89 +96,10 @@ class StudentOverview(APIView):
         except Student.DoesNotExist:
             return Response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Optimize queries with select_related and prefetch_related
-        courses = Course.objects.prefetch_related('lessons__questions').all()
-        student_attempts = Attempt.objects.filter(student=student).select_related('lesson__course')
-        student_question_attempts = QuestionAttempt.objects.filter(student=student).select_related('question__lesson__course')
-
-        # Create course lookup for IDs
-        course_lookup = {course.name: course.id for course in courses}
-
-        # Create lookup dictionaries to avoid N+1 queries
-        attempt_counts = {}
-        last_activities = {}
-        attempted_lesson_ids = set()
-        
-        # Track question completions per course
-        question_completions = {}
-        total_questions_per_course = {}
-
-        # Calculate total questions per course
-        for course in courses:
-            total_questions = sum(lesson.questions.count() for lesson in course.lessons.all())
-            total_questions_per_course[course.id] = total_questions
-            question_completions[course.id] = set()
-
-        # Process lesson attempts
-        for attempt in student_attempts:
-            course_id = attempt.lesson.course.id
-            lesson_id = attempt.lesson.id
-
-            # Count attempts per course
-            attempt_counts[course_id] = attempt_counts.get(course_id, 0) + 1
-
-            # Track last activity per course
-            if course_id not in last_activities or attempt.timestamp > last_activities[course_id]:
-                last_activities[course_id] = attempt.timestamp
-
-            # Track attempted lessons
-            attempted_lesson_ids.add(lesson_id)
-
-        # Process question attempts to track completions
-        for question_attempt in student_question_attempts:
-            course_id = question_attempt.question.lesson.course.id
-            question_id = question_attempt.question.id
-            
-            # Track last activity per course (from question attempts too)
-            if course_id not in last_activities or question_attempt.timestamp > last_activities[course_id]:
-                last_activities[course_id] = question_attempt.timestamp
-            
-            # Count attempted questions (any attempt counts as progress, not just correct ones)
-            question_completions[course_id].add(question_id)
-
-        data = []
-        for course in courses:
-            lessons = list(course.lessons.order_by('order_index'))
-            lesson_count = len(lessons)
-
-            # Find next unattempted lesson
-            next_up = None
-            for lesson in lessons:
-                if lesson.id not in attempted_lesson_ids:
-                    next_up = lesson
-                    break
-
-            # Calculate dynamic progress based on question attempts (any attempt counts)
-            attempted_questions = len(question_completions.get(course.id, set()))
-            total_questions = total_questions_per_course.get(course.id, 0)
-            
-            # Progress is based on question attempts (more fair - any attempt counts as progress)
-            if total_questions > 0:
-                progress = attempted_questions / total_questions
-            else:
-                progress = 0
-
-            data.append({
-                "course_id": course.id,
-                "course_name": course.name,
-                "progress": progress,
-                "last_activity": last_activities.get(course.id),
-                "next_up": next_up.title if next_up else None
-            })
-
-        return Response(data)
+        return Response(get_student_overview(student))
 
 # Recommendation Endpoint
+@method_decorator(flushes_pending(student_kwarg='pk'), name='get')
 class StudentRecommendation(APIView):
     throttle_classes = []  # Explicitly disable throttling
 
@@ -159,14 +109,64 @@ class StudentRecommendation(APIView):
         except Student.DoesNotExist:
             return Response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        recommendation = get_recommendation(student)
+        recommendation = get_recommendation_batched(student)
         return Response(recommendation)
 
 # Create Attempt
-class AttemptCreate(generics.CreateAPIView):
+class IdempotentCreateMixin:
+    """
+    Replays the first response when a student retries a submission with the
+    same Idempotency-Key instead of creating a duplicate (services.idempotency)
+    """
+    fingerprint_fields = ()
+
+    def key_scope(self, serializer, key):
+        return (self.queryset.model._meta.label, serializer.validated_data['student'].pk, key)
+
+    def replay(self, seen, submitted):
+        original, data = seen
+        if original != submitted:
+            return Response(
+                {"error": "Idempotency-Key was already used for a different submission"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(data, status=status.HTTP_200_OK, headers={'Idempotent-Replayed': 'true'})
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        key = idempotency_key(request, serializer.validated_data)
+        if key is None:
+            self.perform_create(serializer)
+            return Response(serializer.data, status=status.HTTP_201_CREATED,
+                            headers=self.get_success_headers(serializer.data))
+
+        model = self.queryset.model
+        scope = self.key_scope(serializer, key)
+        submitted = fingerprint(model(**serializer.validated_data), self.fingerprint_fields)
+        seen = recent_keys.get(scope)
+        if seen is None:
+            try:
+                with transaction.atomic():
+                    self.perform_create(serializer)
+            except IntegrityError:
+                existing = model.objects.filter(student=serializer.validated_data['student'], idempotency_key=key).first()
+                if existing is None:
+                    raise
+                seen = (fingerprint(existing, self.fingerprint_fields), self.get_serializer(existing).data)
+                recent_keys.put(scope, seen)
+            else:
+                recent_keys.put(scope, (submitted, serializer.data))
+                return Response(serializer.data, status=status.HTTP_201_CREATED,
+                                headers=self.get_success_headers(serializer.data))
+        return self.replay(seen, submitted)
+
+
+class AttemptCreate(IdempotentCreateMixin, generics.CreateAPIView):
     queryset = Attempt.objects.all()
     serializer_class = AttemptSerializer
     throttle_classes = []  # Explicitly disable throttling
+    fingerprint_fields = ('lesson', 'correctness', 'hints_used', 'duration_sec')
 
 # Analyze JavaScript Code (static analysis rules)
 class AnalyzeCode(APIView):
@@ -255,46 +255,136 @@ class AnalyzeCode(APIView):
 
 
 # Question Management
-class QuestionList(generics.ListAPIView):
-    serializer_class = QuestionSerializer
+def hints_as_count(params):
+    """``?hints=count``: questions carry ``hint_count`` instead of every hint"""
+    return params.get('hints') == 'count'
+
+
+def with_hints(queryset, params):
+    if hints_as_count(params):
+        return queryset.annotate(hint_count=Count('hints'))
+    return queryset.prefetch_related('hints')
+
+
+class QuestionHintsMixin:
+    def get_serializer_class(self):
+        return QuestionSummarySerializer if hints_as_count(self.request.query_params) else QuestionSerializer
+
+
+@method_decorator(versioned_condition(), name='get')
+class QuestionList(QuestionHintsMixin, generics.ListAPIView):
     throttle_classes = []  # Explicitly disable throttling
 
     def get_queryset(self):
-        queryset = Question.objects.select_related('lesson__course').prefetch_related('hints').all()
+        queryset = with_hints(Question.objects.select_related('lesson__course'), self.request.query_params)
         lesson_id = self.request.query_params.get('lesson')
         if lesson_id:
             queryset = queryset.filter(lesson_id=lesson_id)
         return queryset
 
 
-class QuestionDetail(generics.RetrieveAPIView):
-    queryset = Question.objects.select_related('lesson__course').prefetch_related('hints')
-    serializer_class = QuestionSerializer
+@method_decorator(versioned_condition(), name='get')
+class QuestionDetail(QuestionHintsMixin, generics.RetrieveAPIView):
+    throttle_classes = []  # Explicitly disable throttling
+
+    def get_queryset(self):
+        return with_hints(Question.objects.select_related('lesson__course'), self.request.query_params)
+
+
+class QuestionHint(APIView):
     throttle_classes = []  # Explicitly disable throttling
 
+    def post(self, request, pk, number):
+        """Reveal hint ``number`` of a question to a student, who is charged for it on the next attempt"""
+        try:
+            student_id = int(request.data.get('student'))
+        except (TypeError, ValueError):
+            return Response({"error": "student must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if not Student.objects.filter(id=student_id).exists():
+            return Response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
 
-class QuestionAttemptCreate(generics.CreateAPIView):
+        try:
+            hint, revealed = reveal_hint(student_id, pk, number)
+        except LookupError:
+            if not get_hints(pk) and not Question.objects.filter(id=pk).exists():
+                return Response({"error": "Question not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"error": "Hint not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_409_CONFLICT)
+
+        return Response({
+            "question": pk,
+            "hint": number,
+            "content": hint['content'],
+            "penalty_points": hint['penalty_points'],
+            "hints_revealed": revealed,
+            "hint_count": len(get_hints(pk)),
+        })
+
+
+class QuestionAttemptCreate(IdempotentCreateMixin, generics.CreateAPIView):
     queryset = QuestionAttempt.objects.all()
     serializer_class = QuestionAttemptSerializer
     throttle_classes = []  # Explicitly disable throttling
-
-    def perform_create(self, serializer):
+    # is_correct and hints_used are settled by the server, so retries may send any value
+    fingerprint_fields = ('question', 'answer', 'duration_sec')
+
+    def grade(self, data):
+        """Grade the answer; the client's is_correct only counts for questions the server cannot grade"""
+        is_correct = grade(data['question'], data['answer'])
+        if is_correct is None:
+            if data.get('is_correct') is None:
+                raise ValidationError({'is_correct': "Required for questions that are not graded by the server"})
+            return
+        data['is_correct'] = is_correct
+
+    def hints_used(self, data):
+        """Hints revealed through the hint endpoint, or the client's count if it is higher"""
+        return max(data.get('hints_used', 0), consume_reveals(data['student'].pk, data['question'].pk))
+
+    def points_earned(self, data):
         """Automatically calculate points earned based on correctness and hints used"""
-        question_attempt = serializer.save()
-
-        # Calculate points earned
-        question = question_attempt.question
-        base_points = question.points
-        hint_penalty = sum(
-            hint.penalty_points
-            for hint in question.hints.all()[:question_attempt.hints_used]
+        question = data['question']
+        penalty = hint_penalty(question.pk, data.get('hints_used', 0))
+        return max(0, question.points - penalty) if data['is_correct'] else 0
+
+    def create(self, request, *args, **kwargs):
+        if not settings.API_WRITE_BEHIND:
+            return super().create(request, *args, **kwargs)
+
+        # Write-behind: journal the validated attempt and acknowledge it; the
+        # flusher inserts it (the id stays null in this response)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        key = idempotency_key(request, serializer.validated_data)
+        if key is not None:
+            # Duplicates missed here (other workers) are dropped by the flusher
+            seen = recent_keys.get(self.key_scope(serializer, key))
+            if seen is not None:
+                submitted = QuestionAttempt(**serializer.validated_data)
+                return self.replay(seen, fingerprint(submitted, self.fingerprint_fields))
+
+        self.grade(serializer.validated_data)
+        serializer.validated_data['hints_used'] = self.hints_used(serializer.validated_data)
+        attempt = QuestionAttempt(
+            **serializer.validated_data, points_earned=self.points_earned(serializer.validated_data)
         )
 
-        points_earned = max(0, base_points - hint_penalty) if question_attempt.is_correct else 0
-        question_attempt.points_earned = points_earned
-        question_attempt.save()
+        submit(attempt)
+        data = self.get_serializer(attempt).data
+        if key is not None:
+            recent_keys.put(self.key_scope(serializer, key), (fingerprint(attempt, self.fingerprint_fields), data))
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+    def perform_create(self, serializer):
+        # Calculate points earned before saving, so the row is written once
+        # and post_save handlers see the final attempt
+        self.grade(serializer.validated_data)
+        serializer.validated_data['hints_used'] = self.hints_used(serializer.validated_data)
+        serializer.save(points_earned=self.points_earned(serializer.validated_data))
 
 
+@method_decorator(flushes_pending(student_kwarg='pk'), name='get')
 class StudentQuestionAttempts(APIView):
     throttle_classes = []  # Explicitly disable throttling
 
@@ -313,51 +403,191 @@ class StudentQuestionAttempts(APIView):
         return Response(serializer.data)
 
 
+@method_decorator(flushes_pending(student_kwarg='pk'), name='get')
+class StudentDueReviews(APIView):
+    throttle_classes = []  # Explicitly disable throttling
+    max_limit = 100
+
+    def get(self, request, pk):
+        """Previously attempted questions due for review, most overdue first"""
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= self.max_limit:
+            return Response(
+                {"error": f"limit must be between 1 and {self.max_limit}"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            student = Student.objects.get(id=pk)
+        except Student.DoesNotExist:
+            return Response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = DueReviewSerializer(due_reviews(student, limit=limit), many=True)
+        return Response(serializer.data)
+
+
+def analytics_params(request, max_days=365):
+    """``(granularity, days)`` from the query string, or an error message"""
+    granularity = request.query_params.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return None, f"granularity must be one of {', '.join(GRANULARITIES)}"
+    try:
+        days = int(request.query_params.get('days', 30))
+    except ValueError:
+        return None, "days must be an integer"
+    if not 1 <= days <= max_days:
+        return None, f"days must be between 1 and {max_days}"
+    return (granularity, days), None
+
+
+class CourseAnalytics(APIView):
+    throttle_classes = []  # Explicitly disable throttling
+
+    def get(self, request, pk):
+        """Lesson funnel and attempt activity of a course, served from the rollup tables"""
+        params, error = analytics_params(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            course = Course.objects.get(id=pk)
+        except Course.DoesNotExist:
+            return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(course_analytics(course, *params))
+
+
+class LessonAnalytics(APIView):
+    throttle_classes = []  # Explicitly disable throttling
+
+    def get(self, request, lesson_id):
+        """Funnel and attempt activity of a lesson, served from the rollup tables"""
+        params, error = analytics_params(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            lesson = Lesson.objects.select_related('funnel').get(id=lesson_id)
+        except Lesson.DoesNotExist:
+            return Response({"error": "Lesson not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(lesson_analytics(lesson, *params))
+
+
+def leaderboard_params(request, max_limit=100):
+    """``(limit, student_id)`` from the query string, or an error message"""
+    try:
+        limit = int(request.query_params.get('limit', 10))
+        student_id = request.query_params.get('student')
+        student_id = int(student_id) if student_id else None
+    except ValueError:
+        return None, "limit and student must be integers"
+    if not 1 <= limit <= max_limit:
+        return None, f"limit must be between 1 and {max_limit}"
+    return (limit, student_id), None
+
+
+class GlobalLeaderboard(APIView):
+    throttle_classes = []  # Explicitly disable throttling
+
+    def get(self, request):
+        """Top students by points across all courses, plus ?student=<id>'s rank"""
+        params, error = leaderboard_params(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(leaderboard(GLOBAL, *params))
+
+
+class CourseLeaderboard(APIView):
+    throttle_classes = []  # Explicitly disable throttling
+
+    def get(self, request, pk):
+        """Top students by points in one course, plus ?student=<id>'s rank"""
+        params, error = leaderboard_params(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not Course.objects.filter(id=pk).exists():
+            return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(leaderboard(course_board(pk), *params))
+
+
+def search_params(request, max_limit=100):
+    """``(query, kinds, course_id, tags, limit)`` from the query string, or an error message"""
+    params = request.query_params
+    query = params.get('q', '').strip()
+    kinds = [kind for kind in params.get('type', '').split(',') if kind]
+    tags = [tag.strip() for tag in params.get('tags', '').split(',') if tag.strip()]
+    if not query and not tags:
+        return None, "q or tags is required"
+    if any(kind not in KINDS for kind in kinds):
+        return None, f"type must be one of {', '.join(KINDS)}"
+    try:
+        limit = int(params.get('limit', 20))
+        course_id = params.get('course')
+        course_id = int(course_id) if course_id else None
+    except ValueError:
+        return None, "limit and course must be integers"
+    if not 1 <= limit <= max_limit:
+        return None, f"limit must be between 1 and {max_limit}"
+    return (query, kinds, course_id, tags, limit), None
+
+
+class Search(APIView):
+    throttle_classes = []  # Explicitly disable throttling
+
+    def get(self, request):
+        """Ranked courses, lessons, questions and hints matching ?q= (prefix terms), filtered by ?type=, ?course=, ?tags="""
+        params, error = search_params(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        query, kinds, course_id, tags, limit = params
+        return Response({"query": query, "results": search(query, kinds, course_id, tags, limit)})
+
+
+@method_decorator(flushes_pending(student_param='student'), name='get')
+@method_decorator(versioned_condition(student_param='student'), name='get')
 class LessonQuestions(APIView):
     throttle_classes = []  # Explicitly disable throttling
 
     def get(self, request, lesson_id):
         """Get all questions for a lesson with student's progress"""
         try:
-            lesson = Lesson.objects.get(id=lesson_id)
+            lesson = Lesson.objects.select_related('course').get(id=lesson_id)
         except Lesson.DoesNotExist:
             return Response({"error": "Lesson not found"}, status=status.HTTP_404_NOT_FOUND)
 
         # Get questions for this lesson
-        questions = Question.objects.filter(
-            lesson=lesson
-        ).prefetch_related('hints').order_by('order_index')
+        questions = with_hints(Question.objects.filter(lesson=lesson), request.query_params).order_by('order_index')
+        serializer_class = QuestionSummarySerializer if hints_as_count(request.query_params) else QuestionSerializer
 
-        # Get student ID from query params
+        # Latest attempt per question for the student, in one query
         student_id = request.query_params.get('student')
-        question_data = []
+        latest_attempts = {}
+        if student_id and Student.objects.filter(id=student_id).exists():
+            for attempt in QuestionAttempt.objects.filter(
+                student_id=student_id,
+                question__lesson=lesson
+            ).order_by('-timestamp'):
+                latest_attempts.setdefault(attempt.question_id, attempt)
 
+        question_data = []
         for question in questions:
-            question_info = QuestionSerializer(question).data
+            question_info = serializer_class(question).data
 
             # Add progress info if student is specified
-            if student_id:
-                try:
-                    student = Student.objects.get(id=student_id)
-                    latest_attempt = QuestionAttempt.objects.filter(
-                        student=student,
-                        question=question
-                    ).order_by('-timestamp').first()
-
-                    if latest_attempt:
-                        question_info['attempted'] = True
-                        question_info['last_attempt'] = {
-                            'is_correct': latest_attempt.is_correct,
-                            'hints_used': latest_attempt.hints_used,
-                            'points_earned': latest_attempt.points_earned,
-                            'timestamp': latest_attempt.timestamp
-                        }
-                    else:
-                        question_info['attempted'] = False
-                        question_info['last_attempt'] = None
-                except Student.DoesNotExist:
-                    question_info['attempted'] = False
-                    question_info['last_attempt'] = None
+            latest_attempt = latest_attempts.get(question.id)
+            if latest_attempt:
+                question_info['attempted'] = True
+                question_info['last_attempt'] = {
+                    'is_correct': latest_attempt.is_correct,
+                    'hints_used': latest_attempt.hints_used,
+                    'points_earned': latest_attempt.points_earned,
+                    'timestamp': latest_attempt.timestamp
+                }
             else:
                 question_info['attempted'] = False
                 question_info['last_attempt'] = None
@@ -372,3 +602,166 @@ class LessonQuestions(APIView):
             },
             'questions': question_data
         })
+
+
+# Async (ASGI-native) read endpoints, routed instead of the sync ones when
+# settings.API_ASYNC_VIEWS is enabled
+def render_json(data, status=status.HTTP_200_OK):
+    """Render with DRF's JSONRenderer so async and sync endpoints emit the same bytes"""
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+STUDENT_NOT_FOUND = {"error": "Student not found"}
+EVENTS_NEED_ASGI = {"error": "Live updates are not available on this server, poll the overview instead"}
+
+
+@method_decorator(flushes_pending(student_kwarg='pk'), name='get')
+@method_decorator(versioned_condition(student_kwarg='pk'), name='get')
+class AsyncStudentOverview(View):
+    async def get(self, request, pk):
+        try:
+            student = await Student.objects.aget(id=pk)
+        except Student.DoesNotExist:
+            return render_json(STUDENT_NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
+
+        return render_json(await aget_student_overview(student))
+
+
+@method_decorator(flushes_pending(student_kwarg='pk'), name='get')
+class AsyncStudentRecommendation(View):
+    async def get(self, request, pk):
+        try:
+            student = await Student.objects.aget(id=pk)
+        except Student.DoesNotExist:
+            return render_json(STUDENT_NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
+
+        return render_json(await aget_recommendation(student))
+
+
+@method_decorator(flushes_pending(student_kwarg='pk'), name='get')
+class AsyncStudentQuestionAttempts(View):
+    async def get(self, request, pk):
+        """Get all question attempts for a student"""
+        try:
+            student = await Student.objects.aget(id=pk)
+        except Student.DoesNotExist:
+            return render_json(STUDENT_NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
+
+        attempts = [
+            attempt async for attempt in QuestionAttempt.objects.filter(
+                student=student
+            ).select_related('question__lesson__course').order_by('-timestamp')
+        ]
+
+        serializer = QuestionAttemptSerializer(attempts, many=True)
+        return render_json(serializer.data)
+
+
+@method_decorator(flushes_pending(student_param='student'), name='get')
+@method_decorator(versioned_condition(student_param='student'), name='get')
+class AsyncLessonQuestions(View):
+    async def get(self, request, lesson_id):
+        """Get all questions for a lesson with student's progress"""
+        try:
+            lesson = await Lesson.objects.select_related('course').aget(id=lesson_id)
+        except Lesson.DoesNotExist:
+            return render_json({"error": "Lesson not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        async def load_questions():
+            return [
+                question async for question in with_hints(
+                    Question.objects.filter(lesson=lesson), request.GET
+                ).order_by('order_index')
+            ]
+
+        async def load_latest_attempts(student_id):
+            if not student_id or not await Student.objects.filter(id=student_id).aexists():
+                return {}
+            latest_attempts = {}
+            async for attempt in QuestionAttempt.objects.filter(
+                student_id=student_id, question__lesson=lesson
+            ).order_by('-timestamp'):
+                latest_attempts.setdefault(attempt.question_id, attempt)
+            return latest_attempts
+
+        questions, latest_attempts = await asyncio.gather(
+            load_questions(), load_latest_attempts(request.GET.get('student'))
+        )
+
+        serializer_class = QuestionSummarySerializer if hints_as_count(request.GET) else QuestionSerializer
+        question_data = []
+        for question in questions:
+            question_info = serializer_class(question).data
+            latest_attempt = latest_attempts.get(question.id)
+            if latest_attempt:
+                question_info['attempted'] = True
+                question_info['last_attempt'] = {
+                    'is_correct': latest_attempt.is_correct,
+                    'hints_used': latest_attempt.hints_used,
+                    'points_earned': latest_attempt.points_earned,
+                    'timestamp': latest_attempt.timestamp
+                }
+            else:
+                question_info['attempted'] = False
+                question_info['last_attempt'] = None
+            question_data.append(question_info)
+
+        return render_json({
+            'lesson': {
+                'id': lesson.id,
+                'title': lesson.title,
+                'course_name': lesson.course.name
+            },
+            'questions': question_data
+        })
+
+
+class StudentEvents(View):
+    """Server-sent overview/recommendation updates, replacing polling after each answer"""
+
+    def get(self, request, pk):
+        try:
+            student = Student.objects.get(id=pk)
+        except Student.DoesNotExist:
+            return render_json(STUDENT_NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
+
+        if isinstance(request, ASGIRequest):
+            stream = astudent_event_stream(student)
+        elif settings.API_EVENTS_ON_WSGI:
+            # Holds a worker for the life of the connection
+            stream = student_event_stream(student)
+        else:
+            # A few open tabs would take every sync worker; clients poll instead
+            response = render_json(EVENTS_NEED_ASGI, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = str(settings.API_EVENTS_MAX_SECONDS)
+            return response
+
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+def metrics_allowed(request):
+    """Whether ``request`` comes from API_METRICS_ALLOWED_IPS or carries API_METRICS_TOKEN"""
+    token = settings.API_METRICS_TOKEN
+    scheme, _, sent = request.headers.get('Authorization', '').partition(' ')
+    if token and scheme.lower() == 'bearer' and hmac.compare_digest(sent.encode(), token.encode()):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(allowed.strip(), strict=False)
+        for allowed in settings.API_METRICS_ALLOWED_IPS if allowed.strip()
+    )
+
+
+class Metrics(View):
+    """Request histograms in the Prometheus text exposition format, for allowed scrapers only"""
+
+    def get(self, request):
+        if not metrics_allowed(request):
+            return HttpResponse("Forbidden\n", status=403, content_type='text/plain; charset=utf-8')
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,73 @@
+"""
+Worker warm-up: what a cold worker would otherwise do on its first requests,
+done once before it takes traffic (hooked up in backend/gunicorn.conf.py).
+
+- ``prepare()`` only imports: the URLconf, and with it the views,
+  serializers and services, plus the resolver's reverse lookup tables. It
+  touches neither the database nor the cache, so the gunicorn master runs it
+  once before forking and every worker inherits the result.
+- ``warm_up()`` runs in each worker: it opens the database connections and
+  builds the per-worker catalog structures (tag index, global leaderboard),
+  then runs one overview and recommendation so their code paths and queries
+  have been through once.
+
+The step timings of the last warm-up are exported at /metrics.
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+from django.urls import get_resolver
+
+from .metrics import registry
+
+_timings = {}
+
+
+@contextmanager
+def _step(steps, name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        steps[name] = time.perf_counter() - started
+
+
+def prepare():
+    """Import and index the URLconf; safe before forking"""
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018 - imports every view and builds the lookup tables
+
+
+def warm_up():
+    """Prime connections and per-worker caches; returns ``{step: seconds}``"""
+    from .models import Student
+    from .services.leaderboard import GLOBAL, get_board
+    from .services.overview import get_student_overview
+    from .services.recommender import get_recommendation_batched
+    from .services.tags import get_tag_index
+
+    steps = {}
+    with _step(steps, "urls"):
+        prepare()
+    with _step(steps, "database"):
+        for connection in connections.all():
+            connection.ensure_connection()
+    with _step(steps, "catalog"):
+        get_tag_index()
+        get_board(GLOBAL)
+    with _step(steps, "recommendation"):
+        student = Student.objects.order_by('id').first()
+        if student is not None:
+            get_student_overview(student)
+            get_recommendation_batched(student)
+
+    _timings.clear()
+    _timings.update(steps)
+    return steps
+
+
+registry.gauge(
+    "api_worker_warmup_seconds", "Time each warm-up step took before this worker took traffic",
+    lambda: [({"step": name}, seconds) for name, seconds in _timings.items()],
+)
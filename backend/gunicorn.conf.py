@@ -0,0 +1,105 @@
+"""
+Production gunicorn settings:
+
+    gunicorn -c backend/gunicorn.conf.py                          # sync workers (WSGI)
+    GUNICORN_WORKER=uvicorn gunicorn -c backend/gunicorn.conf.py  # uvicorn workers (ASGI, async views)
+
+The app is imported once in the master (``preload_app``) and forked, so
+workers start with Django set up and the URLconf loaded. Each worker then
+opens its database connections and builds the catalog structures
+(``api.warmup``) before it accepts a request, and logs its time to ready.
+
+Environment: PORT, WEB_CONCURRENCY (workers), GUNICORN_WORKER (sync or
+uvicorn), GUNICORN_MAX_REQUESTS, GUNICORN_TIMEOUT; DJANGO_SETTINGS_MODULE=
+backend.settings_api selects the API-only settings profile. More than one
+worker needs a shared cache (API_CACHE_URL): on the in-process default the
+master logs a warning and runs a single worker.
+
+Server-sent events (/events/) are only streamed by uvicorn workers; sync
+workers answer them with 503 (API_EVENTS_ON_WSGI), so no request holds a
+sync worker for long and the default 30s timeout still catches hung ones.
+"""
+import os
+import time
+
+_started = time.perf_counter()
+
+ASYNC_WORKERS = os.environ.get("GUNICORN_WORKER", "sync") == "uvicorn"
+
+if ASYNC_WORKERS:
+    # Serve the hot read endpoints with their async views (see api/urls.py)
+    os.environ.setdefault("API_ASYNC_VIEWS", "1")
+    wsgi_app = "backend.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "backend.wsgi:application"
+    worker_class = "sync"
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Cores available to this process, which a container may limit below the host's
+cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+# A sync worker idles while it waits for the database, so run about two per
+# core; an event loop keeps its core busy on its own
+workers = int(os.environ.get("WEB_CONCURRENCY", cores + 1 if ASYNC_WORKERS else 2 * cores + 1))
+
+preload_app = True
+
+# Recycle workers to bound slow leaks; the jitter keeps them from all
+# restarting at the same moment
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+# Longer than the load balancer's idle timeout (60s on AWS ALB), so the
+# balancer closes idle connections rather than racing the worker
+keepalive = 75
+
+accesslog = "-"
+
+
+def nworkers_changed(server, new_value, old_value):
+    # Every worker must share the cache holding the versions behind ETags and
+    # per-worker caches (api/checks.py); also runs when TTIN adds workers
+    if new_value > 1:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+        from api.checks import process_local_cache, shared_cache_error
+
+        if process_local_cache():
+            error = shared_cache_error(new_value)
+            server.log.warning("%s; running 1 worker. %s", error.msg, error.hint)
+            server.num_workers = 1
+
+
+def when_ready(server):
+    from api.warmup import prepare
+
+    prepare()
+    server.log.info("Master ready in %.2fs with %d %s workers", time.perf_counter() - _started, workers, worker_class)
+
+
+def pre_fork(server, worker):
+    # Workers must not share a connection opened in the master
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    from api.warmup import warm_up
+
+    try:
+        steps = warm_up()
+    except Exception:
+        # A cold worker is still better than none; its first requests retry
+        worker.log.exception("Worker %s warm-up failed, serving cold", worker.pid)
+        return
+    worker.log.info(
+        "Worker %s ready in %.0fms (%s)", worker.pid, (time.perf_counter() - worker.forked_at) * 1000,
+        ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in steps.items()),
+    )
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -40,6 +41,8 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # ----------------------------------------------------------------------
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',  # outermost, so timings cover the whole stack
+    'api.middleware.CompressionMiddleware',  # before anything that reads or changes the body
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
 
@@ -76,6 +79,54 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+# Log requests slower than this many milliseconds with their SQL (None disables)
+API_SLOW_REQUEST_MS = None
+
+# /metrics answers scrapers from these addresses or networks (REMOTE_ADDR, so
+# behind a proxy list the proxy) and requests sending "Authorization: Bearer
+# <API_METRICS_TOKEN>"; anyone else gets 403
+API_METRICS_ALLOWED_IPS = os.environ.get('API_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+API_METRICS_TOKEN = os.environ.get('API_METRICS_TOKEN')
+
+# Response compression: gzip, or brotli when the brotli package is installed;
+# smaller bodies are not worth the CPU and the extra round of headers
+API_COMPRESSION_MIN_BYTES = 1024
+
+# N+1 detection: add 'api.middleware.NPlusOneMiddleware' to MIDDLEWARE on
+# staging; the query_budget test fixture uses the same threshold
+API_NPLUSONE_THRESHOLD = 5
+API_NPLUSONE_RAISE = False
+
+# Serve the read endpoints with async views (enable when running under ASGI/uvicorn)
+API_ASYNC_VIEWS = os.environ.get('API_ASYNC_VIEWS') == '1'
+
+# Calibrated difficulty (manage.py compute_stats): the hand-set difficulty
+# weighs as much as this many attempts, and attempts are folded in batches
+API_DIFFICULTY_PRIOR_ATTEMPTS = 10
+API_STATS_BATCH_SIZE = 10000
+
+# Analytics rollups (manage.py aggregate_rollups): attempts folded per batch
+API_ROLLUP_BATCH_SIZE = 10000
+
+# Both jobs leave attempts younger than this for their next run, so an
+# attempt whose transaction commits late is not passed over by the checkpoint
+API_CHECKPOINT_LAG_SECONDS = 60
+
+# Idempotency-Key replays: keys remembered per worker before asking the database
+API_IDEMPOTENCY_CACHE_SIZE = 10000
+
+# Write-behind answer ingestion: POST /question-attempts/ journals the
+# attempt and answers 202; manage.py flush_attempts inserts journaled
+# attempts in batches (run it with --interval 0.2 while this is enabled).
+# Single host only: the journal is a local directory, so the web workers
+# and the flusher must all run on the host that holds it.
+API_WRITE_BEHIND = os.environ.get('API_WRITE_BEHIND') == '1'
+API_WRITE_BEHIND_JOURNAL = os.environ.get('API_WRITE_BEHIND_JOURNAL', BASE_DIR / 'var' / 'attempt-journal')
+API_WRITE_BEHIND_FSYNC = True           # acknowledge only once the record is on disk
+API_WRITE_BEHIND_BATCH_SIZE = 500       # attempts per flush transaction
+API_WRITE_BEHIND_SEGMENT_BYTES = 64 * 1024 * 1024
+API_WRITE_BEHIND_READ_WAIT = 2.0        # seconds a student's read waits for the flusher to commit their attempts
+
 # ----------------------------------------------------------------------
 # DATABASE
 # ----------------------------------------------------------------------
@@ -83,9 +134,50 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Seconds to keep a connection across requests (0 closes it after each);
+        # production sets this so the connection a worker opens while warming up is reused
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# ----------------------------------------------------------------------
+# CACHE
+# ----------------------------------------------------------------------
+# Catalog, student and leaderboard versions live here (ETags and every
+# per-worker cache keyed by them: grading matchers, tag index, leaderboards)
+# as do the write-behind markers, so all worker processes must share it.
+# Set API_CACHE_URL to a Redis URL (needs the redis package) whenever more
+# than one worker runs; the in-process default is for a single process, and
+# check api.E001 and backend/gunicorn.conf.py refuse more workers with it.
+if os.environ.get('API_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['API_CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# ----------------------------------------------------------------------
+# PROGRESS EVENTS (server-sent events)
+# ----------------------------------------------------------------------
+# LocalBroker only reaches streams in the same process; use
+# 'api.services.events.PostgresBroker' to fan out across workers.
+API_EVENTS_BROKER = 'api.services.events.LocalBroker'
+API_EVENTS_HEARTBEAT = 15       # seconds between keep-alive comments
+API_EVENTS_MAX_SECONDS = 300    # clients reconnect after this (EventSource does it automatically)
+# Under WSGI a stream holds a sync worker for up to API_EVENTS_MAX_SECONDS,
+# so /events/ answers 503 with Retry-After there (clients keep polling)
+# unless API_EVENTS_ON_WSGI=1, e.g. for runserver; serve streams from
+# ASGI workers (GUNICORN_WORKER=uvicorn)
+API_EVENTS_ON_WSGI = os.environ.get('API_EVENTS_ON_WSGI') == '1'
+
 # ----------------------------------------------------------------------
 # PASSWORD VALIDATION
 # ----------------------------------------------------------------------
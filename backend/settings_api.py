@@ -0,0 +1,37 @@
+"""
+API-only settings: backend.settings without what a JSON API with no logins
+never uses, for production workers:
+
+    DJANGO_SETTINGS_MODULE=backend.settings_api gunicorn -c backend/gunicorn.conf.py
+
+Dropped: the admin (not routed in backend/urls.py), auth, content types,
+sessions, messages, static files and templates, and the CSRF, clickjacking
+and throttling middleware (no cookies are read, responses are JSON and DRF
+throttling is already off). Translations are off, all API messages are
+English. The database and its migrations are the same as with
+backend.settings. ``manage.py bench_startup`` compares the two profiles.
+"""
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'corsheaders',
+    'api',
+]
+
+MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',  # outermost, so timings cover the whole stack
+    'api.middleware.CompressionMiddleware',  # before anything that reads or changes the body
+    'django.middleware.security.SecurityMiddleware',
+    'corsheaders.middleware.CorsMiddleware',  # must be before CommonMiddleware
+    'django.middleware.common.CommonMiddleware',
+]
+
+TEMPLATES = []
+
+USE_I18N = False
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    # The default, AnonymousUser, needs django.contrib.auth
+    'UNAUTHENTICATED_USER': None,
+}
@@ -1,5 +1,8 @@
 from django.urls import path, include
 
+from api.views import Metrics
+
 urlpatterns = [
     path('api/', include('api.urls')),
+    path('metrics', Metrics.as_view(), name='metrics'),
 ]